@@ -0,0 +1,99 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# CatScents.py - Scents that cats leave in the cells they stand in, stored as the timestep they were left in
+#
+# A scent starts at an intensity of 1 and is multiplied by 0.9 every timestep (including the one it was left in) until
+# it drops below 0.01, when it is gone. Instead of updating every cell every timestep, each cell keeps the cat that
+# left its latest scent and when, and the intensity is looked up from how many timesteps ago that was. The table of
+# intensities is built by repeated multiplication, so the values are exactly those of multiplying every timestep.
+#
+
+import collections
+import numpy as np
+from Interactions import sexes
+
+decay = 0.9 												# Scents are multiplied by this every timestep
+cutoff = 0.01 												# Scents below this intensity are gone
+
+# Intensity of a scent by its age in timesteps (0 for a scent left in the latest timestep), while it is above the cutoff
+intensities = []
+intensity = 1
+while intensity*decay >= cutoff:
+	intensity *= decay
+	intensities.append(intensity)
+lifetime = len(intensities) 								# Number of timesteps a scent lasts
+no_scent = [None,None,0] 									# What a cell without a scent holds (shared, so it isn't changed)
+
+class CatScents():
+	def __init__(self):
+		self.now = 0 										# Number of timesteps in which scents have been left
+		self.scents = {} 									# Cat, sex and timestep of the latest scent, by cell
+		self.left = collections.deque() 					# Timestep and cell of every scent still around, oldest first
+
+	# Method that starts a new timestep, in which every cat leaves a scent in its cell (replacing any scent already there)
+	def update(self,alive_cats):
+		self.now += 1
+		for cat in alive_cats:
+			cell = (cat.pos[0],cat.pos[1])
+			self.scents[cell] = (cat,cat.sex,self.now)
+			self.left.append((self.now,cell))
+		while len(self.left)>0 and self.now-self.left[0][0] >= lifetime: 		# Forgetting scents that are gone
+			hour,cell = self.left.popleft()
+			scent = self.scents.get(cell)
+			if scent is not None and scent[2]==hour:
+				del self.scents[cell]
+
+	# Method that returns the cat that left the scent in a cell, its sex and the scent's intensity ([None,None,0] if there is none)
+	def at(self,r,c):
+		scent = self.scents.get((r,c))
+		if scent is None:
+			return no_scent
+		age = self.now-scent[2]
+		if age >= lifetime:
+			return no_scent
+		return [scent[0],scent[1],intensities[age]]
+
+	# Method that returns the cells, cats, sexes and intensities of the scents that are still around
+	def current(self):
+		cells,cats,cat_sexes,values = [],[],[],[]
+		for cell,(cat,cat_sex,hour) in self.scents.items():
+			if self.now-hour < lifetime:
+				cells.append(cell)
+				cats.append(cat)
+				cat_sexes.append(cat_sex)
+				values.append(intensities[self.now-hour])
+		return cells,cats,cat_sexes,values
+
+	# Method that returns the scents left after a timestep that are still the latest in their cells, as (row, column,
+	# index of the cat, its sex as in Interactions.sexes, timestep), with -1, -1 and 0 for cells whose scent is gone
+	def left_since(self,hour):
+		seen = set()
+		found = []
+		for left_hour,cell in reversed(self.left):
+			if left_hour<=hour:
+				break
+			if cell in seen:
+				continue 											# Only the latest scent in a cell counts
+			seen.add(cell)
+			scent = self.scents.get(cell)
+			if scent is None:
+				found.append((cell[0],cell[1],-1,-1,0))
+			else:
+				found.append((cell[0],cell[1],scent[0].index,sexes[scent[1]],scent[2]))
+		return found
+
+	# Method that returns grids of the index of the cat that left each scent, its sex (as in Interactions.sexes) and the
+	# scent's intensity, with -1, -1 and 0 where there is no scent
+	def grids(self,shape):
+		owner = np.full(shape,-1,dtype=int)
+		sex = np.full(shape,-1,dtype=int)
+		intensity = np.zeros(shape)
+		cells,cats,cat_sexes,values = self.current()
+		if len(cells)>0:
+			rows,cols = np.array(cells).T
+			owner[rows,cols] = [cat.index for cat in cats]
+			sex[rows,cols] = [sexes[cat_sex] for cat_sex in cat_sexes]
+			intensity[rows,cols] = values
+		return owner,sex,intensity
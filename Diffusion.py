@@ -0,0 +1,64 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# Diffusion.py - Diffusion of the food and water scents, optionally split into row bands on a thread pool
+#
+# The diffusion model is sourced from heat.py from COMP1005 Practical 5
+# Maxville, Valerie. 2021. “heat.py” Practical 5, COMP1005 Fundamentals of Programming, Semester 2, 2021
+#
+
+import numpy as np
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Weights of the cells around (and including) each cell, in the order they are added up
+weights = {"M": [(-1,-1,0.1),(-1,0,0.1),(-1,1,0.1),(0,-1,0.1),(0,0,0.2),(0,1,0.1),(1,-1,0.1),(1,0,0.1),(1,1,0.1)],	# Moore neighbourhood
+		"V": [(-1,0,0.15),(0,-1,0.15),(0,0,0.4),(0,1,0.15),(1,0,0.15)]}									# Von Neumann neighbourhood
+
+min_band_rows = 64 									# Bands any smaller than this aren't worth handing to another thread
+pools = {} 											# Thread pools by number of threads, each created the first time it is needed
+pools_lock = threading.Lock() 						# Simulations in different threads may ask for a pool at the same time
+
+# Function that diffuses rows r0 to r1-1 of an array into 'out'; only reads rows r0-1 to r1 (the band plus a halo row on each side)
+# Any leading axes (e.g. one grid per replica world) are diffused independently in the same operations
+def diffuse_rows(array,out,r0,r1,neighbourhood):
+	cols = array.shape[-1]
+	new = np.zeros(array.shape[:-2]+(r1-r0,cols-2))
+	term = np.empty(new.shape)
+	for dr,dc,weight in weights[neighbourhood]:
+		np.multiply(array[...,r0+dr:r1+dr,1+dc:cols-1+dc],weight,out=term)		# numpy releases the GIL for these array operations
+		new += term
+	new[new<0.01] = 0
+	out[...,r0:r1,1:cols-1] = new
+
+# Function that diffuses the scent of food or water into the environment
+def diffuse(array,neighbourhood):
+	copy = array.copy()
+	diffuse_rows(array,copy,1,array.shape[-2]-1,neighbourhood)
+	return copy
+
+# Function that returns the thread pool with a number of threads; pools are never replaced or shut down, so simulations
+# with different numbers of threads each keep using their own
+def thread_pool(threads):
+	with pools_lock:
+		if threads not in pools:
+			pools[threads] = ThreadPoolExecutor(max_workers=threads)
+		return pools[threads]
+
+# Function that diffuses several arrays at the same time, each split into row bands that are run on a thread pool
+def diffuse_fields(arrays,neighbourhood,threads):
+	rows = arrays[0].shape[-2]-2
+	bands = min(threads,rows//min_band_rows)
+	if bands<=1:
+		return [diffuse(array,neighbourhood) for array in arrays]
+	pool = thread_pool(threads)
+	copies = [array.copy() for array in arrays]
+	edges = np.linspace(1,rows+1,bands+1).astype(int)
+	jobs = []
+	for array,copy in zip(arrays,copies):
+		for b in range(bands):
+			jobs.append(pool.submit(diffuse_rows,array,copy,edges[b],edges[b+1],neighbourhood))		# Bands only share their halo rows, which are read-only
+	for job in jobs:
+		job.result()
+	return copies
@@ -0,0 +1,179 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# EquivalenceTest.py - Checks that a simulation engine behaves the same as the reference engine
+#
+# Usage: python3 EquivalenceTest.py [exact|stats|all] [name=value ...]
+#	exact: runs both engines with the same seeds and checks that the logs and final grids are identical
+#	stats: runs both engines with different seeds and checks that the final statistics and population
+#	       trajectories could have come from the same distribution (two-sample Kolmogorov-Smirnov tests)
+#	Harness settings below can be changed with name=value arguments; any other name=value arguments are
+#	passed on to the candidate engine (e.g. diffusion_threads=4)
+# Exits with status 1 if any scenario fails
+#
+
+import numpy as np
+import subprocess
+import tempfile
+import shutil
+import math
+import sys
+import os
+import re
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+# Scenarios: terrain, landmarks, neighbourhood, max_hours, init_pop, mating_cooldown_time, sleep_hours
+scenarios = [("terrain.csv","landmarks.csv","M",200,20,24,8),
+			("terrain.csv","landmarks.csv","V",200,20,24,8),
+			("terrain.csv","landmarks.csv","M",150,80,12,4),
+			("terrain.csv","landmarks2.csv","V",150,40,48,12),
+			("terrain2.csv","landmarks.csv","M",150,30,24,8),
+			("terrain2.csv","landmarks2.csv","V",120,50,24,8),
+			("terrain2.csv","landmarks3.csv","M",100,30,24,8)]
+
+# Harness settings (can be changed with optional name=value command line arguments)
+settings = {"candidate":"SweepBase.py",				# Engine being checked
+			"seeds":3, 								# Seeds per scenario for the exact checks
+			"runs":20, 								# Runs of each engine per scenario for the statistical checks
+			"alpha":0.01, 							# Significance level, shared out over every statistical test of a scenario
+			"checkpoints":5} 						# Points along the population trajectories that are compared
+
+# Statistics compared between engines, as they appear in show_stats()
+compared_stats = ["Births","Deaths","Current population","Current number of aggressive cats","Current number of friendly cats",
+				"Current number of meek cats","Current average health of cats","Total units of food eaten","Total units of water drunk"]
+
+# Function that runs an engine in a new directory; returns the directory it saved its results to, or the error it stopped with
+def run_engine(engine,scenario,seed,options):
+	terrain,landmarks,neighbourhood,max_hours,init_pop,cooldown,sleep = scenario
+	work_dir = tempfile.mkdtemp(prefix="equivalence_")
+	shutil.copy(os.path.join(here,"heart.png"),work_dir)
+	args = [os.path.join(here,terrain),os.path.join(here,landmarks),neighbourhood]+[str(value) for value in [max_hours,init_pop,cooldown,sleep]]
+	if engine=="ReferenceEngine.py":
+		args.append(str(seed))
+	else:
+		args += ["seed="+str(seed),"stop_on_extinction=N","output_dir=Results"]+options	# The reference engine always runs to max_hours
+	environment = dict(os.environ,SDL_VIDEODRIVER="dummy")							# The reference engine opens a window for its final image
+	result = subprocess.run([sys.executable,os.path.join(here,engine)]+args,cwd=work_dir,env=environment,capture_output=True,text=True)
+	outputs = [name for name in os.listdir(work_dir) if os.path.isdir(os.path.join(work_dir,name))]
+	if len(outputs)==0:
+		error = result.stderr.strip().split("\n")[-1] if result.stderr.strip()!="" else result.stdout.strip().split("\n")[-1]
+		shutil.rmtree(work_dir)
+		return None,error
+	return (work_dir,os.path.join(work_dir,outputs[0])),None
+
+# Function that reads the files compared by the exact checks
+def read_outputs(output_dir):
+	contents = {}
+	for name in ["log.txt","final_cats.csv","final_landmarks.csv"]:
+		with open(os.path.join(output_dir,name)) as output_file:
+			contents[name] = output_file.read()
+	return contents
+
+# Function that reads the final statistics and the population at each checkpoint from a log
+def read_log(log,init_pop,max_hours,checkpoints):
+	stats = {}
+	for line in log.split("\n"):
+		if ": " in line and not line.startswith("Day "):
+			name,value = line.split(": ",1)
+			if name in compared_stats:
+				stats[name] = float(value)
+	population = np.full(max_hours+1,init_pop)
+	for day,hour,event in re.findall(r"Day (\d+), Hour (\d+): Cat \d+ (?:and Cat \d+ )?(gave birth|has been killed|has died)",log):
+		change = 1 if event=="gave birth" else -1
+		population[int(day)*24+int(hour):] += change
+	hours = np.linspace(0,max_hours,checkpoints+1)[1:].astype(int)
+	for hour in hours:
+		stats["Population at hour "+str(hour)] = float(population[hour])
+	return stats
+
+# Function that returns the p-value of a two-sample Kolmogorov-Smirnov test (asymptotic distribution)
+def ks_test(a,b):
+	a,b = np.sort(a),np.sort(b)
+	values = np.concatenate([a,b])
+	d = np.max(np.abs(np.searchsorted(a,values,side="right")/len(a) - np.searchsorted(b,values,side="right")/len(b)))
+	n = len(a)*len(b)/(len(a)+len(b))
+	x = (math.sqrt(n)+0.12+0.11/math.sqrt(n))*d
+	if x<0.2:
+		return 1.0
+	p = 2*sum([(-1)**(k-1)*math.exp(-2*k*k*x*x) for k in range(1,101)])
+	return min(max(p,0.0),1.0)
+
+# Function that runs both engines with the same seeds and compares their outputs; returns a list of differences
+def exact_check(scenario,options):
+	problems = []
+	for seed in range(1,settings["seeds"]+1):
+		outputs = []
+		for engine in ["ReferenceEngine.py",settings["candidate"]]:
+			dirs,error = run_engine(engine,scenario,seed,options)
+			if dirs is None:
+				outputs.append(("error",error))
+			else:
+				outputs.append(("output",read_outputs(dirs[1])))
+				shutil.rmtree(dirs[0])
+		reference,candidate = outputs
+		if reference[0]!=candidate[0]:
+			problems.append("seed "+str(seed)+": reference "+(reference[1] if reference[0]=="error" else "finished")+", candidate "+(candidate[1] if candidate[0]=="error" else "finished"))
+		elif reference[0]=="error" and reference[1].split(":")[0]!=candidate[1].split(":")[0]:
+			problems.append("seed "+str(seed)+": reference stopped with "+reference[1]+", candidate with "+candidate[1])
+		elif reference[0]=="output":
+			for name in reference[1]:
+				if reference[1][name]!=candidate[1][name]:
+					problems.append("seed "+str(seed)+": "+name+" differs")
+	return problems
+
+# Function that runs both engines with different seeds and tests whether their results have the same distribution
+def stats_check(scenario,options):
+	samples = {}
+	for engine,first_seed in [("ReferenceEngine.py",1000),(settings["candidate"],2000)]:		# Independent seeds for each engine
+		samples[engine] = []
+		for seed in range(first_seed,first_seed+settings["runs"]):
+			dirs,error = run_engine(engine,scenario,seed,options)
+			if dirs is not None:
+				samples[engine].append(read_log(read_outputs(dirs[1])["log.txt"],scenario[4],scenario[3],settings["checkpoints"]))
+				shutil.rmtree(dirs[0])
+	reference,candidate = samples["ReferenceEngine.py"],samples[settings["candidate"]]
+	if len(reference)<2 or len(candidate)<2:
+		return ["too few runs finished ("+str(len(reference))+" reference, "+str(len(candidate))+" candidate)"]
+	names = list(reference[0])
+	problems = []
+	for name in names:
+		p = ks_test([run[name] for run in reference],[run[name] for run in candidate])
+		if p < settings["alpha"]/len(names):													# Bonferroni correction over the tests of the scenario
+			problems.append(name+": p = "+str(round(p,5))+" (reference mean "+str(round(np.mean([run[name] for run in reference]),2))+
+							", candidate mean "+str(round(np.mean([run[name] for run in candidate]),2))+")")
+	return problems
+
+if __name__ == "__main__":
+	args = sys.argv[1:]
+	mode = "all"
+	if len(args)>0 and "=" not in args[0]:
+		mode = args.pop(0).lower()
+	options = []
+	try:
+		if mode not in ["exact","stats","all"]:
+			raise ValueError("Unknown mode: "+mode)
+		for arg in args:
+			name,value = arg.split("=",1)
+			if name in settings:
+				settings[name] = type(settings[name])(value)
+			else:
+				options.append(arg)
+	except ValueError as e:
+		print("\nError: Please enter a mode (exact, stats or all) and name=value arguments. "+str(e))
+		quit()
+
+	failed = False
+	checks = [("exact",exact_check),("stats",stats_check)]
+	for name,check in checks:
+		if mode not in [name,"all"]:
+			continue
+		print("\n#### "+name.upper()+" CHECKS: "+settings["candidate"]+" "+" ".join(options)+" ####\n",flush=True)
+		for scenario in scenarios:
+			problems = check(scenario,options)
+			print(("PASS" if len(problems)==0 else "FAIL")+"  "+" ".join([str(value) for value in scenario]),flush=True)
+			for problem in problems:
+				print("\t"+problem)
+			failed = failed or len(problems)>0
+	sys.exit(1 if failed else 0)
@@ -0,0 +1,180 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# FlowField.py - Distance-to-food and distance-to-water fields for flow field navigation
+#
+# Each field holds, for every cell a cat can stand on, the number of moves to the nearest cell from which
+# the cat can eat (or drink). The fields are built once by a multi-source breadth first search over the
+# cells cats can walk between (the same slope and landmark rules as get_valid_moves()), and are only
+# updated around a landmark when it runs out. The cells leading to each landmark are kept in a list, so
+# finding the ones to work out again when it runs out doesn't look at the rest of the map.
+#
+
+import numpy as np
+import heapq
+
+unreachable = np.iinfo(np.int32).max 					# Distance of cells that can't reach any food (or water)
+
+# Offsets of the cells a cat can interact with, and of the cells it can move to, for each neighbourhood
+surrounding_offsets = {"M": [(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)],		# Moore neighbourhood
+					"V": [(-1,0),(0,-1),(0,1),(1,0)]}								# Von Neumann neighbourhood
+
+# Function that shifts an array by (dr,dc), filling the cells shifted in with 'fill'
+def shift(array,dr,dc,fill):
+	shifted = np.full(array.shape,fill,dtype=array.dtype)
+	rows,cols = array.shape
+	shifted[max(dr,0):rows+min(dr,0),max(dc,0):cols+min(dc,0)] = array[max(-dr,0):rows+min(-dr,0),max(-dc,0):cols+min(-dc,0)]
+	return shifted
+
+class FlowField():
+	def __init__(self,terrain_array,food_array,water_array,neighbourhood,jump_height):
+		self.terrain_array = terrain_array
+		self.offsets = surrounding_offsets[neighbourhood]
+		self.jump_height = jump_height
+		self.landmarks = {"food": food_array>0, "water": water_array>0}
+		self.walkable = np.zeros(terrain_array.shape,dtype=bool)			# Cells cats can stand on: inside the borders and not a landmark
+		self.walkable[1:-1,1:-1] = True
+		self.walkable &= ~(self.landmarks["food"] | self.landmarks["water"])
+		self.distance = {}
+		self.source = {}												# Flat index of the landmark each cell's distance leads to
+		self.served = {} 												# Flat indexes of the cells leading to each landmark (some may lead elsewhere by now)
+		self.changes = 0 												# Number of times the fields have been updated
+		for kind in ["food","water"]:
+			self.distance[kind],self.source[kind] = self.search(kind)
+			self.served[kind] = self.group_by_source(kind)
+
+	# Method that returns a copy of the fields that can be updated without changing these ones
+	def copy(self):
+		field = FlowField.__new__(FlowField)
+		field.terrain_array = self.terrain_array
+		field.offsets = self.offsets
+		field.jump_height = self.jump_height
+		field.landmarks = {kind:array.copy() for kind,array in self.landmarks.items()}
+		field.walkable = self.walkable.copy()
+		field.distance = {kind:array.copy() for kind,array in self.distance.items()}
+		field.source = {kind:array.copy() for kind,array in self.source.items()}
+		field.served = {kind:{landmark:list(cells) for landmark,cells in served.items()} for kind,served in self.served.items()}
+		field.changes = self.changes
+		return field
+
+	# Method that checks whether two cells are across a steep slope
+	def slope_ok(self,cell,other):
+		return abs(self.terrain_array[cell[0],cell[1]] - self.terrain_array[other[0],other[1]]) <= self.jump_height
+
+	# Method that returns the flat index of a landmark a cat can use from a cell, or -1
+	def adjacent_landmark(self,kind,cell):
+		for dr,dc in self.offsets:
+			other = (cell[0]+dr,cell[1]+dc)
+			if self.landmarks[kind][other] and self.slope_ok(cell,other):
+				return np.ravel_multi_index(other,self.terrain_array.shape)
+		return -1
+
+	# Method for the initial multi-source breadth first search, one whole frontier at a time
+	def search(self,kind):
+		shape = self.terrain_array.shape
+		flat = np.arange(shape[0]*shape[1]).reshape(shape)
+		distance = np.full(shape,unreachable,dtype=np.int32)
+		source = np.full(shape,-1,dtype=np.int64)
+		for dr,dc in self.offsets[::-1]:									# Cells next to a landmark are 0 moves away from it
+			other_height = shift(self.terrain_array,-dr,-dc,np.inf)
+			usable = self.walkable & shift(self.landmarks[kind],-dr,-dc,False) & (np.abs(other_height-self.terrain_array) <= self.jump_height)
+			source[usable] = shift(flat,-dr,-dc,-1)[usable]
+			distance[usable] = 0
+		frontier = distance==0
+		steps = 0
+		while frontier.any():
+			steps+=1
+			for dr,dc in self.offsets:
+				reached = shift(frontier,dr,dc,False) & (distance==unreachable) & self.walkable
+				reached &= np.abs(shift(self.terrain_array,dr,dc,np.inf)-self.terrain_array) <= self.jump_height
+				distance[reached] = steps
+				source[reached] = shift(source,dr,dc,-1)[reached]
+			frontier = distance==steps
+		return distance,source
+
+	# Method that returns the flat indexes of the cells leading to each landmark, by the landmark's flat index
+	def group_by_source(self,kind):
+		source = self.source[kind].ravel()
+		cells = np.flatnonzero(source>=0)
+		cells = cells[np.argsort(source[cells],kind="stable")]
+		landmarks,starts = np.unique(source[cells],return_index=True)
+		return {landmark:group.tolist() for landmark,group in zip(landmarks.tolist(),np.split(cells,starts[1:]))}
+
+	# Method that records that a cell's distance now leads to a landmark
+	def serve(self,kind,cell,landmark):
+		self.source[kind][cell] = landmark
+		self.served[kind].setdefault(landmark,[]).append(cell[0]*self.terrain_array.shape[1]+cell[1])
+
+	# Method that lowers distances outwards from the seed cells (a breadth first search with seeds at different distances)
+	def relax(self,kind,seeds):
+		distance = self.distance[kind]
+		source = self.source[kind]
+		heap = [(int(distance[cell]),cell) for cell in seeds]
+		heapq.heapify(heap)
+		while len(heap)>0:
+			d,cell = heapq.heappop(heap)
+			if d > distance[cell]:
+				continue
+			for dr,dc in self.offsets:
+				other = (cell[0]+dr,cell[1]+dc)
+				if self.walkable[other] and distance[other] > d+1 and self.slope_ok(cell,other):
+					distance[other] = d+1
+					self.serve(kind,other,int(source[cell]))
+					heapq.heappush(heap,(d+1,other))
+
+	# Method that updates the fields after a landmark has run out
+	def deplete(self,kind,landmark):
+		self.changes += 1
+		self.landmarks[kind][landmark] = False
+		opened = not (self.landmarks["food"][landmark] or self.landmarks["water"][landmark])
+		if opened:
+			self.walkable[landmark] = True 									# Cats can now walk over the empty landmark
+		for field in ["food","water"]:
+			if field!=kind and not opened:
+				continue
+			distance = self.distance[field]
+			source = self.source[field]
+			seeds = []
+			changed = []
+			if field==kind:
+				depleted = int(np.ravel_multi_index(landmark,source.shape))
+				cells = np.array(self.served[field].pop(depleted,[]),dtype=np.int64)
+				cells = np.unique(cells[source.ravel()[cells]==depleted]) 		# Leaving out cells that have come to lead elsewhere
+				changed = list(zip(*[index.tolist() for index in np.unravel_index(cells,source.shape)]))
+				for cell in changed:
+					distance[cell] = unreachable 								# Cells that led to the empty landmark have to be worked out again
+					source[cell] = -1
+			if opened:
+				distance[landmark] = unreachable
+				changed.append(landmark)
+			for cell in changed:
+				nearest = self.adjacent_landmark(field,cell)
+				if nearest>=0:
+					distance[cell] = 0
+					self.serve(field,cell,int(nearest))
+					seeds.append(cell)
+				for dr,dc in self.offsets:
+					other = (cell[0]+dr,cell[1]+dc)
+					if self.walkable[other] and distance[other]!=unreachable and self.slope_ok(cell,other):
+						seeds.append(other) 									# Cells around the changed area still have correct distances
+			self.relax(field,seeds)
+
+	# Method that updates the fields for the landmarks that ran out since the last update, as (kind, cell) depletion events
+	def update(self,depleted):
+		for kind,landmark in depleted:
+			self.deplete(kind,landmark)
+
+	# Method that returns the moves that get a cat closest to food (or water); returns all the moves if none of them lead there
+	def best_moves(self,kind,valid_moves):
+		distance = self.distance[kind]
+		if len(valid_moves)==0:
+			return valid_moves
+		best = min([distance[move[0],move[1]] for move in valid_moves])
+		if best==unreachable:
+			return valid_moves
+		return [move for move in valid_moves if distance[move[0],move[1]]==best]
+
+	# Method that checks whether a cat at a position can reach food (or water) at all
+	def reachable(self,kind,pos):
+		return self.distance[kind][pos[0],pos[1]]!=unreachable
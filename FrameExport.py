@@ -0,0 +1,73 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# FrameExport.py - Background writer for exporting simulation frames
+#
+
+import threading
+import queue
+import zipfile
+import io
+import os
+import numpy as np
+from Render import encode_png
+
+frame_formats = ["png","npz"]			# Image sequence, or a single compressed archive of raw RGB frames
+
+# Class that saves frames on a background thread so that the simulation loop only has to hand them over
+class FrameWriter():
+	def __init__(self,directory,frame_format="png"):
+		if frame_format not in frame_formats:
+			raise ValueError("Unknown frame format: "+str(frame_format))
+		self.directory = directory
+		self.frame_format = frame_format
+		self.frames_written = 0
+		self.error = None									# Exception raised on the writer thread, re-raised by close()
+		self.archive = None
+		if not os.path.isdir(directory):
+			os.makedirs(directory)
+		if frame_format == "npz":
+			self.archive = zipfile.ZipFile(os.path.join(directory,"frames.npz"),"w",zipfile.ZIP_DEFLATED)
+		self.frame_queue = queue.Queue()					# Unbounded so that add() never blocks the simulation
+		self.thread = threading.Thread(target=self.run,daemon=True)
+		self.thread.start()
+
+	# Method for handing a frame (an RGB array from render_frame()) over to the writer thread
+	def add(self,hour,image):
+		self.frame_queue.put((hour,image))
+
+	# Method that runs on the writer thread and saves frames as they arrive
+	def run(self):
+		while True:
+			item = self.frame_queue.get()
+			if item is None:
+				break
+			if self.error is not None:
+				continue
+			hour,image = item
+			try:
+				self.write(hour,image)
+			except Exception as e:
+				self.error = e
+
+	def write(self,hour,image):
+		name = "frame_"+str(hour).zfill(6)
+		if self.frame_format == "png":
+			with open(os.path.join(self.directory,name+".png"),"wb") as out:
+				out.write(encode_png(image))								# zlib releases the GIL while compressing
+		else:
+			buffer = io.BytesIO()
+			np.save(buffer,image)
+			self.archive.writestr(name+".npy",buffer.getvalue())		# Each frame is stored as its own array, so np.load() can read the archive
+		self.frames_written+=1
+
+	# Method that waits for the remaining frames to be saved
+	def close(self):
+		self.frame_queue.put(None)
+		self.thread.join()
+		if self.archive is not None:
+			self.archive.close()
+		if self.error is not None:
+			raise self.error
+		return self.frames_written
@@ -0,0 +1,90 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# Heatmaps.py - Per-cell counts of what happened where over a simulation, and overlays for drawing them
+#
+# Usage: python3 Heatmaps.py <heatmaps.npz> [layer]
+#	prints the total and the busiest cells of each layer (or of one layer)
+#
+# The counts are kept in arrays the same shape as the grids, so nothing is logged per event. Where cats are and
+# what they did is counted once per timestep, and food and water at the landmark they are taken from. Saved files hold the interior cells only, in the same layout as final_cats.csv.
+#
+
+import numpy as np
+import sys
+
+# Layers of the heatmaps, and the colour each one is drawn in
+layers = ["occupancy","fights","matings","births","killed","died_of_thirst","died_of_hunger","food_eaten","water_drunk"]
+layer_colours = {"occupancy":(255,255,255), "fights":(255,0,0), "matings":(250,0,255), "births":(255,170,200), "killed":(255,0,0),
+				"died_of_thirst":(30,90,160), "died_of_hunger":(50,220,70), "food_eaten":(50,220,70), "water_drunk":(30,90,160)}
+
+# Function that returns the layer a dead cat is counted in (same causes as the event log)
+def death_cause(cat):
+	if cat.fighting:
+		return "killed"
+	elif cat.dehydrated:
+		return "died_of_thirst"
+	return "died_of_hunger"
+
+class HeatmapAccumulator():
+	def __init__(self,shape):
+		self.counts = {layer:np.zeros(shape) for layer in layers}
+		self.hours = 0
+
+	# Method that adds one count to a layer for each cat, at the cell the cat is in
+	def add_cats(self,layer,cats):
+		if len(cats)>0:
+			rows,cols = np.array([cat.pos for cat in cats]).T
+			np.add.at(self.counts[layer],(rows,cols),1)
+
+	# Method that counts a timestep: where cats were, fought, mated and were born
+	def add_timestep(self,alive_cats,new_births):
+		self.hours += 1
+		self.add_cats("occupancy",alive_cats)
+		self.add_cats("fights",[cat for cat in alive_cats if cat.fighting])
+		self.add_cats("matings",[cat for cat in alive_cats if cat.mating])
+		if new_births>0:
+			self.add_cats("births",alive_cats[-new_births:]) 				# Babies are added to the end of the population
+
+	# Method that adds an amount of food or water taken from a landmark to its layer ("food_eaten" or "water_drunk")
+	def add_consumption(self,layer,cell,amount):
+		self.counts[layer][cell[0],cell[1]] += amount
+
+	# Method that counts the cats that died this timestep, by cause
+	def add_deaths(self,new_dead_cats):
+		for layer in ["killed","died_of_thirst","died_of_hunger"]:
+			self.add_cats(layer,[cat for cat in new_dead_cats if death_cause(cat)==layer])
+
+	# Method that saves every layer (interior cells only) to a compressed numpy archive
+	def save(self,filename):
+		np.savez_compressed(filename,hours=self.hours,**{layer:self.counts[layer][1:-1,1:-1] for layer in layers})
+
+# Function that blends a layer of counts over a rendered frame (rows first), more opaque where the counts are higher
+def overlay_heatmap(image,counts,cell_size,colour,strength=0.8):
+	interior = counts[1:-1,1:-1]
+	if interior.max()<=0:
+		return image
+	alpha = np.sqrt(interior/interior.max())*strength 					# Square root, so cells with a few counts still show up
+	alpha = np.repeat(np.repeat(alpha,cell_size,axis=0),cell_size,axis=1)[:,:,None]
+	rows,cols = interior.shape
+	area = image[cell_size:(rows+1)*cell_size,cell_size:(cols+1)*cell_size]
+	area[:] = (np.array(colour)*alpha + area*(1-alpha)).astype(np.uint8)
+	return image
+
+if __name__ == "__main__":
+	try:
+		heatmaps = np.load(sys.argv[1])
+		shown = layers if len(sys.argv)<3 else [sys.argv[2]]
+		for layer in shown:
+			if layer not in layers:
+				raise ValueError("Unknown layer: "+layer)
+	except (IndexError,OSError,ValueError) as e:
+		print("\nError: Please enter a heatmap file and optionally one of the layers ("+", ".join(layers)+"). "+str(e))
+		quit()
+	print("\nHeatmaps over "+str(int(heatmaps["hours"]))+" hours\n")
+	for layer in shown:
+		counts = heatmaps[layer]
+		busiest = np.argsort(counts,axis=None)[::-1][:5]
+		cells = ["("+str(r+1)+","+str(c+1)+"): "+str(round(counts[r,c],2)) for r,c in zip(*np.unravel_index(busiest,counts.shape)) if counts[r,c]>0]
+		print(layer+": total "+str(round(counts.sum(),2))+("  busiest "+", ".join(cells) if len(cells)>0 else ""))
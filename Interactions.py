@@ -0,0 +1,138 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# Interactions.py - Rule tables and occupancy grid for resolving interactions between neighbouring cats
+#
+# The rules are the ones Cat.interact() and the reproduction phase always used. Neighbours are found in the
+# occupancy grid and mating pairs in one pass over it, but fights and flights are not resolved in batch: each
+# cat still looks its neighbours up in the tables one at a time, in the order of alive_cats, because that order
+# matters (working every turn out at once and redoing the ones a flight had changed was slower, as looking the
+# rules up is a small part of a turn next to the moves of fleeing cats):
+#	- A cat that attacks is woken up, so a sleeping aggressive cat that first meets an aggressive neighbour
+#	  goes on to attack the rest of its neighbours as well.
+#	- Heights are refreshed at the start of each cat's turn, so a neighbour that hasn't had its turn yet
+#	  is compared using its height from the previous timestep.
+#	- A meek cat flees once for every same-sex neighbour, and cats later in the list see its new position.
+#	  Once a sleeping meek cat has seen an aggressive neighbour, it also flees from the neighbours after it.
+#	- A fleeing meek cat goes to the first of its valid moves with no other cat around it. The threat field
+#	  counts the cats around every cell, so each move is checked with one lookup; the only cat it has to
+#	  leave out is the fleeing cat itself, which is around every move except staying put.
+#	- Cats that are asleep with no cats around them (idle) don't take a turn. Nothing can change for them: a
+#	  sleeping cat hasn't moved since its height was last refreshed, and its flags are already clear. A cat that
+#	  flees wakes the idle cats around its new cell whose turn hasn't come yet, and they take it as usual.
+#	- Damage is only applied to health once every cat has had its turn. Nothing reads health during the
+#	  interaction phase, so this gives the same result as subtracting it straight away.
+#	- A cat can only mate with neighbours that were eligible at the start of the reproduction phase and
+#	  haven't mated yet this timestep; babies join alive_cats only after the movement phase.
+#
+
+import numpy as np
+
+tempers = {"aggressive":0, "friendly":1, "meek":2}
+sexes = {"male":0, "female":1}
+
+# Temper x temper rule tables, indexed [temper of the cat][temper of its neighbour], for neighbours of the same sex
+attacks = np.array([[True,True,True],									# Aggressive cats attack all other cats
+					[True,False,False],									# Friendly cats only attack aggressive cats
+					[False,False,False]])								# Meek cats never attack
+attacks_while_asleep = np.array([[True,False,False],					# A sleeping aggressive cat still fights other aggressive cats
+								[True,False,False],						# Friendly cats attack aggressive cats whether or not they're asleep
+								[False,False,False]])
+attacks_sleeping_neighbour = np.array([[True,True,True],				# Aggressive cats attack sleeping cats too
+									[False,False,False],				# Friendly cats leave sleeping cats alone
+									[False,False,False]])
+flees = np.array([[False,False,False],
+				[False,False,False],
+				[True,True,True]])										# Meek cats run away from all other cats
+flees_while_asleep = np.array([[False,False,False],
+							[False,False,False],
+							[True,False,False]])						# A sleeping meek cat only runs away from aggressive cats
+
+# Sex x sex rule tables, indexed [sex of the cat][sex of its neighbour]
+same_sex = np.array([[True,False],[False,True]])						# Temper rules only apply between cats of the same sex
+mates = np.array([[False,True],[True,False]])							# Only cats of opposite sexes can mate
+
+# Offsets of the cells surrounding a cell, for each neighbourhood
+surrounding_offsets = {"M": [(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)],		# Moore neighbourhood
+					"V": [(-1,0),(0,-1),(0,1),(1,0)]}								# Von Neumann neighbourhood
+
+# Function that returns the surrounding cells that aren't across a steep slope from a position
+def surrounding_cells(pos,terrain_array,neighbourhood,jump_height):
+	r,c = pos[0],pos[1]
+	height = terrain_array[r,c]
+	return [[r+dr,c+dc] for dr,dc in surrounding_offsets[neighbourhood] if abs(terrain_array[r+dr,c+dc] - height) <= jump_height]
+
+# Function that returns an occupancy grid holding, for each cell, the list of slots (positions in alive_cats) of the cats in it
+def build_occupancy(alive_cats,shape):
+	occupancy = np.empty(shape,dtype=object)
+	for slot in range(len(alive_cats)):
+		cat = alive_cats[slot]
+		cat.slot = slot
+		cell = occupancy[cat.pos[0],cat.pos[1]]
+		if cell is None:
+			occupancy[cat.pos[0],cat.pos[1]] = [slot]
+		else:
+			cell.append(slot)												# Cats can share a cell, e.g. babies born in the same timestep
+	return occupancy
+
+# Function that moves a cat's slot to a new cell of the occupancy grid
+def move_in_occupancy(occupancy,slot,old_pos,new_pos):
+	occupancy[old_pos[0],old_pos[1]].remove(slot)
+	cell = occupancy[new_pos[0],new_pos[1]]
+	if cell is None:
+		occupancy[new_pos[0],new_pos[1]] = [slot]
+	else:
+		cell.append(slot)
+
+# Function that returns a threat field holding, for each cell, the number of cats in the cells around it (not counting cells across a steep slope)
+def build_threat_field(alive_cats,terrain_array,neighbourhood,jump_height):
+	rows,cols = terrain_array.shape
+	counts = np.zeros((rows,cols),dtype=int)
+	np.add.at(counts,([cat.pos[0] for cat in alive_cats],[cat.pos[1] for cat in alive_cats]),1)
+	threat = np.zeros((rows,cols),dtype=int)
+	height = terrain_array[1:-1,1:-1]
+	for dr,dc in surrounding_offsets[neighbourhood]:
+		other_height = terrain_array[1+dr:rows-1+dr,1+dc:cols-1+dc]
+		threat[1:-1,1:-1] += counts[1+dr:rows-1+dr,1+dc:cols-1+dc]*(np.abs(other_height-height) <= jump_height)
+	return threat
+
+# Function that moves a cat's contribution to the threat field from the cells around its old position to the cells around its new one
+def move_in_threat_field(threat,old_cells,new_cells):
+	for cell in old_cells:
+		threat[cell[0],cell[1]] -= 1
+	for cell in new_cells:
+		threat[cell[0],cell[1]] += 1
+
+# Function that returns which cats (by slot) are idle: asleep with no cats around them (which the threat field shows without looking at the cells)
+def idle_cats(alive_cats,threat):
+	sleeping = np.array([cat.sleeping for cat in alive_cats],dtype=bool)
+	alone = threat[[cat.pos[0] for cat in alive_cats],[cat.pos[1] for cat in alive_cats]]==0
+	return sleeping & alone
+
+# Function that returns the slots of the cats in a list of cells (except 'exclude'), in the order of alive_cats
+def cats_in_cells(occupancy,cells,exclude):
+	slots = []
+	for cell in cells:
+		found = occupancy[cell[0],cell[1]]
+		if found:
+			slots.extend(found)
+	if exclude in slots:
+		slots.remove(exclude)
+	slots.sort()
+	return slots
+
+# Function that finds every pair of neighbouring cats that could mate among the cats in 'slots' (in order; the others are asleep),
+# with the cats around each cat from a NeighbourhoodCache (see Neighbourhoods.py)
+def mating_pairs(alive_cats,slots,occupancy,neighbourhoods):
+	eligible = {} 															# Sex of each cat that could mate, by slot
+	for slot in slots:
+		cat = alive_cats[slot]
+		if (not cat.sleeping) and (not cat.engaged) and (not cat.mating) and cat.hunger<75 and cat.thirst<75 and cat.mating_cooldown==0:
+			eligible[slot] = sexes[cat.sex]
+	pairs = []
+	for slot,sex in eligible.items():
+		partners = [other for other in neighbourhoods.cats_around(alive_cats[slot],occupancy) if other in eligible and mates[sex,eligible[other]]]
+		if len(partners)>0:
+			pairs.append((slot,partners))
+	return pairs
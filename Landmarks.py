@@ -0,0 +1,93 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# Landmarks.py - Sparse registry of the food and water landmarks, with the landmarks each cell is next to
+#
+# The registry lists the cells and remaining quantity of every landmark, and for every cell next to a
+# landmark, the landmarks a cat there can eat or drink from (in the same order as surrounding_cells(), so
+# random choices between them are unchanged). Cats eat and drink through the registry, which keeps the
+# food and water grids up to date for everything else that reads them, and records each landmark that
+# runs out as a depletion event. Work on landmarks then depends on the number of landmarks, not the map area.
+#
+
+from Interactions import surrounding_offsets, surrounding_cells
+
+kinds = ["food","water"]
+
+class LandmarkRegistry():
+	def __init__(self,food_array,water_array,terrain_array,neighbourhood,jump_height):
+		self.arrays = {"food":food_array, "water":water_array}
+		self.quantity = {}													# Remaining quantity of each landmark, by cell
+		for kind in kinds:
+			rows,cols = (self.arrays[kind]>0).nonzero()
+			self.quantity[kind] = {(int(r),int(c)):float(self.arrays[kind][r,c]) for r,c in zip(rows,cols)}
+		self.depleted = [] 													# Landmarks that ran out since the last take_depleted()
+		self.cleared = [] 													# Cells that stopped holding any landmark, in the order they did (readers keep track of how many they have seen)
+
+		# Landmarks a cat can reach from each cell next to one (cats never stand outside the borders)
+		num_rows,num_cols = terrain_array.shape[0]-2,terrain_array.shape[1]-2
+		near = set()
+		for r,c in list(self.quantity["food"])+list(self.quantity["water"]):
+			for dr,dc in surrounding_offsets[neighbourhood]:
+				if 1<=r+dr<=num_rows and 1<=c+dc<=num_cols:
+					near.add((r+dr,c+dc))
+		self.adjacent = {}
+		for cell in near:
+			landmarks = [(r,c) for r,c in surrounding_cells(cell,terrain_array,neighbourhood,jump_height) if self.is_landmark((r,c))]
+			if len(landmarks)>0:
+				self.adjacent[cell] = landmarks
+
+	# Method that checks whether a cell holds food or water
+	def is_landmark(self,cell):
+		return (cell[0],cell[1]) in self.quantity["food"] or (cell[0],cell[1]) in self.quantity["water"]
+
+	# Method that returns the food cells and water cells a cat at a position can use (a cell with both counts as water)
+	def around(self,pos):
+		neighbouring_food = []
+		neighbouring_water = []
+		for cell in self.adjacent.get((pos[0],pos[1]),[]):
+			if cell in self.quantity["water"]:
+				neighbouring_water.append(cell)
+			elif cell in self.quantity["food"]:
+				neighbouring_food.append(cell)
+		return neighbouring_food, neighbouring_water
+
+	# Method that takes an amount from a landmark, recording a depletion event if it runs out
+	def consume(self,kind,cell,amount):
+		cell = (cell[0],cell[1])
+		self.arrays[kind][cell] -= amount
+		left = float(self.arrays[kind][cell])
+		if left > 0:
+			self.quantity[kind][cell] = left
+			return
+		del self.quantity[kind][cell]
+		self.depleted.append((kind,cell))
+		if not self.is_landmark(cell):
+			self.cleared.append(cell)
+			for dr,dc in surrounding_offsets["M"]:								# Every cell this landmark could be listed around
+				landmarks = self.adjacent.get((cell[0]+dr,cell[1]+dc))
+				if landmarks is not None and cell in landmarks:
+					landmarks.remove(cell)
+					if len(landmarks)==0:
+						del self.adjacent[(cell[0]+dr,cell[1]+dc)]
+
+	# Method that returns the landmarks that ran out since the last call (food first, then in grid order) and clears them
+	def take_depleted(self):
+		depleted = sorted(self.depleted,key=lambda event:(kinds.index(event[0]),event[1]))
+		self.depleted = []
+		return depleted
+
+	# Method that returns a copy of the registry that keeps another pair of grids (with the same landmarks) up to date
+	def copy(self,food_array,water_array):
+		registry = LandmarkRegistry.__new__(LandmarkRegistry)
+		registry.arrays = {"food":food_array, "water":water_array}
+		registry.quantity = {kind:dict(self.quantity[kind]) for kind in kinds}
+		registry.adjacent = {cell:list(landmarks) for cell,landmarks in self.adjacent.items()}
+		registry.depleted = list(self.depleted)
+		registry.cleared = list(self.cleared)
+		return registry
+
+	# Method that returns the cells and remaining quantities of one kind of landmark
+	def landmarks(self,kind):
+		return self.quantity[kind].items()
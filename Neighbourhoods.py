@@ -0,0 +1,82 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# Neighbourhoods.py - Cache of the cells around each cell, the cells a cat can step to, and the cats around each cat
+#
+# The terrain never changes, so the cells around a cell (not counting cells across a steep slope) are worked out
+# once. The cells a cat can step to (inside the borders, not across a steep slope and not onto food or water) only
+# change when a landmark runs out, so they are kept until then and dropped for the cells around that landmark.
+# The cats around each cat are kept for the rest of the timestep they are worked out in, and dropped for every cat
+# around the old and new cells of a cat that moves. Lists returned by the cache are shared, so callers don't change them.
+#
+
+from Interactions import surrounding_cells, cats_in_cells
+
+# Offsets of the cells a cat can move to (including staying put), in the same order as Simulation.get_valid_moves()
+move_offsets = {"M": [(-1,-1),(-1,0),(-1,1),(0,-1),(0,0),(0,1),(1,-1),(1,0),(1,1)],		# Moore neighbourhood
+				"V": [(-1,0),(0,-1),(0,0),(0,1),(1,0)]}								# Von Neumann neighbourhood
+
+class NeighbourhoodCache():
+	def __init__(self,terrain_array,food_array,water_array,landmark_registry,neighbourhood,jump_height):
+		self.terrain_array = terrain_array
+		self.food_array = food_array
+		self.water_array = water_array
+		self.landmark_registry = landmark_registry
+		self.neighbourhood = neighbourhood
+		self.jump_height = jump_height
+		self.num_rows,self.num_cols = terrain_array.shape[0]-2,terrain_array.shape[1]-2
+		self.surrounding = {} 												# Cells around each cell, by cell
+		self.steps = {} 													# Cells a cat in each cell could step to if they were empty, by cell
+		self.neighbours = {} 												# Slots of the cats around each cat this timestep, by slot
+		self.cleared_seen = 0 												# Number of the registry's cleared cells already dropped from 'steps'
+
+	# Method that starts a new timestep (slots are given out again, so the cats around each cat are forgotten)
+	def new_timestep(self):
+		self.neighbours = {}
+
+	# Method that returns the cells around a position that aren't across a steep slope, as surrounding_cells() does
+	def around(self,pos):
+		cells = self.surrounding.get((pos[0],pos[1]))
+		if cells is None:
+			cells = surrounding_cells(pos,self.terrain_array,self.neighbourhood,self.jump_height)
+			self.surrounding[(pos[0],pos[1])] = cells
+		return cells
+
+	# Method that returns the cells a cat at a position could step to, other cats aside (in the order of move_offsets)
+	def moves(self,pos):
+		if len(self.landmark_registry.cleared)>self.cleared_seen:
+			for cell in self.landmark_registry.cleared[self.cleared_seen:]:
+				for dr,dc in move_offsets[self.neighbourhood]: 				# A cell that no longer holds a landmark can be stepped onto
+					self.steps.pop((cell[0]+dr,cell[1]+dc),None)
+			self.cleared_seen = len(self.landmark_registry.cleared)
+		cells = self.steps.get((pos[0],pos[1]))
+		if cells is None:
+			r,c = pos[0],pos[1]
+			cells = []
+			for dr,dc in move_offsets[self.neighbourhood]:
+				R,C = r+dr,c+dc
+				if R<1 or R>self.num_rows or C<1 or C>self.num_cols:										# Cats can't leave borders
+					continue
+				if abs(self.terrain_array[R,C] - self.terrain_array[r,c]) > self.jump_height:				# Cats can't move across steep slopes
+					continue
+				if (self.food_array[R,C] > 0) or (self.water_array[R,C] > 0):								# Cats can't walk on food or water
+					continue
+				cells.append([R,C])
+			self.steps[(r,c)] = cells
+		return cells
+
+	# Method that returns the slots of the cats around a cat, in the order of alive_cats
+	def cats_around(self,cat,occupancy):
+		neighbours = self.neighbours.get(cat.slot)
+		if neighbours is None:
+			neighbours = cats_in_cells(occupancy,self.around(cat.pos),cat.slot)
+			self.neighbours[cat.slot] = neighbours
+		return neighbours
+
+	# Method that forgets the cats around a cat that has moved, and around every cat it has moved away from or next to
+	def moved(self,cat,old_pos,occupancy):
+		self.neighbours.pop(cat.slot,None)
+		for cell in self.around(old_pos)+self.around(cat.pos):
+			for slot in occupancy[cell[0],cell[1]] or []:
+				self.neighbours.pop(slot,None)
@@ -0,0 +1,250 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# ParallelWorld.py - Movement phase of one world split into row bands, worked out by a process for each band
+#
+# In the sequential engine each cat moves straight away, so the next cat in alive_cats sees its new position.
+# In parallel mode every cat chooses its move from a snapshot of the world taken at the start of the movement
+# phase (double-buffered), which lets the map be split into bands of rows that are worked out at the same time:
+#	- Each band has its own worker process, which keeps the grids of its band plus one row either side (the halo),
+#	  which is everything a cat can see or move to. Every timestep it is only sent what changed there: the cells
+#	  whose landmark has run out, the scents left since the last timestep and the cells of the cats, along with the
+#	  cats that move. Cat scents are kept as the timestep they were left in (as in CatScents.py), so they fade
+#	  without being sent again. The food and water scents (or distance fields) change all over the map, so they
+#	  are copied into shared memory the workers read from instead (the distance fields only when they change).
+#	- Cats can only move to cells that were empty in the snapshot. If cats in different bands (or the same one)
+#	  choose the same cell, the cat with the lowest index gets it and the others stay where they are.
+#	- Each cat draws its random numbers from its own stream, seeded from the world's random numbers and its
+#	  index, so a seeded run gives the same result whatever the number of workers.
+# The rules for choosing a move are the same as the movement phase of Simulation.main_loop(). The interaction and
+# reproduction phases still run one cat at a time, because their order matters (see Interactions.py).
+#
+
+import multiprocessing
+import signal
+import numpy as np
+import random
+from Interactions import sexes
+from FlowField import unreachable
+from CatScents import intensities, lifetime
+from Neighbourhoods import move_offsets
+
+worker_state = {} 														# Terrain and rules of the world, set in each worker when it starts
+
+# Function that sets up a worker with the parts of the world that never change
+def start_worker(terrain_array,neighbourhood,jump_height,eating_threshold,drinking_threshold,navigation):
+	worker_state.update({"terrain":terrain_array, "offsets":move_offsets[neighbourhood], "jump_height":jump_height,
+						"eating_threshold":eating_threshold, "drinking_threshold":drinking_threshold, "navigation":navigation})
+
+# Function that returns a grid in memory shared with the workers (started after it is made)
+def shared_grid(context,shape,dtype):
+	memory = context.RawArray("b",int(np.prod(shape))*np.dtype(dtype).itemsize)
+	return np.frombuffer(memory,dtype=dtype).reshape(shape)
+
+# Function that runs in the worker of a band: keeps the band's grids up to date with what it is sent every timestep,
+# and works out the moves of the cats in the band; 'grids' hold the rows of the band and its halo, starting at 'first_row'.
+# 'inherited' are the world's ends of the connections that were open when the worker started, which it closes so that
+# every worker sees its own connection close if the world goes away without stopping them
+def run_band(connection,first_row,grids,world,inherited):
+	for other in inherited:
+		other.close()
+	signal.signal(signal.SIGTERM,signal.SIG_DFL) 						# Handlers from the world's process (e.g. pygame's) would keep it from being stopped
+	start_worker(*world)
+	occupied = [] 														# Cells of the cats in the last timestep
+	while True:
+		try:
+			task = connection.recv()
+		except EOFError:
+			break
+		if task is None:
+			break
+		tick_seed,now,cleared,scents,cat_cells,cats = task
+		for r,c in cleared:
+			grids["landmark"][r-first_row,c] = False 					# Cats can walk over a landmark that has run out
+		for r,c,owner,sex,hour in scents:
+			grids["scent_owner"][r-first_row,c] = owner
+			grids["scent_sex"][r-first_row,c] = sex
+			grids["scent_hour"][r-first_row,c] = hour
+		for r,c in occupied:
+			grids["cats"][r-first_row,c] = 0
+		for r,c in cat_cells:
+			grids["cats"][r-first_row,c] += 1
+		occupied = cat_cells
+		connection.send(plan_band(first_row,grids,now,cats,tick_seed))
+	connection.close()
+
+# Function that returns the sex (as in Interactions.sexes) and intensity of the scent in a cell of a band, as CatScents.at() does (-1 and 0 for none)
+def scent_at(grids,now,r,c):
+	age = now-grids["scent_hour"][r,c]
+	if grids["scent_sex"][r,c]<0 or age>=lifetime:
+		return -1,0
+	return grids["scent_sex"][r,c],intensities[age]
+
+# Function that returns the moves that get a cat closest to food (or water), as FlowField.best_moves() does
+def best_moves(distance,first_row,valid_moves):
+	if len(valid_moves)==0:
+		return valid_moves
+	best = min([distance[move[0]-first_row,move[1]] for move in valid_moves])
+	if best==unreachable:
+		return valid_moves
+	return [move for move in valid_moves if distance[move[0]-first_row,move[1]]==best]
+
+# Function that works out the moves of the cats in one band; returns (slot, index, new cell) for each cat
+def plan_band(first_row,grids,now,cats,tick_seed):
+	terrain = worker_state["terrain"]
+	num_rows,num_cols = terrain.shape[0]-2,terrain.shape[1]-2
+	eating_threshold,drinking_threshold = worker_state["eating_threshold"],worker_state["drinking_threshold"]
+	planned = []
+	for slot,index,r,c,sex,hunger,thirst,mating_cooldown in cats:
+		rng = random.Random((tick_seed<<32)+index) 						# The cat's own random numbers for this timestep
+
+		# Valid moves, as in get_valid_moves()
+		valid_moves = []
+		for dr,dc in worker_state["offsets"]:
+			R,C = r+dr,c+dc
+			if R<1 or R>num_rows or C<1 or C>num_cols:
+				continue 																	# Cats can't leave borders
+			if abs(terrain[R,C]-terrain[r,c]) > worker_state["jump_height"]:
+				continue 																	# Cats can't move across steep slopes
+			if grids["landmark"][R-first_row,C]:
+				continue 																	# Cats can't walk on food or water
+			if grids["cats"][R-first_row,C] > ((R,C)==(r,c)):
+				continue 																	# Cats can't walk on other cats
+			valid_moves.append((R,C))
+		avoided_scents = list(valid_moves)
+		for R,C in valid_moves:
+			scent_sex,scent = scent_at(grids,now,R-first_row,C)
+			if scent_sex==sex and grids["scent_owner"][R-first_row,C]!=index:				# Cats avoid scents of the same sex
+				if rng.random()<scent:
+					avoided_scents.remove((R,C))
+		valid_moves = avoided_scents
+
+		# Choices, as in the movement phase of main_loop()
+		choices = list(valid_moves)
+		if hunger<eating_threshold and thirst<drinking_threshold and mating_cooldown==0:
+			neighbour_scent_value = 0
+			for R,C in valid_moves: 																# Following the scent of the opposite sex
+				scent_sex,scent = scent_at(grids,now,R-first_row,C)
+				if scent_sex>=0 and scent_sex!=sex:
+					if scent>neighbour_scent_value:
+						neighbour_scent_value = scent
+						choices = [(R,C)]
+					elif scent==neighbour_scent_value:
+						choices.append((R,C))
+		elif worker_state["navigation"]=="flow":
+			reachable_food = grids["food_distance"][r-first_row,c]!=unreachable
+			reachable_water = grids["water_distance"][r-first_row,c]!=unreachable
+			if hunger>eating_threshold and (hunger>thirst or not reachable_water):
+				choices = best_moves(grids["food_distance"],first_row,valid_moves)
+			elif thirst>drinking_threshold and (thirst>=hunger or not reachable_food):
+				choices = best_moves(grids["water_distance"],first_row,valid_moves)
+		else:
+			food_scents = [move for move in valid_moves if grids["food_scent"][move[0]-first_row,move[1]]>0]
+			water_scents = [move for move in valid_moves if grids["water_scent"][move[0]-first_row,move[1]]>0]
+			temp_choices = []
+			if hunger>eating_threshold and (hunger>thirst or len(water_scents)==0):
+				temp_choices = [move for move in valid_moves if rng.random()<=grids["food_scent"][move[0]-first_row,move[1]]]
+			elif thirst>drinking_threshold and (thirst>=hunger or len(food_scents)==0):
+				temp_choices = [move for move in valid_moves if rng.random()<=grids["water_scent"][move[0]-first_row,move[1]]]
+			if len(temp_choices)>0:
+				choices = temp_choices
+		if len(choices)>0:
+			planned.append((slot,index,rng.choice(choices)))
+		else:
+			planned.append((slot,index,(r,c))) 							# Nowhere to go (the sequential engine can't handle this case)
+	return planned
+
+class ParallelWorld():
+	def __init__(self,terrain_array,landmark_registry,workers,neighbourhood,jump_height,eating_threshold,drinking_threshold,navigation):
+		num_rows = terrain_array.shape[0]-2
+		self.bands = [(band[0],band[-1]) for band in np.array_split(np.arange(1,num_rows+1),workers) if len(band)>0]
+		self.band_of_row = np.zeros(num_rows+2,dtype=int)
+		self.bands_seeing_row = [[] for row in range(num_rows+2)] 		# Bands each row is in, including as a halo row
+		for number,(first,last) in enumerate(self.bands):
+			self.band_of_row[first:last+1] = number
+			for row in range(first-1,last+2):
+				self.bands_seeing_row[row].append(number)
+		self.navigation = navigation
+		context = multiprocessing.get_context("fork") 					# Workers start with the terrain and landmarks already in memory
+
+		# Grids that change all over the map, shared with the workers
+		if navigation=="flow":
+			self.shared = {name:shared_grid(context,terrain_array.shape,np.int32) for name in ["food_distance","water_distance"]}
+		else:
+			self.shared = {name:shared_grid(context,terrain_array.shape,np.float64) for name in ["food_scent","water_scent"]}
+		self.flow_changes = -1 											# Updates of the flow field last copied into shared memory
+		self.cleared_seen = len(landmark_registry.cleared) 				# Number of the landmark registry's cleared cells already sent
+		self.scents_sent = 0 											# Latest timestep whose scents have been sent
+
+		# A worker for each band, with the grids of its band and halo
+		landmark = (landmark_registry.arrays["food"]>0) | (landmark_registry.arrays["water"]>0) 		# The workers start with the landmarks as they are now
+		world = (terrain_array,neighbourhood,jump_height,eating_threshold,drinking_threshold,navigation)
+		self.connections = []
+		self.workers = []
+		for first,last in self.bands:
+			rows = slice(first-1,last+2)
+			grids = {"landmark":landmark[rows].copy(), "cats":np.zeros(landmark[rows].shape,dtype=int),
+					"scent_owner":np.full(landmark[rows].shape,-1,dtype=int), "scent_sex":np.full(landmark[rows].shape,-1,dtype=int),
+					"scent_hour":np.zeros(landmark[rows].shape,dtype=int)}
+			grids.update({name:grid[rows] for name,grid in self.shared.items()}) 	# Views of the shared grids
+			connection,worker_connection = context.Pipe()
+			worker = context.Process(target=run_band,args=(worker_connection,first-1,grids,world,self.connections+[connection]),daemon=True)
+			worker.start()
+			worker_connection.close()
+			self.connections.append(connection)
+			self.workers.append(worker)
+
+	# Method that copies the grids that change all over the map of a simulation (see Simulation.py) into shared memory
+	def share_fields(self,simulation):
+		if self.navigation=="flow":
+			if simulation.flow_field.changes!=self.flow_changes:
+				self.flow_changes = simulation.flow_field.changes
+				np.copyto(self.shared["food_distance"],simulation.flow_field.distance["food"])
+				np.copyto(self.shared["water_distance"],simulation.flow_field.distance["water"])
+		else:
+			np.copyto(self.shared["food_scent"],simulation.food_scent_array)
+			np.copyto(self.shared["water_scent"],simulation.water_scent_array)
+
+	# Method that splits a list of things in cells (cell first) by the bands that can see them
+	def by_band(self,items):
+		split = [[] for band in self.bands]
+		for item in items:
+			for number in self.bands_seeing_row[item[0]]:
+				split[number].append(item)
+		return split
+
+	# Method that works out the moves of the movers of a simulation; returns (cat, new cell) for each cat that moves
+	def move_cats(self,movers,simulation):
+		alive_cats = simulation.alive_cats
+		tick_seed = simulation.random.getrandbits(32) 					# From the simulation's random numbers, so seeded runs repeat
+		self.share_fields(simulation)
+		registry = simulation.landmark_registry
+		cleared = self.by_band(registry.cleared[self.cleared_seen:])
+		self.cleared_seen = len(registry.cleared)
+		scents = self.by_band(simulation.cat_scents.left_since(self.scents_sent))
+		self.scents_sent = simulation.cat_scents.now
+		cat_cells = self.by_band([(cat.pos[0],cat.pos[1]) for cat in alive_cats])
+		band_cats = [[] for band in self.bands]
+		for cat in movers:
+			band_cats[self.band_of_row[cat.pos[0]]].append((cat.slot,cat.index,cat.pos[0],cat.pos[1],sexes[cat.sex],cat.hunger,cat.thirst,cat.mating_cooldown))
+		for number,connection in enumerate(self.connections):
+			connection.send((tick_seed,simulation.cat_scents.now,cleared[number],scents[number],cat_cells[number],band_cats[number]))
+		planned = [move for connection in self.connections for move in connection.recv()]
+
+		# Conflicts are resolved the same way whichever bands the cats were in: the lowest index gets the cell
+		taken = set()
+		moves = []
+		for slot,index,cell in sorted(planned,key=lambda move:move[1]):
+			if cell==(alive_cats[slot].pos[0],alive_cats[slot].pos[1]) or cell in taken:
+				continue
+			taken.add(cell)
+			moves.append((alive_cats[slot],[cell[0],cell[1]]))
+		return moves
+
+	def close(self):
+		for connection in self.connections:
+			connection.send(None)
+			connection.close()
+		for worker in self.workers:
+			worker.join()
@@ -11,10 +11,26 @@ step_cooldown=$8
 low_sleep=${9}
 hi_sleep=${10} 
 step_sleep=${11} 
+shift $(( $# < 11 ? $# : 11 ))
+options="$@"		# Optional name=value parameters passed on to SweepBase.py (later ones override earlier ones), e.g. seed=0 store=$PWD/SweepResults.db
 
 new_dir=Sweep`date "+%Y-%m-%d_%H:%M:%S"` 
 mkdir $new_dir
 cp SweepBase.py $new_dir 
+cp Simulation.py $new_dir
+cp FrameExport.py $new_dir
+cp Render.py $new_dir
+cp SweepStore.py $new_dir
+cp Interactions.py $new_dir
+cp FlowField.py $new_dir
+cp Diffusion.py $new_dir
+cp StatePublisher.py $new_dir
+cp Replay.py $new_dir
+cp Heatmaps.py $new_dir
+cp Landmarks.py $new_dir
+cp Neighbourhoods.py $new_dir
+cp CatScents.py $new_dir
+cp ParallelWorld.py $new_dir
 cp $terrain $new_dir
 cp $landmarks $new_dir
 cp heart.png $new_dir
@@ -26,7 +42,8 @@ Neighbourhood: $neighbourhood\n\
 Simulation length (hours): $max_hours\n\
 Number of cats: $init_pop\n\
 Mating cooldown time: $low_cooldown $hi_cooldown $step_cooldown\n\
-Sleep hours: $low_sleep $hi_sleep $step_sleep"
+Sleep hours: $low_sleep $hi_sleep $step_sleep\n\
+Options: $options"
 
 echo "\n$message"
 
@@ -37,7 +54,7 @@ do
 	for s in `seq $low_sleep $step_sleep $hi_sleep`; 
 	do 
 		echo "\n\nSimulating: Mating cooldown time $m, sleep hours $s\n" 
-		python3 SweepBase.py $terrain $landmarks $neighbourhood $max_hours $init_pop $m $s 
+		python3 SweepBase.py $terrain $landmarks $neighbourhood $max_hours $init_pop $m $s $options
 	done 
 done 
 
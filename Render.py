@@ -0,0 +1,125 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# Render.py - Draws the simulation straight from the grid arrays into an image array, without a display
+#
+
+import pygame
+import pygame.ftfont
+import numpy as np
+import zlib
+import struct
+
+# Colours
+black = (0,0,0)
+white = (255,255,255)
+green = (50,220,70)
+blue = (30,90,160)
+
+fontface = None 									# Loaded the first time text is drawn
+
+# Function that returns a (cell_size x cell_size) mask of the pixels inside a circle centred in a cell
+def circle_mask(cell_size,radius,width=0):
+	centre = cell_size/2
+	y,x = np.mgrid[0:cell_size,0:cell_size]
+	distance = np.sqrt((x+0.5-centre)**2 + (y+0.5-centre)**2)
+	mask = distance <= radius
+	if width>0:
+		mask &= distance > radius-width 			# Only the outline of the circle
+	return mask
+
+# Function that returns a (cell_size x cell_size) mask of an X drawn across a cell
+def cross_mask(cell_size):
+	mask = np.eye(cell_size,dtype=bool)
+	return mask | mask[:,::-1]
+
+# Function that loads a sprite as an RGB array and an alpha array (rows first, like the grids)
+def load_sprite(filename):
+	image = pygame.image.load(filename)
+	rgb = pygame.surfarray.array3d(image).swapaxes(0,1)
+	alpha = pygame.surfarray.array_alpha(image).swapaxes(0,1)
+	return rgb, alpha
+
+# Function that draws circles of quantity-dependent size onto every landmark cell
+def draw_landmarks(cells,landmark_array,colour,cell_size):
+	radii = (landmark_array*cell_size/2).astype(int)				# Same radius as the interactive display
+	for radius in np.unique(radii):
+		if radius>0:
+			selected = radii==radius
+			mask = circle_mask(cell_size,radius)[:,:,None]
+			cells[selected] = np.where(mask,colour,cells[selected])
+
+# Function that pastes a sprite onto the image at a pixel position, blending with its transparency
+def paste_sprite(image,sprite,x,y):
+	rgb,alpha = sprite
+	h,w = alpha.shape
+	x0,y0 = max(int(x),0),max(int(y),0)
+	x1,y1 = min(int(x)+w,image.shape[1]),min(int(y)+h,image.shape[0])
+	if x0>=x1 or y0>=y1:
+		return
+	a = alpha[y0-int(y):y1-int(y),x0-int(x):x1-int(x),None]/255
+	src = rgb[y0-int(y):y1-int(y),x0-int(x):x1-int(x)]
+	image[y0:y1,x0:x1] = (src*a + image[y0:y1,x0:x1]*(1-a)).astype(np.uint8)
+
+# Function that writes a line of white text onto the image
+def paste_text(image,text,x,y):
+	global fontface
+	if fontface is None:
+		pygame.ftfont.init()
+		fontface = pygame.ftfont.Font(None,18)					# Default font, so no system font lookup is needed
+	text_surface = fontface.render(text,True,white,black)
+	text_array = pygame.surfarray.array3d(text_surface).swapaxes(0,1)
+	h = min(text_array.shape[0],image.shape[0]-y)
+	w = min(text_array.shape[1],image.shape[1]-x)
+	image[y:y+h,x:x+w] = text_array[:h,:w]
+
+# Function that renders the terrain, landmarks and cats into an RGB array of shape (height, width, 3)
+def render_frame(terrain_array,food_array,water_array,alive_cats,dead_cats,cell_size,hearts=[],heart_sprite=None,time_text=None):
+	num_rows = terrain_array.shape[0]-2
+	num_cols = terrain_array.shape[1]-2
+	height = (num_rows+2)*cell_size+30
+	width = (num_cols+2)*cell_size
+	image = np.zeros((height,width,3),dtype=np.uint8)
+
+	# Each cell of the map gets its own (cell_size x cell_size) block of pixels
+	heights = terrain_array[1:num_rows+1,1:num_cols+1]
+	terrain_colours = np.stack([5*heights+40, -2*heights+90, np.zeros(heights.shape)],axis=-1)		# Same colours as assign_terrain_colour()
+	cells = np.empty((num_rows,num_cols,cell_size,cell_size,3),dtype=np.uint8)
+	cells[:] = terrain_colours[:,:,None,None,:]
+	draw_landmarks(cells,food_array[1:num_rows+1,1:num_cols+1],green,cell_size)				# Food are green circles
+	draw_landmarks(cells,water_array[1:num_rows+1,1:num_cols+1],blue,cell_size)			# Water are blue circles
+
+	cross = cross_mask(cell_size)
+	for cat in dead_cats:
+		cells[cat.pos[0]-1,cat.pos[1]-1][cross] = black 									# Dead cats are drawn as X's
+	for cat in alive_cats:
+		radius = int(cell_size*(cat.age/16 + 1/4))
+		cell = cells[cat.pos[0]-1,cat.pos[1]-1]
+		cell[circle_mask(cell_size,radius)] = cat.colour 									# Live cats are coloured circles
+		cell[circle_mask(cell_size,radius,max(int(cell_size/10),1))] = black 				# With a black outline
+
+	image[cell_size:(num_rows+1)*cell_size,cell_size:(num_cols+1)*cell_size] = cells.swapaxes(1,2).reshape((num_rows*cell_size,num_cols*cell_size,3))
+
+	if heart_sprite is not None:
+		for heart in hearts:
+			paste_sprite(image,heart_sprite,heart[0]*cell_size,heart[1]*cell_size)		# Draws a heart if cats reproduced (hearts are in cells, see Simulation.reproduce())
+	if time_text is not None:
+		paste_text(image,time_text[0],10,(num_rows+1)*cell_size)
+		paste_text(image,time_text[1],10,(num_rows+2)*cell_size+5)
+	return image
+
+# Function that encodes an RGB array as PNG data in memory
+def encode_png(image):
+	height,width = image.shape[0],image.shape[1]
+	rows = np.zeros((height,width*3+1),dtype=np.uint8)		# Each row starts with a filter byte (0 = no filter)
+	rows[:,1:] = image.reshape((height,width*3))
+	def chunk(kind,data):
+		return struct.pack(">I",len(data)) + kind + data + struct.pack(">I",zlib.crc32(kind+data) & 0xffffffff)
+	header = struct.pack(">IIBBBBB",width,height,8,2,0,0,0)		# 8-bit RGB
+	return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR",header) + chunk(b"IDAT",zlib.compress(rows.tobytes(),6)) + chunk(b"IEND",b"")
+
+# Function that saves an RGB array as a PNG file
+def save_png(image,filename):
+	with open(filename,"wb") as out:
+		out.write(encode_png(image))
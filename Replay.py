@@ -0,0 +1,250 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# Replay.py - Compact replay log of a simulation, and a viewer for it
+#
+# Usage: python3 Replay.py <replay file>
+# Keys: right/left step forwards/backwards, space plays/pauses, up/down change the playback speed,
+#       'r' plays backwards, home/end jump to the start/end
+#
+# A replay file starts with the terrain, followed by one record per timestep. Every 'keyframe_every'
+# timesteps the record is a full keyframe (all cats and landmarks); the records in between only hold
+# what changed: cat moves, births, deaths, health and state changes, and landmark changes.
+#
+
+import numpy as np
+import struct
+import zlib
+import os
+import sys
+
+magic = b"CATREPLAY1"
+
+# Cats are stored in these tables
+cat_dtype = np.dtype([("index",np.int32),("row",np.int16),("col",np.int16),("age",np.int16),("temper",np.int8),("sex",np.int8),("flags",np.uint8),("health",np.float32)])
+move_dtype = np.dtype([("index",np.int32),("row",np.int16),("col",np.int16)])
+change_dtype = np.dtype([("index",np.int32),("flags",np.uint8),("health",np.float32)])
+landmark_dtype = np.dtype([("cell",np.int32),("food",np.float32),("water",np.float32)])
+
+tempers = ["aggressive","friendly","meek"]
+sexes = ["male","female"]
+flag_bits = {"sleeping":1, "fighting":2, "fleeing":4}			# The flags that decide a cat's colour
+
+# Function that packs a list of numpy tables into bytes, each with its number of rows in front
+def pack_tables(tables):
+	data = b""
+	for table in tables:
+		data += struct.pack("<I",len(table)) + table.tobytes()
+	return zlib.compress(data)
+
+# Function that unpacks the tables packed by pack_tables()
+def unpack_tables(data,dtypes):
+	data = zlib.decompress(data)
+	tables = []
+	offset = 0
+	for dtype in dtypes:
+		length = struct.unpack_from("<I",data,offset)[0]
+		offset += 4
+		tables.append(np.frombuffer(data,dtype=dtype,count=length,offset=offset))
+		offset += length*dtype.itemsize
+	return tables
+
+# Function that returns a cat's state flags
+def cat_flags(cat):
+	flags = 0
+	for name,bit in flag_bits.items():
+		if getattr(cat,name):
+			flags |= bit
+	return flags
+
+class ReplayRecorder():
+	def __init__(self,filename,terrain_array,keyframe_every=100):
+		directory = os.path.dirname(filename)
+		if directory!="" and not os.path.isdir(directory):
+			os.makedirs(directory)
+		self.out = open(filename,"wb")
+		self.keyframe_every = keyframe_every
+		self.shape = terrain_array.shape
+		self.previous = None 												# State recorded at the last timestep
+		self.num_dead = 0 													# Dead cats already recorded (new ones are appended to dead_cats)
+		self.out.write(magic + struct.pack("<III",self.shape[0],self.shape[1],keyframe_every))
+		self.out.write(terrain_array.astype(np.float32).tobytes())
+
+	def write_record(self,kind,hour,payload):
+		self.out.write(kind + struct.pack("<iI",hour,len(payload)) + payload)
+
+	# Method that records the state at the end of a timestep
+	def record(self,hour,alive_cats,dead_cats,food_array,water_array):
+		cats = {cat.index:(cat.index,cat.pos[0],cat.pos[1],cat.age,tempers.index(cat.temper),sexes.index(cat.sex),cat_flags(cat),cat.health) for cat in alive_cats}
+		landmarks = np.stack([food_array.ravel(),water_array.ravel()]).astype(np.float32)
+		if self.previous is None or hour%self.keyframe_every==0:
+			alive = np.array(list(cats.values()),dtype=cat_dtype)
+			dead = np.array([(cat.index,cat.pos[0],cat.pos[1]) for cat in dead_cats],dtype=move_dtype)
+			cells = np.arange(landmarks.shape[1])
+			filled = cells[(landmarks[0]>0)|(landmarks[1]>0)]
+			landmark_table = np.array(list(zip(filled,landmarks[0][filled],landmarks[1][filled])),dtype=landmark_dtype)
+			self.write_record(b"K",hour,pack_tables([alive,dead,landmark_table]))
+		else:
+			old_cats,old_landmarks = self.previous
+			moves = [(i,cat[1],cat[2]) for i,cat in cats.items() if i in old_cats and (cat[1],cat[2])!=(old_cats[i][1],old_cats[i][2])]
+			births = [cat for i,cat in cats.items() if i not in old_cats]
+			deaths = [(cat.index,cat.pos[0],cat.pos[1]) for cat in dead_cats[self.num_dead:]]		# Where they died, which can be after a move
+			changes = [(i,cat[6],cat[7]) for i,cat in cats.items() if i in old_cats and (cat[6],cat[7])!=(old_cats[i][6],old_cats[i][7])]
+			changed = np.flatnonzero((landmarks!=old_landmarks).any(axis=0))
+			tables = [np.array(moves,dtype=move_dtype), np.array(births,dtype=cat_dtype), np.array(deaths,dtype=move_dtype),
+				np.array(changes,dtype=change_dtype), np.array(list(zip(changed,landmarks[0][changed],landmarks[1][changed])),dtype=landmark_dtype)]
+			self.write_record(b"D",hour,pack_tables(tables))
+		self.previous = (cats,landmarks)
+		self.num_dead = len(dead_cats)
+
+	def close(self):
+		self.out.close()
+
+class ReplayReader():
+	def __init__(self,filename):
+		self.file = open(filename,"rb")
+		if self.file.read(len(magic))!=magic:
+			raise ValueError("Not a replay file: "+filename)
+		rows,cols,self.keyframe_every = struct.unpack("<III",self.file.read(12))
+		self.shape = (rows,cols)
+		self.terrain = np.frombuffer(self.file.read(rows*cols*4),dtype=np.float32).reshape(self.shape).astype(float)
+		self.records = [] 													# (kind, hour, file offset, length) of every record
+		while True:
+			header = self.file.read(9)
+			if len(header)<9:
+				break 														# End of the file (or a record cut short by a crash)
+			kind = header[:1]
+			hour,length = struct.unpack("<iI",header[1:])
+			self.records.append((kind,hour,self.file.tell(),length))
+			self.file.seek(length,1)
+		self.hours = [record[1] for record in self.records]
+		self.position = -1 													# Record that the current state is at
+		self.state = None
+
+	def read_payload(self,record):
+		self.file.seek(record[2])
+		return self.file.read(record[3])
+
+	# Method that loads a keyframe as the current state
+	def load_keyframe(self,position):
+		alive,dead,landmarks = unpack_tables(self.read_payload(self.records[position]),[cat_dtype,move_dtype,landmark_dtype])
+		food = np.zeros(self.shape)
+		water = np.zeros(self.shape)
+		food.ravel()[landmarks["cell"]] = landmarks["food"]
+		water.ravel()[landmarks["cell"]] = landmarks["water"]
+		self.state = {"alive": {int(cat["index"]):list(cat.tolist()) for cat in alive},
+					"dead": {int(cat["index"]):list(cat.tolist()) for cat in dead},
+					"food": food, "water": water}
+		self.position = position
+
+	# Method that applies the changes recorded in a delta record to the current state
+	def apply_delta(self,position):
+		dtypes = [move_dtype,cat_dtype,move_dtype,change_dtype,landmark_dtype]
+		moves,births,deaths,changes,landmarks = unpack_tables(self.read_payload(self.records[position]),dtypes)
+		alive = self.state["alive"]
+		for index,row,col in moves.tolist():
+			alive[index][1],alive[index][2] = row,col
+		for cat in births:
+			alive[int(cat["index"])] = list(cat.tolist())
+		for index,row,col in deaths.tolist():
+			alive.pop(index)
+			self.state["dead"][index] = [index,row,col]
+		for index,flags,health in changes.tolist():
+			alive[index][6],alive[index][7] = flags,health
+		self.state["food"].ravel()[landmarks["cell"]] = landmarks["food"]
+		self.state["water"].ravel()[landmarks["cell"]] = landmarks["water"]
+		self.position = position
+
+	# Method that returns the state at a timestep, starting from the nearest keyframe (or the current state, if that is closer)
+	def seek(self,hour):
+		target = int(np.searchsorted(self.hours,hour,side="right"))-1
+		if target<0:
+			target = 0
+		keyframe = target
+		while self.records[keyframe][0]!=b"K":
+			keyframe-=1
+		if self.state is None or target<self.position or keyframe>self.position:
+			self.load_keyframe(keyframe)
+		for position in range(self.position+1,target+1):
+			self.apply_delta(position)
+		return self.state
+
+	def current_hour(self):
+		return self.records[self.position][1]
+
+	def close(self):
+		self.file.close()
+
+# Class with just what the renderer needs to draw a recorded cat
+class ReplayCat():
+	def __init__(self,record,colours):
+		self.index = record[0]
+		self.pos = [record[1],record[2]]
+		if len(record)>3:
+			self.age = record[3]
+			flags = record[6]
+			self.colour = colours[sexes[record[5]]]
+			if flags & flag_bits["fighting"]:
+				self.colour = colours["fighting"]
+			elif flags & flag_bits["fleeing"]:
+				self.colour = colours["fleeing"]
+			elif flags & flag_bits["sleeping"]:
+				self.colour = colours["sleeping"]
+
+if __name__ == "__main__":
+	import pygame
+	from Render import render_frame
+
+	colours = {"male":(70,230,255), "female":(250,0,255), "fighting":(255,0,0), "fleeing":(200,220,0), "sleeping":(130,130,130)}		# Same colours as Cat.set_colour()
+	cell_size = 10
+	try:
+		reader = ReplayReader(sys.argv[1])
+	except (IndexError,OSError,ValueError):
+		print("\nError: Please enter a valid replay file as a command line argument.")
+	else:
+		pygame.init()
+		rows,cols = reader.shape
+		gameDisplay = pygame.display.set_mode((cols*cell_size,rows*cell_size+30))
+		pygame.display.set_caption("Cats - Replay")
+		clock = pygame.time.Clock()
+		first,last = reader.hours[0],reader.hours[-1]
+		hour = first
+		playing = False
+		direction = 1
+		speed = 10 																# Timesteps shown per second while playing
+		crashed = False
+		while not crashed:
+			for event in pygame.event.get():
+				if event.type == pygame.QUIT:
+					crashed = True
+				if event.type == pygame.KEYDOWN:
+					if event.key == pygame.K_SPACE:
+						playing = not playing
+					if event.key == pygame.K_RIGHT:
+						hour = min(hour+1,last)
+					if event.key == pygame.K_LEFT:
+						hour = max(hour-1,first)
+					if event.key == pygame.K_UP:
+						speed *= 2
+					if event.key == pygame.K_DOWN:
+						speed = max(speed//2,1)
+					if event.key == pygame.K_r:
+						direction = -direction
+					if event.key == pygame.K_HOME:
+						hour = first
+					if event.key == pygame.K_END:
+						hour = last
+			if playing:
+				hour = min(max(hour+direction,first),last)
+			state = reader.seek(hour)
+			alive = [ReplayCat(cat,colours) for cat in state["alive"].values()]
+			dead = [ReplayCat(cat,colours) for cat in state["dead"].values()]
+			shown = reader.current_hour()
+			time_text = ("Day "+str(shown//24)+", Hour "+str(shown%24),"Total hours: "+str(shown)+("  (x"+str(direction*speed)+")" if playing else "  (paused)"))
+			frame = render_frame(reader.terrain,state["food"],state["water"],alive,dead,cell_size,time_text=time_text)
+			pygame.surfarray.blit_array(gameDisplay,frame.swapaxes(0,1))
+			pygame.display.update()
+			clock.tick(speed if playing else 30)
+		pygame.quit()
+		reader.close()
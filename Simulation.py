@@ -0,0 +1,767 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# Simulation.py - Simulation of cats in an environment, as an object that holds all of its own state
+#
+# Usage (from Python):
+#	simulation = Simulation(terrain_array,food_array,water_array,"M",20,max_hours=200,seed=1)
+#	simulation.run(100)						# Runs 100 timesteps (or until the simulation finishes)
+#	simulation.step()						# Runs one timestep
+#	print(simulation.stats())
+#
+# Each simulation has its own parameters, grids, cats, event log and random numbers, so any number of them can
+# run in one process (one after another, in threads or in a pool) without affecting each other. Cats.py and
+# SweepBase.py draw and save simulations; the rules of the simulation are all here.
+#
+
+import random
+import collections
+import heapq
+import os
+import numpy as np
+import csv
+from Interactions import tempers, sexes, attacks, attacks_while_asleep, attacks_sleeping_neighbour, flees, flees_while_asleep, same_sex
+from Interactions import build_occupancy, move_in_occupancy, mating_pairs, build_threat_field, move_in_threat_field, idle_cats
+from FlowField import FlowField
+from Diffusion import diffuse_fields
+from Landmarks import LandmarkRegistry
+from Neighbourhoods import NeighbourhoodCache
+from CatScents import CatScents
+from ParallelWorld import ParallelWorld
+from Heatmaps import HeatmapAccumulator
+
+# Colours of the cats
+red = (255,0,0)
+yellow = (200,220,0)
+pink = (250,0,255)
+cyan = (70,230,255)
+grey = (130,130,130)
+
+default_map_size = (50,50) 							# Rows and columns of the map read from terrain and landmark files, unless others are given
+
+# Parameters of a simulation and their defaults (can be changed with keyword arguments to Simulation())
+default_parameters = {"max_hours":0,					# Number of timesteps after which the simulation finishes (0 for indefinite)
+					"mating_cooldown_time":24,
+					"sleep_hours":8,
+					"jump_height":4,
+					"eating_threshold":25,
+					"drinking_threshold":25,
+					"navigation":"scent",				# "scent" to follow the diffused food and water scents, "flow" to follow distance fields (no diffusion)
+					"diffusion_threads":1, 				# Number of threads that diffuse the food and water scents (worth it on very large maps)
+					"parallel_workers":0, 				# Number of processes that work out the movement phase in bands of rows (0 for the sequential engine)
+					"spawning":"sequential", 			# "sequential" to place the initial cats one at a time, "bulk" to place them all at once (for large populations)
+					"stop_on_extinction":False,			# Finishes the simulation once every cat has died (otherwise it runs on to max_hours)
+					"stable_hours":0, 					# Finishes the simulation after this many hours without births or deaths (0 to disable)
+					"stats_window":0, 					# Finishes the simulation if the statistics change less than 'stats_epsilon' over this many hours (0 to disable)
+					"stats_epsilon":0.01,
+					"seed":-1, 							# Seed for the simulation's random numbers (negative for an unseeded simulation)
+					"heatmap":False} 					# Keeps heatmaps of what happened where (see Heatmaps.py)
+
+# Defining the Cat class
+class Cat():
+	def __init__(self,index,pos,age,temper,sex,height,sleep_chance):
+		self.alive = True
+		self.index = index
+		self.pos = pos
+		self.age = age
+		self.temper = temper   									# Can be friendly, aggressive, or meek
+		self.sex = sex
+		self.colour = None
+		self.height = height
+		self.attack_power = self.age*4    						# Older cats  deal more damage
+		self.sleep_chance = sleep_chance
+		self.engaged = False									# Whether the cat is currently interacting with something
+		self.consuming = False									# Whether the cat is currently eating or drinking
+		self.fighting = False									# Whether the cat is currently fighting another cat
+		self.fleeing = False									# Whether the cat is currently running away from another cat
+		self.sleeping = False									# Whether the cat is currently sleeping
+		self.mating = False										# Whether the cat is currently mating with another cat
+		self.mating_cooldown = 0  								# A timer that dictates how long the cat has to wait before it can mate again
+		self.sleep_counter = 0 									# Keeps track of how long the cat has been sleeping for
+		self.health = 100
+		self.thirst = 0
+		self.hunger = 0
+		self.dehydrated = False									# True when the cat's thirst is maxed out (at 100)
+		self.starving = False									# True when the cat's hunger is maxed put (at 100)
+		self.total_food_eaten = 0
+		self.total_water_drunk = 0
+		self.slot = None										# Position in the list of alive cats during the current timestep
+
+	def __str__(self):
+		return "Cat "+str(self.index)
+
+	# Method for displaying the cat's attributes
+	def display_self(self):
+		if self.alive:
+			status = 'ALIVE'
+		else:
+			status = 'DEAD'
+		if self.temper == 'aggressive':
+			tabs = "\t"
+		else:
+			tabs = "\t\t"
+		spaces = 8-len(status)
+		health = str(int(self.health))+"/100"
+		return "Cat "+str(self.index)+"\t|  "+status+spaces*" "+"|  Health: "+health+"\t|  Age: "+str(self.age)+"  |  Temper: "+self.temper+tabs+"|  Sex: "+self.sex+"\t|  Current position: "+str(self.pos)
+
+	# Method that assigns a colour to the cat based on its attributes
+	def set_colour(self):
+		if self.sex=='male':
+			self.colour = cyan
+		else:
+			self.colour = pink
+		if self.fighting:
+			self.colour = red
+		elif self.fleeing:
+			self.colour = yellow
+		elif self.sleeping:
+			self.colour = grey
+
+	# Method that increases hunger and thirst each iteration, and hurts the cat if hunger and thirst get too high
+	def hunger_and_thirst(self):
+		self.starving = False
+		self.dehydrated = False
+
+		if self.hunger >= 100:
+			self.starving = True
+		else:
+			self.hunger+=0.5					# Cats get more hungry after each timestep
+		if self.thirst >= 100:
+			self.dehydrated = True
+		else:
+			self.thirst+=1 						# Cats get thirsty faster than hungry
+		if self.starving or self.dehydrated:
+			self.health-=1 						# Cat loses health over time if starving
+
+
+	# Methods for eating and drinking; return the amount taken from the landmark (0 if the cat isn't hungry or thirsty enough)
+	def eat(self,foodpos,landmark_registry,eating_threshold):
+		if self.hunger>=eating_threshold:						# Cat eats if it's hungrier than a certain threshold
+			self.engaged = True
+			self.consuming = True
+			landmark_registry.consume("food",foodpos,0.5)
+			self.hunger-=15
+			self.total_food_eaten+=0.5
+			return 0.5
+		return 0
+
+	def drink(self,waterpos,landmark_registry,drinking_threshold):
+		if self.thirst>=drinking_threshold:						# Cat drinks if it's thirstier than a certain threshold
+			self.engaged = True
+			self.consuming = True
+			landmark_registry.consume("water",waterpos,0.5)
+			self.thirst-=15
+			self.total_water_drunk+=0.5
+			return 0.5
+		return 0
+
+	# Method for handling interactions with cats of the same sex, using the rule tables in Interactions.py
+	def interact(self,neighbours,simulation,occupancy,threat,damage):
+		has_an_aggressive_neighbour = False
+		for slot in neighbours:
+			neighbour = simulation.alive_cats[slot]
+			if same_sex[sexes[self.sex],sexes[neighbour.sex]]:
+				temper = tempers[self.temper]
+				neighbour_temper = tempers[neighbour.temper]
+
+				# Aggressive cats attack all other cats unless sleeping, friendly cats only attack aggressive cats
+				if attacks[temper,neighbour_temper]:
+					if ((not self.sleeping) or attacks_while_asleep[temper,neighbour_temper]) and ((not neighbour.sleeping) or attacks_sleeping_neighbour[temper,neighbour_temper]):
+						attack_power = self.attack_power
+						if self.height>neighbour.height:
+							attack_power *= 1.25 												# Cats on higher ground deal more damage
+						self.engaged = True
+						self.fighting = True
+						self.sleeping = False
+						damage[slot] += attack_power										# Damage is taken once every cat has had its turn
+
+				# Meek cats run away from all other cats unless sleeping
+				if flees_while_asleep[temper,neighbour_temper]:
+					has_an_aggressive_neighbour = True
+				if flees[temper,neighbour_temper] and ((not self.sleeping) or has_an_aggressive_neighbour):
+					self.sleeping = False
+					self.engaged = True
+					self.fleeing = True
+					valid_moves = simulation.get_valid_moves(self,occupancy)
+					old_pos = self.pos
+					self.pos = simulation.random.choice(valid_moves)
+					for move in valid_moves:
+						if threat[move[0],move[1]] - (move!=old_pos) == 0:				# Prefers a cell with no other cats around it (the cat itself is around every other move)
+							self.pos = move
+							break
+					move_in_occupancy(occupancy,self.slot,old_pos,self.pos)
+					move_in_threat_field(threat,simulation.neighbourhoods.around(old_pos),simulation.neighbourhoods.around(self.pos))
+					simulation.neighbourhoods.moved(self,old_pos,occupancy)
+
+	# Method for handling behaviour while sleeping
+	def sleep(self,sleep_hours):
+		if self.sleeping:
+			if self.sleep_counter > sleep_hours:			# Cats sleep for 'sleep_hours' number of hours at a stretch if uninterrupted
+				self.sleep_counter = 0
+				self.sleeping = False
+			else:
+				if self.health <= 95:
+					self.health += 5 						# Cats gain health while sleeping
+				self.sleep_counter+=1
+		else:
+			self.sleep_counter = 0
+
+# Function that reads in terrain data from a file and returns it as an array of 'map_size' rows and columns plus a border
+# of 0 all around (the rest of a bigger file is left out, and cells missing from a smaller one are 0)
+def read_terrain(terrain_filename,map_size=default_map_size):
+	num_rows,num_cols = map_size
+	terrain_array = np.zeros((num_rows+2,num_cols+2))
+	with open(terrain_filename,'r') as terrain_file:
+		terrain_list = list(csv.reader(terrain_file))
+	for r in range(num_rows):
+		for c in range(num_cols):
+			try:														# Exception handling for data files of mismatching dimensions
+				terrain_array[r+1,c+1] = int(terrain_list[r][c])
+			except IndexError:
+				pass
+	return terrain_array
+
+# Function that reads in food and water data from a file and returns them as arrays, on a map of 'map_size' rows and columns
+# (the same as the terrain's)
+def read_landmarks(landmark_filename,map_size=default_map_size):
+	num_rows,num_cols = map_size
+	food_array = np.zeros((num_rows+2,num_cols+2))
+	water_array = np.zeros((num_rows+2,num_cols+2))
+	with open(landmark_filename,'r') as landmark_file:
+		landmark_list = list(csv.reader(landmark_file))
+
+	for r in range(len(landmark_list)):
+		for c in range(len(landmark_list[0])):
+			value = landmark_list[r][c]
+			if value != "":
+				try:													# Exception handling for data files of mismatching dimensions
+					if value == "F":
+						food_array[r+1,c+1] = 1
+					else:
+						water_array[r+1,c+1] = 1
+				except IndexError:
+ 					pass
+	return food_array, water_array
+
+# Function that draws n numbers from a random.Random at once, the same numbers n calls to random() would return (each
+# is made from two 32-bit words of the generator, which getrandbits() gives out in the same order)
+def random_numbers(generator,n):
+	if n==0:
+		return np.zeros(0)
+	words = np.frombuffer(generator.getrandbits(64*n).to_bytes(8*n,'little'),dtype='<u4').reshape(n,2).astype(np.int64)
+	return ((words[:,0]>>5)*67108864+(words[:,1]>>6))/9007199254740992.0
+
+# Function to increment the current hour and day
+def increment_time(hour, day, hour_of_day):
+	hour+=1
+	day = hour//24
+	hour_of_day = hour%24
+	return hour,day,hour_of_day
+
+# Function that calculates and returns various statistics for a list of cat objects
+def get_stats(cats):
+	agr = 0 							# Number of aggressive cats
+	frnd = 0 							# Number of friendly cats
+	meek = 0 							# Number of meek cats
+	total_age = 0                   	# Total age of all cats
+	total_health = 0 					# Total health of all cats
+	for cat in cats:
+		if cat.temper == "aggressive":
+			agr+=1
+		elif cat.temper == "friendly":
+			frnd+=1
+		elif cat.temper == "meek":
+			meek+=1
+		total_age += cat.age
+		total_health += cat.health
+	if len(cats)>0:
+		avg_age = round(total_age/len(cats) , 2)		# Average age of cats
+		avg_health = round(total_health/len(cats) , 2) 	# Average health of cats
+	else:
+		avg_age = 0
+		avg_health = 0
+	return agr,frnd,meek,avg_age,avg_health
+
+# Function that returns the statistics watched by the stopping rules: population, average health, food and water left
+def watched_stats(alive_cats,food_array,water_array):
+	avg_health = get_stats(alive_cats)[4]
+	return len(alive_cats), avg_health, food_array.sum(), water_array.sum()
+
+# Function that displays each cat's status
+def show_cats(alive_cats,dead_cats):
+	for cat in alive_cats:
+		print(cat.display_self())
+	for cat in dead_cats:
+		print(cat.display_self())
+
+class Simulation():
+	# The grids passed in belong to the simulation from then on (it eats and drinks from them). A landmark registry and
+	# flow field built for the same grids, and scent grids (e.g. views into grids shared with other simulations), can be passed in
+	def __init__(self,terrain_array,food_array,water_array,neighbourhood,init_pop,landmark_registry=None,flow_field=None,food_scent_array=None,water_scent_array=None,**parameters):
+		for name in parameters:
+			if name not in default_parameters:
+				raise ValueError("Unknown parameter: "+name)
+		for name,value in default_parameters.items():
+			setattr(self,name,parameters.get(name,value))
+		self.terrain_array = terrain_array
+		self.food_array = food_array
+		self.water_array = water_array
+		self.neighbourhood = neighbourhood
+		self.init_pop = init_pop
+		self.num_rows,self.num_cols = terrain_array.shape[0]-2,terrain_array.shape[1]-2
+		if self.seed >= 0:
+			self.random = random.Random(self.seed) 						# The simulation's own random numbers
+		else:
+			self.random = random.Random()
+
+		if food_scent_array is None:
+			food_scent_array = food_array.copy()
+		if water_scent_array is None:
+			water_scent_array = water_array.copy()
+		self.food_scent_array = food_scent_array
+		self.water_scent_array = water_scent_array
+		if landmark_registry is None:
+			landmark_registry = LandmarkRegistry(food_array,water_array,terrain_array,neighbourhood,self.jump_height)	# Cells and quantities of the food and water
+		self.landmark_registry = landmark_registry
+		self.neighbourhoods = NeighbourhoodCache(terrain_array,food_array,water_array,landmark_registry,neighbourhood,self.jump_height)	# Cells and cats around each cell
+		self.alive_cats = self.create_cats(init_pop)					# Creating initial list of cat objects
+		self.init_cats = self.alive_cats.copy()							# Storing initial list of cat objects
+		self.dead_cats = []												# List of cats that have died
+		self.births = 0 												# Total number of births
+		self.new_births = 0 											# Births in the last timestep
+		self.cat_scents = CatScents() 									# Scents that cats leave behind (see CatScents.py)
+		self.event_log = ["### LOG ###\n\n"]							# Log of events that occur during the simulation
+		if self.navigation == "flow" and flow_field is None:
+			flow_field = FlowField(terrain_array,food_array,water_array,neighbourhood,self.jump_height)		# Distances to the nearest food and water
+		self.flow_field = flow_field
+		self.parallel_world = None
+		if self.parallel_workers>0:
+			self.parallel_world = ParallelWorld(terrain_array,landmark_registry,self.parallel_workers,neighbourhood,self.jump_height,self.eating_threshold,self.drinking_threshold,self.navigation)
+		if self.heatmap:
+			self.heatmap = HeatmapAccumulator(terrain_array.shape)
+		else:
+			self.heatmap = None
+
+		self.finished = False
+		self.hour,self.day,self.hour_of_day = -1,0,0
+		self.hearts = [] 												# Cells (x,y) of the hearts drawn where cats reproduced this timestep
+		self.stop_reason = None
+		self.last_change_hour = 0 										# Last hour in which a cat was born or died
+		self.stats_history = collections.deque(maxlen=self.stats_window+1)
+
+	# Method that returns a list of valid cells that a cat can move to on the next iteration
+	def get_valid_moves(self,cat,occupancy):
+		cat_scents = self.cat_scents
+		valid_moves = []
+		for cell in self.neighbourhoods.moves(cat.pos): 															# Inside the borders, not across a steep slope and not food or water
+			if not (occupancy[cell[0],cell[1]] and occupancy[cell[0],cell[1]]!=[cat.slot]):						# Cats can't walk on other cats
+				valid_moves.append(cell)
+		avoided_scents = [v for v in valid_moves]
+		for cell in valid_moves:
+			scent = cat_scents.at(cell[0],cell[1])
+			if scent[1]==cat.sex and scent[0]!=cat:			# Cats avoid scents of the same sex
+				probability = scent[2]
+				if self.random.random()<probability:
+					avoided_scents.remove(cell)
+
+		return avoided_scents
+
+	# Method that returns the cats (as slots in alive_cats), food cells and water cells within a cat's neighbourhood
+	def check_surroundings(self,cat,occupancy):
+		neighbours = self.neighbourhoods.cats_around(cat,occupancy) 					# Cats don't interact with cells that are across a steep slope
+		neighbouring_food,neighbouring_water = self.landmark_registry.around(cat.pos)		# Only cells next to a landmark have any
+		return neighbours, neighbouring_food, neighbouring_water
+
+	# Method that decides whether to eat or drink given landmarks in its neighbourhood
+	def eat_or_drink(self,cat,neighbouring_food,neighbouring_water):
+		if len(neighbouring_water)==0:													# If there's only food in its neighbourhood
+			eating = True
+		elif len(neighbouring_food)==0:													# If there's only water in its neighbourhood
+			eating = False
+		else:																			# If there's both food and water in its neighbourhood
+			eating = cat.hunger>cat.thirst 												# Chooses based on whether its more hungry or more thirsty
+		if eating:
+			cell = self.random.choice(neighbouring_food)
+			amount = cat.eat(cell,self.landmark_registry,self.eating_threshold)
+		else:
+			cell = self.random.choice(neighbouring_water)
+			amount = cat.drink(cell,self.landmark_registry,self.drinking_threshold)
+		if amount>0 and self.heatmap is not None:
+			self.heatmap.add_consumption("food_eaten" if eating else "water_drunk",cell,amount)	# Counted at the landmark, as it is taken
+
+	# Reproduction between two cats
+	def reproduce(self,birth_index,cat1,cat2,cell):
+		index = len(self.alive_cats)+len(self.dead_cats)+birth_index
+		cat1.engaged = True
+		cat1.mating = True
+		cat1.mating_cooldown = self.mating_cooldown_time												# Cats have a 24-hour cooldown time before they can reproduce again
+		cat2.engaged = True
+		cat2.mating = True
+		cat2.mating_cooldown = self.mating_cooldown_time
+		temper = self.random.choice(["aggressive","friendly","meek"])
+		sex = self.random.choice(['male','female'])
+		baby = Cat(index,cell,1,temper,sex,self.terrain_array[cell[0],cell[1]],self.random.uniform(0.01,0.05))
+		self.hearts.append(((cat1.pos[1]+cat2.pos[1])/2 , cat1.pos[0]-2))				# Creating a heart image to be drawn to the screen
+		event = "Day "+str(self.day)+", Hour "+str(self.hour_of_day)+": Cat "+str(cat1.index)+" and Cat "+str(cat2.index)+" gave birth to Cat "+str(baby.index)+"!\n"
+		self.event_log.append(event)
+		return baby
+
+	# Method that makes cats leave a scent (male or female) that evaporates over time
+	def update_cat_scents(self):
+		self.cat_scents.update(self.alive_cats) 						# Only the cells the cats are in change; older scents fade as they are read
+
+	# Method that kills cats if their health is below 0
+	def kill_cats(self):
+		for cat in self.alive_cats:
+			if cat.health<=0:
+				cat.health = 0
+				cat.alive = False
+				self.dead_cats.append(cat)
+				if cat.fighting:
+					event = "Day "+str(self.day)+", Hour "+str(self.hour_of_day)+": Cat "+str(cat.index)+" has been killed.\n"
+				elif cat.dehydrated:
+					event = "Day "+str(self.day)+", Hour "+str(self.hour_of_day)+": Cat "+str(cat.index)+" has died of thirst.\n"
+				else:
+					event = "Day "+str(self.day)+", Hour "+str(self.hour_of_day)+": Cat "+str(cat.index)+" has died of hunger.\n"
+				self.event_log.append(event)
+		self.alive_cats = [cat for cat in self.alive_cats if cat.alive]
+
+	# Method that creates cat objects
+	def create_cats(self,n):
+		if self.spawning == "bulk":
+			return self.spawn_cats(n)
+		alive_cats = []
+		occupied = set() 												# Cells that already hold a cat
+		for i in range(n):
+			cell_is_occupied = True
+			while cell_is_occupied:
+				cell_is_occupied = False
+				pos = [self.random.randint(1,self.num_rows), self.random.randint(1,self.num_cols)]
+				if (pos[0],pos[1]) in occupied:
+					cell_is_occupied = True
+				if self.landmark_registry.is_landmark(pos):
+					cell_is_occupied = True
+			occupied.add((pos[0],pos[1]))
+			age = self.random.randint(1,5)
+			temper = self.random.choice(["aggressive","friendly","meek"])
+			sex = self.random.choice(['male','female'])
+			cat = Cat(i+1, pos, age, temper, sex, self.terrain_array[pos[0],pos[1]], self.random.uniform(0.01,0.05))
+			alive_cats.append(cat)
+		return alive_cats
+
+	# Method that creates n cats at once: their cells are drawn together from the cells without landmarks, and their attributes as arrays
+	def spawn_cats(self,n):
+		free = np.ones((self.num_rows,self.num_cols),dtype=bool)
+		for kind in ["food","water"]:
+			for cell,quantity in self.landmark_registry.landmarks(kind):
+				free[cell[0]-1,cell[1]-1] = False
+		free_cells = np.flatnonzero(free)
+		if n > len(free_cells):
+			raise ValueError("Not enough cells without landmarks for "+str(n)+" cats")
+		generator = np.random.default_rng(self.random.getrandbits(64)) 		# Seeded from the simulation's own random numbers
+		cells = generator.choice(free_cells,n,replace=False)
+		rows = (cells//self.num_cols+1).tolist()
+		cols = (cells%self.num_cols+1).tolist()
+		ages = generator.integers(1,6,n).tolist()
+		temper_names = generator.choice(["aggressive","friendly","meek"],n).tolist()
+		sex_names = generator.choice(['male','female'],n).tolist()
+		heights = self.terrain_array[rows,cols].tolist()
+		sleep_chances = generator.uniform(0.01,0.05,n).tolist()
+		return [Cat(i+1,[rows[i],cols[i]],ages[i],temper_names[i],sex_names[i],heights[i],sleep_chances[i]) for i in range(n)]
+
+	# Main sequence of events; returns the number of births that occurred during the timestep
+	def main_loop(self):
+		alive_cats,terrain_array,food_array,water_array = self.alive_cats,self.terrain_array,self.food_array,self.water_array
+		food_scent_array,water_scent_array,cat_scents = self.food_scent_array,self.water_scent_array,self.cat_scents
+		neighbourhood,jump_height,flow_field = self.neighbourhood,self.jump_height,self.flow_field
+		births = []
+		self.neighbourhoods.new_timestep()
+		occupancy = build_occupancy(alive_cats,terrain_array.shape)		# Slots of the cats in each cell, kept up to date as cats move
+		threat = build_threat_field(alive_cats,terrain_array,neighbourhood,jump_height)		# Number of cats around each cell, kept up to date as cats flee
+		damage = np.zeros(len(alive_cats))								# Damage taken by each cat during the interaction phase
+
+		# Cats asleep with no cats around them are idle: they can't fight, flee, eat, drink or mate, so only the active cats take
+		# turns in the interaction, reproduction and sleeping phases, and the idle ones just update their counters
+		idle = idle_cats(alive_cats,threat)
+		queue = np.flatnonzero(~idle).tolist() 							# Slots of the active cats still to take their turn, as a heap
+		active = [] 													# Slots of the active cats, in order
+
+		# Fighting/fleeing and food/water interaction rules
+		while len(queue)>0:
+			slot = heapq.heappop(queue)
+			active.append(slot)
+			cat = alive_cats[slot]
+			cat.height = terrain_array[cat.pos[0],cat.pos[1]]
+			cat.engaged = False
+			cat.consuming = False
+			cat.fighting = False
+			cat.fleeing = False
+			cat.mating = False
+			if cat.mating_cooldown>0:
+				cat.mating_cooldown-=1 			# Decrementing the mating cooldown timer every timestep
+			neighbours,neighbouring_food,neighbouring_water = self.check_surroundings(cat,occupancy)
+			if len(neighbours)>0:
+				cat.interact(neighbours,self,occupancy,threat,damage)
+			if not (cat.fighting or cat.fleeing):
+				if (not cat.sleeping) and (len(neighbouring_food)>0 or len(neighbouring_water)>0):
+					self.eat_or_drink(cat,neighbouring_food,neighbouring_water)
+			if cat.fleeing:
+				for other in self.neighbourhoods.cats_around(cat,occupancy):
+					if other>slot and idle[other]: 						# Idle cats it fled next to take their turn after all
+						idle[other] = False
+						heapq.heappush(queue,other)
+
+		for slot in np.flatnonzero(damage):
+			alive_cats[slot].health -= float(damage[slot])
+
+		# Reproduction rules (pairs of neighbours that were eligible to mate at the start of this phase)
+		for slot,partners in mating_pairs(alive_cats,active,occupancy,self.neighbourhoods):
+			cat = alive_cats[slot]
+			if (not cat.engaged) and (not cat.mating):
+				for partner in partners:
+					neighbour = alive_cats[partner]
+					if (not neighbour.engaged) and (not neighbour.mating):
+						if (cat.mating_cooldown==0) and (neighbour.mating_cooldown==0):
+							potential_spots = self.get_valid_moves(cat,occupancy)
+							chosen_spot = self.random.choice(potential_spots)   					# Choosing a random valid cell for the baby to spawn in
+							baby = self.reproduce(len(births)+1,cat,neighbour,chosen_spot)
+							births.append(baby)
+
+		# Sleeping rules. Every cat has a random number drawn, asleep or not (so seeded runs don't change), so they are drawn at once
+		draws = random_numbers(self.random,len(alive_cats))
+		for slot in active:
+			cat = alive_cats[slot]
+			if cat.sleeping:
+				continue
+			initial_sleep_chance = cat.sleep_chance
+			if self.hour_of_day >= 21 or self.hour_of_day < 5:			# More likely to sleep at night
+				cat.sleep_chance*=5
+			multiplier = -0.02*cat.health + 3 							# The lower the cat's health, the more likely it is to go to sleep
+			cat.sleep_chance*=multiplier
+			if draws[slot]<cat.sleep_chance and (cat.hunger < 75 and cat.thirst < 75) and (not cat.engaged):		# Cats only sleep if they are not hungry or thirsty
+				cat.sleeping = True
+			cat.sleep_chance = initial_sleep_chance
+
+		# Idle cats only update their counters, in one pass; the ones that wake up move with the active cats
+		woken = []
+		for slot in np.flatnonzero(idle).tolist():
+			cat = alive_cats[slot]
+			if cat.mating_cooldown>0:
+				cat.mating_cooldown-=1
+			cat.sleep(self.sleep_hours)
+			if cat.sleeping:
+				cat.set_colour()
+				cat.hunger_and_thirst()
+			else:
+				woken.append(slot)
+
+		# Movement rules (a cat's sleep counter only changes the cat itself, so every cat's is updated before any of them moves)
+		for slot in active:
+			alive_cats[slot].sleep(self.sleep_hours)
+		awake = [alive_cats[slot] for slot in heapq.merge(active,woken)] 		# Cats that may move, in order
+		movers = [cat for cat in awake if (not cat.engaged) and (not cat.sleeping)]
+		if self.parallel_world is not None:
+			for cat,new_pos in self.parallel_world.move_cats(movers,self):
+				old_pos = cat.pos
+				cat.pos = new_pos
+				move_in_occupancy(occupancy,cat.slot,old_pos,cat.pos)
+		else:
+			for cat in movers:
+				valid_moves = self.get_valid_moves(cat,occupancy)
+				choices = [v for v in valid_moves]			# List of move choices the cat will randomly choose from
+				if cat.hunger<self.eating_threshold and cat.thirst<self.drinking_threshold and cat.mating_cooldown==0:
+					# Making the cat follow the scent of the opposite sex:
+					neighbour_scent_value = 0
+					for move in valid_moves:
+						scent = cat_scents.at(move[0],move[1])
+						# List of move choices becomes the cells with highest scent of the opposite sex:
+						if scent[1]!=None and scent[1]!=cat.sex:
+							if scent[2]>neighbour_scent_value:
+								neighbour_scent_value = scent[2]
+								choices = [move]
+							elif scent[2]==neighbour_scent_value:
+								choices.append(move)
+
+				else:
+					if self.navigation == "flow":
+						# Making the cat follow the distance fields towards the nearest food or water:
+						if (cat.hunger>self.eating_threshold) and (cat.hunger>cat.thirst or not flow_field.reachable("water",cat.pos)):
+							choices = flow_field.best_moves("food",valid_moves)
+						elif (cat.thirst>self.drinking_threshold) and (cat.thirst>=cat.hunger or not flow_field.reachable("food",cat.pos)):
+							choices = flow_field.best_moves("water",valid_moves)
+					else:
+						# Making the cat follow food and water scents:
+						food_scents = []							# List of cells with food scents in the neighbourhood
+						water_scents = []							# List of cells with water scents in the neighbourhood
+						temp_choices = []
+						for move in valid_moves:
+							if food_scent_array[move[0],move[1]]>0:
+								food_scents.append(food_scent_array[move[0],move[1]])
+							if water_scent_array[move[0],move[1]]>0:
+								water_scents.append(water_scent_array[move[0],move[1]])
+						if (cat.hunger>self.eating_threshold) and (cat.hunger>cat.thirst or len(water_scents)==0):
+							for move in valid_moves:
+								probability = food_scent_array[move[0],move[1]]
+								if self.random.random()<=probability:
+									temp_choices.append(move)
+						elif (cat.thirst>self.drinking_threshold) and (cat.thirst>=cat.hunger or len(food_scents)==0):
+							for move in valid_moves:
+								probability = water_scent_array[move[0],move[1]]
+								if self.random.random()<=probability:
+									temp_choices.append(move)
+						if len(temp_choices)>0:						# If there are no food or water scents in the neighbourhood, move choices list is unchanged
+							choices = [c for c in temp_choices]
+				old_pos = cat.pos
+				cat.pos = self.random.choice(choices)
+				move_in_occupancy(occupancy,cat.slot,old_pos,cat.pos)
+
+		alive_cats.extend(births)				# Adding new births to the cat population
+
+		# Counters of the cats that weren't left idle (the idle ones updated theirs above), after they have moved
+		for cat in awake+births:
+			cat.set_colour()					# Setting the colour for each cat
+			cat.hunger_and_thirst()				# Updating each cat's hunger and thirst levels
+
+		return len(births)						# Returning number of births that occurred
+
+	# Method that spreads the food and water scents by one timestep (landmarks keep their own cells at full strength)
+	def diffuse_scents(self):
+		food_diffused,water_diffused = diffuse_fields([self.food_scent_array,self.water_scent_array],self.neighbourhood,self.diffusion_threads)	# Both scents are diffused at the same time
+		np.copyto(self.food_scent_array,np.where(self.food_array>0,self.food_array,food_diffused))
+		np.copyto(self.water_scent_array,np.where(self.water_array>0,self.water_array,water_diffused))
+
+	# Method that checks the stopping rules; returns the reason for stopping, or None to keep going
+	def check_stopping_rules(self):
+		if self.stop_on_extinction and len(self.alive_cats)==0:
+			return "extinction"
+		if self.stable_hours>0 and self.hour-self.last_change_hour>=self.stable_hours:
+			return "no births or deaths for "+str(self.stable_hours)+" hours"
+		if self.stats_window>0 and len(self.stats_history)>self.stats_window:
+			changes = np.ptp(np.array(self.stats_history),axis=0)		# Largest change of each statistic over the window
+			if np.all(changes<self.stats_epsilon):
+				return "statistics changed less than "+str(self.stats_epsilon)+" over "+str(self.stats_window)+" hours"
+		return None
+
+	# Method that runs one timestep. Simulations whose scents are diffused together elsewhere (e.g. replicas in SweepBase.py) pass diffuse=False
+	def step(self,diffuse=True):
+		self.hour,self.day,self.hour_of_day = increment_time(self.hour,self.day,self.hour_of_day)
+		self.hearts = []
+		if (self.max_hours>0) and (self.hour==self.max_hours):				# Finishes the simulation after the specified number of iterations
+			self.finished = True
+
+		self.update_cat_scents()
+		self.new_births = self.main_loop()
+		self.births += self.new_births
+		if self.heatmap is not None:
+			self.heatmap.add_timestep(self.alive_cats,self.new_births)
+		if self.navigation == "flow":
+			self.flow_field.update(self.landmark_registry.take_depleted())	# Only changes around landmarks that have run out
+		elif diffuse:
+			self.diffuse_scents()
+
+		deaths = len(self.dead_cats)
+		self.kill_cats()
+		if self.heatmap is not None:
+			self.heatmap.add_deaths(self.dead_cats[deaths:])
+		if self.new_births>0 or len(self.dead_cats)>deaths:
+			self.last_change_hour = self.hour
+		if self.stats_window>0:
+			self.stats_history.append(watched_stats(self.alive_cats,self.food_array,self.water_array))
+		self.stop_reason = self.check_stopping_rules()
+		if self.stop_reason is not None and not self.finished:
+			self.finished = True 												# Finishes the simulation early
+			event = "Day "+str(self.day)+", Hour "+str(self.hour_of_day)+": Simulation stopped early ("+self.stop_reason+").\n"
+			self.event_log.append(event)
+		else:
+			self.stop_reason = None
+
+	# Method that runs 'hours' timesteps (0 for as many as it takes), stopping early if the simulation finishes; returns the number run
+	def run(self,hours=0):
+		steps = 0
+		while not self.finished and (hours<=0 or steps<hours):
+			self.step()
+			steps += 1
+		return steps
+
+	# Method that returns the statistics of the simulation so far
+	def stats(self):
+		agr,frnd,meek,avg_age,avg_health = get_stats(self.alive_cats)
+		food_eaten = sum([cat.total_food_eaten for cat in self.alive_cats+self.dead_cats])
+		water_drunk = sum([cat.total_water_drunk for cat in self.alive_cats+self.dead_cats])
+		return {"hours_run":self.hour, "stop_reason":self.stop_reason, "births":self.births, "deaths":len(self.dead_cats), "population":len(self.alive_cats),
+			"aggressive":agr, "friendly":frnd, "meek":meek, "avg_age":avg_age, "avg_health":avg_health, "food_eaten":food_eaten, "water_drunk":water_drunk}
+
+	# Method that returns the statistics of the simulation as the text saved at the end of the log
+	def show_stats(self):
+		init_agr,init_frnd,init_meek,init_avg_age,init_avg_health = get_stats(self.init_cats)
+		curr_agr,curr_frnd,curr_meek,curr_avg_age,curr_avg_health = get_stats(self.alive_cats)
+		total_food_eaten = 0
+		total_water_drunk = 0
+		for cat in self.alive_cats+self.dead_cats:
+			total_food_eaten+=cat.total_food_eaten
+			total_water_drunk+=cat.total_water_drunk
+		avg_food_eaten = round(total_food_eaten/(len(self.alive_cats)+len(self.dead_cats)) , 2)
+		avg_water_drunk = round(total_water_drunk/(len(self.alive_cats)+len(self.dead_cats)) , 2)
+
+		stats = """\n\n#### STATISTICS ####\n\n
+Initial population: """+str(self.init_pop)+"""
+Initial number of aggressive cats: """+str(init_agr)+"""
+Initial number of friendly cats: """+str(init_frnd)+"""
+Initial number of meek cats: """+str(init_meek)+"""
+Initial average age of cats: """+str(init_avg_age)+"""
+Initial average health of cats: 100
+
+Births: """+str(self.births)+"""
+Deaths: """+str(len(self.dead_cats))+"""
+
+Current population: """+str(len(self.alive_cats))+"""
+Current number of aggressive cats: """+str(curr_agr)+"""
+Current number of friendly cats: """+str(curr_frnd)+"""
+Current number of meek cats: """+str(curr_meek)+"""
+Current average age of cats: """+str(curr_avg_age)+"""
+Current average health of cats: """+str(curr_avg_health)+"""
+
+Total units of food eaten: """+str(total_food_eaten)+"""
+Average units of food eaten by a single cat: """+str(avg_food_eaten)+"""
+Total units of water drunk: """+str(total_water_drunk)+"""
+Average units of water drunk by a single cat: """+str(avg_water_drunk)+"\n\n"
+
+		return stats
+
+	# Method that saves the layout of the food, water and cats to csv files in a directory
+	def save_grids(self,directory):
+		landmark_array_save = np.empty((self.num_rows,self.num_cols),dtype=object)		# Layout of food and water in the final frame of simulation
+		cats_array_save = np.empty((self.num_rows,self.num_cols),dtype=object)			# Positions of cats in final frame of simulation
+		for r in range(self.num_rows):
+			for c in range(self.num_cols):
+				cats_array_save[r,c] = ""
+				if self.water_array[r+1,c+1] > 0:
+					landmark_array_save[r,c] = "W "+str(self.water_array[r+1,c+1])
+				elif self.food_array[r+1,c+1] > 0:
+					landmark_array_save[r,c] = "F "+str(self.food_array[r+1,c+1])
+				else:
+					landmark_array_save[r,c] = ""
+
+		for cat in self.alive_cats+self.dead_cats:
+			r,c = cat.pos[0],cat.pos[1]
+			if cat.alive:
+				cats_array_save[r-1,c-1]="A"			# Alive cats represented by "A"
+			else:
+				cats_array_save[r-1,c-1]="D"			# Dead cats represented by "D"
+
+		# Converting the arrays to csv files and saving them
+		np.savetxt(os.path.join(directory,"final_landmarks.csv"), landmark_array_save, delimiter=",", fmt='%s')
+		np.savetxt(os.path.join(directory,"final_cats.csv"), cats_array_save, delimiter=",", fmt='%s')
+
+	# Method that saves the event log, followed by the statistics, to log.txt in a directory
+	def save_log(self,directory,stats):
+		with open(os.path.join(directory,"log.txt"),"w") as out:
+			for ev in self.event_log:
+				out.write(ev)
+			out.write(stats)
+
+	# Method that stops the processes of a parallel world (if any)
+	def close(self):
+		if self.parallel_world is not None:
+			self.parallel_world.close()
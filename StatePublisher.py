@@ -0,0 +1,192 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# StatePublisher.py - Publishes the simulation state into named shared memory for other local processes
+#
+# Usage: python3 StatePublisher.py <name>
+# Attaches to a running simulation that publishes under <name> and prints a summary of each new timestep
+#
+# The grids are published into two buffers that take turns. Each buffer has its own sequence counter that
+# is odd while the buffer is being written, so a reader can take numpy views straight into the latest
+# buffer (no copying) and check afterwards that the simulation hasn't started writing over them. The timestep
+# and number of cats a buffer holds are kept with it and written while its counter is odd, like its grids.
+#
+
+import numpy as np
+import time
+import sys
+from multiprocessing import shared_memory, resource_tracker
+
+header_fields = ["latest","rows","cols","max_cats"]
+buffer_fields = ["tick","day","hour_of_day","num_cats","cats_dropped"] 	# Fields of each buffer
+header_size = 16*8 										# Room for the header fields, the sequence counters of both buffers and the fields of each buffer
+tempers = {"aggressive":0, "friendly":1, "meek":2}
+sexes = {None:0, "male":1, "female":2}
+
+# Compact table of cat attributes, one row per alive cat
+cat_dtype = np.dtype([("index",np.int32),("row",np.int16),("col",np.int16),("age",np.int8),("temper",np.int8),("sex",np.int8),
+					("flags",np.uint8),("health",np.float32),("hunger",np.float32),("thirst",np.float32)])
+flag_bits = {"sleeping":1, "fighting":2, "fleeing":4, "mating":8, "consuming":16}
+
+# Grids published every timestep, in the order they are laid out in each buffer
+grid_fields = [("food",np.float64),("water",np.float64),("food_scent",np.float64),("water_scent",np.float64),
+			("cat_scent",np.float64),("cat_scent_sex",np.int8),("occupancy",np.int32)]
+
+# Function that returns where the terrain and each buffer's grids and cat table are in the shared memory
+def layout(rows,cols,max_cats):
+	offsets = {}
+	offset = header_size
+	shape = (rows,cols)
+	offsets["terrain"] = (offset,np.float64,shape)				# Terrain doesn't change, so it is only published once
+	offset += rows*cols*8
+	for b in range(2):
+		for name,dtype in grid_fields:
+			offsets[(b,name)] = (offset,dtype,shape)
+			offset += rows*cols*np.dtype(dtype).itemsize
+			offset += (-offset)%8 								# Keeping every array 8-byte aligned
+		offsets[(b,"cats")] = (offset,cat_dtype,(max_cats,))
+		offset += max_cats*cat_dtype.itemsize
+		offset += (-offset)%8
+	return offsets,offset
+
+# Function that returns numpy views of every array in a shared memory block
+def map_arrays(buffer,rows,cols,max_cats):
+	offsets,size = layout(rows,cols,max_cats)
+	arrays = {}
+	for key,(offset,dtype,shape) in offsets.items():
+		arrays[key] = np.ndarray(shape,dtype=dtype,buffer=buffer,offset=offset)
+	return arrays
+
+# Function that returns views of the fields of each buffer in the header, after the sequence counters
+def buffer_views(header):
+	start = len(header_fields)+2
+	return [header[start+b*len(buffer_fields):start+(b+1)*len(buffer_fields)] for b in range(2)]
+
+class StatePublisher():
+	def __init__(self,name,terrain_array,max_cats):
+		rows,cols = terrain_array.shape
+		size = layout(rows,cols,max_cats)[1]
+		self.memory = shared_memory.SharedMemory(name=name,create=True,size=size)
+		self.header = np.ndarray((header_size//8,),dtype=np.int64,buffer=self.memory.buf)
+		self.sequence = self.header[len(header_fields):len(header_fields)+2]		# One sequence counter for each buffer
+		self.fields = buffer_views(self.header)
+		self.header[:] = 0
+		self.set_header(latest=-1,rows=rows,cols=cols,max_cats=max_cats)
+		self.arrays = map_arrays(self.memory.buf,rows,cols,max_cats)
+		self.arrays["terrain"][:] = terrain_array
+		self.max_cats = max_cats
+
+	def set_header(self,**values):
+		for name,value in values.items():
+			self.header[header_fields.index(name)] = value
+
+	# Method that writes the current state into the buffer that readers aren't looking at, then makes it the latest
+	def publish(self,hour,day,hour_of_day,alive_cats,food_array,water_array,food_scent_array,water_scent_array,cat_scents):
+		latest = self.header[header_fields.index("latest")]
+		b = 1 if latest==0 else 0
+		self.sequence[b] += 1 													# Odd while the buffer is being written
+		self.arrays[(b,"food")][:] = food_array
+		self.arrays[(b,"water")][:] = water_array
+		self.arrays[(b,"food_scent")][:] = food_scent_array
+		self.arrays[(b,"water_scent")][:] = water_scent_array
+		owner,sex,intensity = cat_scents.grids(food_array.shape)
+		self.arrays[(b,"cat_scent")][:] = intensity
+		self.arrays[(b,"cat_scent_sex")][:] = sex+1 							# CatScents.grids() has -1 for no scent and Interactions.sexes otherwise
+		occupancy = self.arrays[(b,"occupancy")]
+		occupancy[:] = 0 														# Index of the cat in each cell (0 if empty)
+		cats = self.arrays[(b,"cats")]
+		num_cats = min(len(alive_cats),self.max_cats)
+		for i in range(num_cats):
+			cat = alive_cats[i]
+			flags = 0
+			for name,bit in flag_bits.items():
+				if getattr(cat,name):
+					flags |= bit
+			cats[i] = (cat.index,cat.pos[0],cat.pos[1],cat.age,tempers[cat.temper],sexes[cat.sex],flags,cat.health,cat.hunger,cat.thirst)
+			occupancy[cat.pos[0],cat.pos[1]] = cat.index
+		self.fields[b][:] = [hour,day,hour_of_day,num_cats,len(alive_cats)-num_cats]
+		self.sequence[b] += 1
+		self.set_header(latest=b)
+
+	def close(self):
+		del self.arrays, self.header, self.sequence, self.fields 				# Views have to go before the memory can be closed
+		self.memory.close()
+		self.memory.unlink()
+
+class StateReader():
+	def __init__(self,name):
+		try:
+			self.memory = shared_memory.SharedMemory(name=name,track=False)		# Python 3.13 and newer
+		except TypeError:
+			self.memory = shared_memory.SharedMemory(name=name)
+			resource_tracker.unregister(self.memory._name,"shared_memory")		# Otherwise the block is removed when the reader exits
+		self.header = np.ndarray((header_size//8,),dtype=np.int64,buffer=self.memory.buf)
+		self.sequence = self.header[len(header_fields):len(header_fields)+2]
+		self.fields = buffer_views(self.header)
+		rows,cols,max_cats = [int(self.header[header_fields.index(name)]) for name in ["rows","cols","max_cats"]]
+		self.arrays = map_arrays(self.memory.buf,rows,cols,max_cats)
+		self.terrain = self.arrays["terrain"]
+
+	def get_header(self,name):
+		return int(self.header[header_fields.index(name)])
+
+	# Method that returns views (no copies) of the latest published state, and a token for checking them with still_valid()
+	def views(self):
+		while True:
+			b = self.get_header("latest")
+			if b<0:
+				return None,None 												# Nothing has been published yet
+			sequence = int(self.sequence[b])
+			if sequence%2==0:
+				break
+		state = {name:self.arrays[(b,name)] for name,dtype in grid_fields}
+		fields = dict(zip(buffer_fields,self.fields[b].tolist())) 				# Read before checking the sequence, like the grids
+		state["cats"] = self.arrays[(b,"cats")][:fields["num_cats"]]
+		state["tick"] = fields["tick"]
+		state["day"] = fields["day"]
+		state["hour_of_day"] = fields["hour_of_day"]
+		state["cats_dropped"] = fields["cats_dropped"]
+		if int(self.sequence[b])!=sequence:
+			return self.views()
+		return state,(b,sequence)
+
+	# Method that checks whether the simulation has started writing over the views from views()
+	def still_valid(self,token):
+		b,sequence = token
+		return int(self.sequence[b])==sequence
+
+	# Method that returns a consistent copy of the latest published state
+	def snapshot(self):
+		while True:
+			state,token = self.views()
+			if state is None:
+				return None
+			copy = {name:(value.copy() if isinstance(value,np.ndarray) else value) for name,value in state.items()}
+			if self.still_valid(token):
+				return copy
+
+	def close(self):
+		del self.arrays, self.header, self.sequence, self.fields, self.terrain
+		self.memory.close()
+
+if __name__ == "__main__":
+	try:
+		reader = StateReader(sys.argv[1])
+	except (IndexError,FileNotFoundError):
+		print("\nError: Please enter the name of a running simulation as a command line argument.")
+	else:
+		last_tick = None
+		try:
+			while True:
+				state = reader.snapshot()
+				if state is not None and state["tick"]!=last_tick:
+					last_tick = state["tick"]
+					cats = state["cats"]
+					print("Day "+str(state["day"])+", Hour "+str(state["hour_of_day"])+": "+str(len(cats))+" cats, "+
+						"average health "+str(round(float(cats["health"].mean()),2) if len(cats)>0 else 0)+", "+
+						"food left "+str(state["food"].sum())+", water left "+str(state["water"].sum()),flush=True)
+				time.sleep(0.5)
+		except (KeyboardInterrupt,FileNotFoundError):
+			pass
+		reader.close()
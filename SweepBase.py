@@ -6,772 +6,273 @@
 #
 
 import pygame
-import pygame.ftfont
 import os
 import datetime
-import random
 import numpy as np
-import csv
 import sys
-
-main_dir = os.getcwd()
-
-# Colours
-black = (0,0,0)
-white = (255,255,255)
-red = (255,0,0)
-green = (50,220,70)
-blue = (30,90,160)
-yellow = (200,220,0)
-pink = (250,0,255)
-cyan = (70,230,255)
-grey = (130,130,130)
-
-# Defining the perimeter of the simulation
-num_rows = 50
-num_cols = 50
-cell_size = 10
-display_width = (num_cols+2)*cell_size				# Width of display in pixels
-display_height = (num_rows+2)*cell_size	+30			# Height of display in pixels
-
-# Simulation parameters
+from Simulation import Simulation, read_terrain, read_landmarks, default_parameters, default_map_size
+from FlowField import FlowField
+from Diffusion import diffuse_fields
+from StatePublisher import StatePublisher
+from Replay import ReplayRecorder
+from Landmarks import LandmarkRegistry
+from Heatmaps import layers, layer_colours, overlay_heatmap
+from FrameExport import FrameWriter
+from Render import render_frame, load_sprite, save_png
+from SweepStore import open_store, run_key, get_result, save_result
+
+cell_size = 10 										# Size of a cell in pixels, in saved images and frames
+map_rows,map_cols = default_map_size 				# Rows and columns of the map read from the terrain and landmark files (the first of a bigger file)
+
+# Simulation parameters (see Simulation.py)
 framerate = 1000 									# Number of timesteps run per second
 mating_cooldown_time = 24
 jump_height = 4
 sleep_hours = 8
 eating_threshold = 25
 drinking_threshold = 25
-
-# Defining the Cat class
-class Cat():
-	def __init__(self,index,pos,age,temper,sex):
-		self.alive = True
-		self.index = index
-		self.pos = pos
-		self.age = age
-		self.temper = temper   									# Can be friendly, aggressive, or meek
-		self.sex = sex
-		self.colour = None
-		self.height = terrain_array[self.pos[0],self.pos[1]]
-		self.attack_power = self.age*4    						# Older cats  deal more damage
-		self.sleep_chance = random.uniform(0.01,0.05)
-		self.engaged = False									# Whether the cat is currently interacting with something
-		self.consuming = False									# Whether the cat is currently eating or drinking
-		self.fighting = False									# Whether the cat is currently fighting another cat
-		self.fleeing = False									# Whether the cat is currently running away from another cat
-		self.sleeping = False									# Whether the cat is currently sleeping
-		self.mating = False										# Whether the cat is currently mating with another cat
-		self.mating_cooldown = 0  								# A timer that dictates how long the cat has to wait before it can mate again
-		self.sleep_counter = 0 									# Keeps track of how long the cat has been sleeping for
-		self.health = 100
-		self.thirst = 0
-		self.hunger = 0
-		self.dehydrated = False									# True when the cat's thirst is maxed out (at 100)
-		self.starving = False									# True when the cat's hunger is maxed put (at 100)
-		self.total_food_eaten = 0
-		self.total_water_drunk = 0	
-
-	def __str__(self):
-		return "Cat "+str(self.index)
-
-	# Method for displaying the cat's attributes
-	def display_self(self):
-		if self.alive:
-			status = 'ALIVE'
-		else:
-			status = 'DEAD'
-		if self.temper == 'aggressive':
-			tabs = "\t"
-		else:
-			tabs = "\t\t"
-		spaces = 8-len(status)
-		health = str(int(self.health))+"/100"
-		return "Cat "+str(self.index)+"\t|  "+status+spaces*" "+"|  Health: "+health+"\t|  Age: "+str(self.age)+"  |  Temper: "+self.temper+tabs+"|  Sex: "+self.sex+"\t|  Current position: "+str(self.pos)
-
-	# Method that assigns a colour to the cat based on its attributes	
-	def set_colour(self):
-		if self.sex=='male':
-			self.colour = cyan
-		else:
-			self.colour = pink
-		if self.fighting:
-			self.colour = red
-		elif self.fleeing:
-			self.colour = yellow
-		elif self.sleeping:
-			self.colour = grey
-
-	# Method that increases hunger and thirst each iteration, and hurts the cat if hunger and thirst get too high
-	def hunger_and_thirst(self):
-		self.starving = False
-		self.dehydrated = False
-	
-		if self.hunger >= 100:
-			self.starving = True										
-		else:
-			self.hunger+=0.5					# Cats get more hungry after each timestep		
-		if self.thirst >= 100:
-			self.dehydrated = True
-		else:
-			self.thirst+=1 						# Cats get thirsty faster than hungry
-		if self.starving or self.dehydrated:			
-			self.health-=1 						# Cat loses health over time if starving 
-	
-
-	def eat(self,foodpos,food_array):
-		if self.hunger>=eating_threshold:						# Cat eats if it's hungrier than a certain threshold
-			self.engaged = True
-			self.consuming = True
-			food_array[foodpos[0],foodpos[1]]-=0.5
-			self.hunger-=15
-			self.total_food_eaten+=0.5
-
-	def drink(self,waterpos,water_array):
-		if self.thirst>=drinking_threshold:						# Cat drinks if it's thirstier than a certain threshold
-			self.engaged = True
-			self.consuming = True
-			water_array[waterpos[0],waterpos[1]]-=0.5
-			self.thirst-=15
-			self.total_water_drunk+=0.5		
-
-	# Method for handling interactions with cats of the same sex
-	def interact(self,neighbours,terrain_array,food_array,water_array,neighbourhood,alive_cats):
-		has_an_aggressive_neighbour = False
-		for neighbour in neighbours:
-			attack_power = self.attack_power
-
-			if self.sex==neighbour.sex:
-
-				# Aggressive cats attack all other cats (of the same sex) unless sleeping
-				if self.temper == "aggressive":
-					if self.height>neighbour.height:
-						attack_power *= 1.25 												# Cats on higher ground deal more damage
-					if (not self.sleeping) or neighbour.temper=="aggressive":				
-						self.engaged = True
-						self.fighting = True
-						self.sleeping = False												
-						neighbour.health -= attack_power
-					attack_power = self.attack_power	
-				
-				# Friendly cats only attak aggressive cats (of the same sex)
-				elif self.temper == "friendly":
-					if self.height>neighbour.height:
-						attack_power *= 1.25
-					if (neighbour.temper == "aggressive") and (not neighbour.sleeping):	
-						self.sleeping = False
-						self.engaged = True
-						self.fighting = True
-						neighbour.health -= attack_power
-					attack_power = self.attack_power
-
-				# Meek cats run away from all types of cats (of the same sex) unless sleeping
-				else:
-					if neighbour.temper == "aggressive":
-						has_an_aggressive_neighbour = True
-					if (not self.sleeping) or has_an_aggressive_neighbour:
-						self.sleeping = False
-						self.engaged = True
-						self.fleeing = True
-						valid_moves = get_valid_moves(self,terrain_array,food_array,water_array,cat_scent_array,neighbourhood,alive_cats)
-						self.pos = random.choice(valid_moves)
-						for move in valid_moves:
-							new_neighbours = check_surroundings(self,move,alive_cats)[0]
-							if len(new_neighbours)==0:
-								self.pos = move
-								break
-
-	# Method for handling behaviour while sleeping	
-	def sleep(self):
-		if self.sleeping:
-			if self.sleep_counter > sleep_hours:			# Cats sleep for 'sleep_hours' number of hours at a stretch if uninterrupted
-				self.sleep_counter = 0
-				self.sleeping = False
-			else:
-				if self.health <= 95:
-					self.health += 5 						# Cats gain health while sleeping
-				self.sleep_counter+=1
-		else:
-			self.sleep_counter = 0
-
-# Function that reads in terrain data from a file and returns it as an array
-def read_terrain(terrain_filename):
-	terrain_array = np.zeros((num_rows+2,num_cols+2)) 
-	with open(terrain_filename,'r') as terrain_file:
-		terrain_list = list(csv.reader(terrain_file))
-	for r in range(num_rows):
-		for c in range(num_cols):
-			try:														# Exception handling for data files of mismatching dimensions	
-				terrain_array[r+1,c+1] = int(terrain_list[r][c])        
-			except IndexError:
-				pass
-	return terrain_array
-
-# Function that reads in food and water data from a file and returns them as arrays
-def read_landmarks(landmark_filename):
-	food_array = np.zeros((num_rows+2,num_cols+2))
-	water_array = np.zeros((num_rows+2,num_cols+2)) 
-	with open(landmark_filename,'r') as landmark_file:
-		landmark_list = list(csv.reader(landmark_file))
-			
-	for r in range(len(landmark_list)):
-		for c in range(len(landmark_list[0])):
-			value = landmark_list[r][c]
-			if value != "":
-				try:													# Exception handling for data files of mismatching dimensions	
-					if value == "F":
-						food_array[r+1,c+1] = 1					
-					else:
-						water_array[r+1,c+1] = 1
-				except IndexError:
- 					pass
-	return food_array, water_array
-
-# Function that returns a list of valid cells that a cat can move to on the next iteration
-def get_valid_moves(cat,terrain_array,food_array,water_array,cat_scent_array,neighbourhood,alive_cats):
-	possible_moves = []
-	r,c = cat.pos[0],cat.pos[1]
-	if neighbourhood=="M":																								# Moore neighbourhood
-		possible_moves.extend([[r-1,c-1],[r-1,c],[r-1,c+1],[r,c-1],[r,c],[r,c+1],[r+1,c-1],[r+1,c],[r+1,c+1]])
-	else:																												# Von Neumann neighbourhood
-		possible_moves.extend([[r-1,c],[r,c-1],[r,c],[r,c+1],[r+1,c]])
-
-	valid_moves = [p for p in possible_moves]
-	for cell in possible_moves:
-		try:
-			if cell[0]<1 or cell[0]>num_rows or cell[1]<1 or cell[1]>num_cols:									# Cats can't leave borders
-				valid_moves.remove(cell)
-			elif abs(terrain_array[cell[0],cell[1]] - terrain_array[cat.pos[0],cat.pos[1]]) > jump_height:		# Cats can't move across steep slopes
-				valid_moves.remove(cell)
-			elif (food_array[cell[0],cell[1]] > 0) or (water_array[cell[0],cell[1]] > 0):						# Cats can't walk on food or water
-				valid_moves.remove(cell)
-			else:
-				for other_cat in alive_cats:
-					if other_cat != cat and other_cat.pos == cell:												# Cats can't walk on other cats
-						valid_moves.remove(cell)		
-		except ValueError:
-			pass
-	avoided_scents = [v for v in valid_moves]
-	for cell in valid_moves:
-		if cat_scent_array[cell[0],cell[1]][1]==cat.sex and cat_scent_array[cell[0],cell[1]][0]!=cat:			# Cats avoid scents of the same sex 
-			probability = cat_scent_array[cell[0],cell[1]][2]
-			if random.random()<probability:
-				avoided_scents.remove(cell)
-
-	return avoided_scents
-
-# Function that returns the cats, food cells and water cells within a cat's neighbourhood 
-def check_surroundings(cat,pos,alive_cats):
-	surrounding_cells = []
-	r,c = pos[0],pos[1]
-	if neighbourhood=="M":																							# Moore neighbourhood
-		surrounding_cells.extend([[r-1,c-1],[r-1,c],[r-1,c+1],[r,c-1],[r,c+1],[r+1,c-1],[r+1,c],[r+1,c+1]])
-	else:																											# Von Neumann neighbourhood
-		surrounding_cells.extend([[r-1,c],[r,c-1],[r,c+1],[r+1,c]])
-	
-	valid_surrounding_cells = [cell for cell in surrounding_cells]	
-	for cell in surrounding_cells:
-		if abs(terrain_array[cell[0],cell[1]] - terrain_array[r,c]) > jump_height:			# Cats don't interact with cells that are across a steep slope
-			valid_surrounding_cells.remove(cell)	
-
-	neighbours = [neighbour for neighbour in alive_cats if (neighbour!=cat) and (neighbour.pos in valid_surrounding_cells)]
-	
-	neighbouring_water = []
-	neighbouring_food = []
-	for cell in valid_surrounding_cells:
-		if water_array[cell[0],cell[1]] > 0:
-			neighbouring_water.append(cell)
-		elif food_array[cell[0],cell[1]] > 0:
-			neighbouring_food.append(cell)
-	
-	return neighbours, neighbouring_food, neighbouring_water
-
-# Function that decides whether to eat or drink given landmarks in its neighbourhood
-def eat_or_drink(cat,neighbouring_food,neighbouring_water,food_array,water_array):
-	if len(neighbouring_water)==0:													# If there's only food in its neighbourhood
-		cat.eat(random.choice(neighbouring_food),food_array)
-	elif len(neighbouring_food)==0:													# If there's only water in its neighbourhood
-		cat.drink(random.choice(neighbouring_water),water_array)
-	else:																			# If there's both food and water in its neighbourhood
-		if cat.hunger>cat.thirst:													# Chooses based on whether its more hungry or more thirsty
-			cat.eat(random.choice(neighbouring_food),food_array)
-		else:
-			cat.drink(random.choice(neighbouring_water),water_array)
-
-# Reproduction between two cats
-def reproduce(birth_index,cat1,cat2,cell):
-	index = len(alive_cats)+len(dead_cats)+birth_index
-	cat1.engaged = True
-	cat1.mating = True
-	cat1.mating_cooldown = mating_cooldown_time														# Cats have a 24-hour cooldown time before they can reproduce again
-	cat2.engaged = True
-	cat2.mating = True
-	cat2.mating_cooldown = mating_cooldown_time
-	temper = random.choice(["aggressive","friendly","meek"])
-	sex = random.choice(['male','female'])
-	baby = Cat(index,cell,1,temper,sex)
-	heart_pos = cell_size*(cat1.pos[1]+cat2.pos[1])/2 , cell_size*(cat1.pos[0]-2)
-	hearts.append(heart_pos)														# Creating a heart image to be drawn to the screen
-	event = "Day "+str(day)+", Hour "+str(hour_of_day)+": Cat "+str(cat1.index)+" and Cat "+str(cat2.index)+" gave birth to Cat "+str(baby.index)+"!\n"
-	event_log.append(event)
-	return baby
-
-# Function that maps height values (0 to 10) to RGB (dark brown to light brown)
-def assign_terrain_colour(height):
-	R = 5*height + 40
-	G = -2*height + 90
-	B = 0
-	return((R,G,B))
-
-# Function that assigns colour and transparency to a cat's scent
-def cat_scent_colour(sex,value):
-	alpha = value*255
-	if sex=='female':
-		colour = pink
-	else:
-		colour = cyan
-	scent_image = pygame.Surface((cell_size,cell_size))
-	scent_image.set_alpha(alpha)
-	pygame.draw.rect(scent_image,colour,scent_image.get_rect())
-	return scent_image,colour
-
-# Function to assign colour and transparency for food and water scent
-def landmark_scent_colour(type_of_landmark,value):
-	if type_of_landmark=="food":
-		colour = green
-	else:
-		colour = blue
-	alpha = value*255
-	scent_image = pygame.Surface((cell_size,cell_size))
-	scent_image.set_alpha(alpha)
-	pygame.draw.rect(scent_image,colour,scent_image.get_rect())
-	return scent_image
-
-# Function that makes cats leave a scent (male or female) that evaporates over time
-def update_cat_scents(alive_cats,cat_scent_array):
-	temp_scents = cat_scent_array.copy()
-	for cat in alive_cats:
-		temp_scents[cat.pos[0],cat.pos[1]] = [cat,cat.sex,1]		# Each element of this array holds the cat that created the scent, the cat's sex, and the intensity of the scent at that cell	
-	for r in range(num_rows):
-		for c in range(num_cols):
-			temp_scents[r+1,c+1][2]*=0.9
-			if temp_scents[r+1,c+1][2]<0.01:
-				temp_scents[r+1,c+1] = [None,None,0]
-	return temp_scents				
-
-# Function that diffuses the scent of food and water into the environment; The diffusion model is sourced from heat.py from COMP1005 Practical 5
-# Maxville, Valerie. 2021. “heat.py” Practical 5, COMP1005 Fundamentals of Programming, Semester 2, 2021
-def diffuse(array,neighbourhood):
-	copy = array.copy()
-	for r in range(1,len(array)-1):
-		for c in range(1,len(array[0])-1):
-			value = array[r,c]
-			change = 0
-			if neighbourhood == 'M':
-				new = (array[r-1,c-1]*0.1 + array[r-1,c]*0.1+ array[r-1,c+1]*0.1 + array[r,c-1]*0.1+ array[r,c]*0.2 + array[r,c+1]*0.1+ array[r+1,c-1]*0.1 + array[r+1,c]*0.1+ array[r+1,c+1]*0.1)
-			else:
-				new = (array[r-1,c]*0.15 + array[r,c-1]*0.15 + array[r,c]*0.4 + array[r,c+1]*0.15 + array[r+1,c]*0.15)
-			if new<0.01:
-				copy[r,c]=0
-			else:
-				copy[r,c]=new
-	return copy
-
-# Function to increment the current hour and day
-def increment_time(hour, day, hour_of_day):
-	hour+=1
-	day = hour//24
-	hour_of_day = hour%24
-	return hour,day,hour_of_day
-
-# Function that kills cats if their health is below 0
-def kill_cats(alive_cats,dead_cats):
-	for cat in alive_cats:
-		if cat.health<=0:
-			cat.health = 0
-			cat.alive = False
-			dead_cats.append(cat)
-			if cat.fighting:
-				event = "Day "+str(day)+", Hour "+str(hour_of_day)+": Cat "+str(cat.index)+" has been killed.\n"
-			elif cat.dehydrated:
-				event = "Day "+str(day)+", Hour "+str(hour_of_day)+": Cat "+str(cat.index)+" has died of thirst.\n"
-			else:
-				event = "Day "+str(day)+", Hour "+str(hour_of_day)+": Cat "+str(cat.index)+" has died of hunger.\n"
-			event_log.append(event)
-	alive_cats = [cat for cat in alive_cats if cat.alive]
-	return alive_cats, dead_cats
-
-# Function that creates cat objects
-def create_cats(n):
-	alive_cats = []
-	for i in range(n):
-		cell_is_occupied = True
-		while cell_is_occupied:
-			cell_is_occupied = False
-			pos = [random.randint(1,num_rows), random.randint(1,num_cols)]
-			for cat in alive_cats:
-				if cat.pos == pos:
-					cell_is_occupied = True
-			if (water_array[pos[0],pos[1]] > 0) or (food_array[pos[0],pos[1]] > 0):
-				cell_is_occupied = True
-		age = random.randint(1,5)
-		temper = random.choice(["aggressive","friendly","meek"])
-		sex = random.choice(['male','female'])
-		cat = Cat(i+1, pos, age, temper, sex)
-		alive_cats.append(cat)
-	return alive_cats
-
-# Function that draws and displays the current state of the environment (terrain, landmarks, and cats)
-def draw_screen(terrain_array,food_array, water_array, alive_cats, dead_cats, show_scents, heart_image, hearts):
-	gameDisplay.fill(black)	
-	for row in range(num_rows):
-		for col in range(num_cols):
-			r = row+1
-			c = col+1
-			terrain_colour = assign_terrain_colour(terrain_array[r,c])	
-			pygame.draw.rect(gameDisplay, terrain_colour,[c*cell_size,r*cell_size,cell_size,cell_size])					
-			pygame.draw.circle(gameDisplay,green,(int((c+0.5)*cell_size),int((r+0.5)*cell_size)),int(food_array[r,c]*cell_size/2))	# Food are green circles
-			pygame.draw.circle(gameDisplay,blue,(int((c+0.5)*cell_size),int((r+0.5)*cell_size)),int(water_array[r,c]*cell_size/2))	# Water are blue circles
-			if show_scents:
-				scent_image,scentcolour = cat_scent_colour(cat_scent_array[r,c][1],cat_scent_array[r,c][2])
-				if cat_scent_array[r,c][2]>0:
-					gameDisplay.blit(scent_image, (c*cell_size,r*cell_size))					# Drawing cat scents to the screen
-			if show_food_scent:
-				food_scent_image = landmark_scent_colour("food",food_scent_array[r,c])
-				if food_scent_array[r,c]>0:
-					gameDisplay.blit(food_scent_image, (c*cell_size,r*cell_size))				# Drawing food scents to the screen
-			if show_water_scent:
-				water_scent_image = landmark_scent_colour("water",water_scent_array[r,c])
-				if water_scent_array[r,c]>0:
-					gameDisplay.blit(water_scent_image, (c*cell_size,r*cell_size))				# Drawing water scents to the screen
-
-	for cat in dead_cats:
-		r = cat.pos[0]
-		c = cat.pos[1]
-		pygame.draw.line(gameDisplay , black, (c*cell_size,r*cell_size), ((c+1)*cell_size,(r+1)*cell_size))		#
-		pygame.draw.line(gameDisplay , black, ((c+1)*cell_size,r*cell_size), (c*cell_size,(r+1)*cell_size))		# Dead cats are drawn as X's
-	for cat in alive_cats:
-		r = cat.pos[0]
-		c = cat.pos[1]
-		pygame.draw.circle(gameDisplay , cat.colour, (int((c+0.5)*cell_size),int((r+0.5)*cell_size)),int(cell_size*(cat.age/16 + 1/4)))					# Live cats are coloured circles
-		pygame.draw.circle(gameDisplay , black, (int((c+0.5)*cell_size),int((r+0.5)*cell_size)), int(cell_size*(cat.age/16 + 1/4)), int(cell_size/10))  # With a black outline
-	for heart in hearts:
-		gameDisplay.blit(heart_image,(heart[0],heart[1]))		# Draws a heart on screen if cats reproduce
-
-# Function that displays the current timestep (in days and hours) on the screen	
-def display_time(hour,day,hour_of_day,fontface,gameDisplay):
+navigation = "scent"								# "scent" to follow the diffused food and water scents, "flow" to follow distance fields (no diffusion)
+diffusion_threads = 1 								# Number of threads that diffuse the food and water scents (worth it on very large maps)
+parallel_workers = 0 								# Number of processes that work out the movement phase in bands of rows (0 for the sequential engine)
+spawning = "sequential" 							# "sequential" to place the initial cats one at a time, "bulk" to place them all at once (for large populations)
+
+# Shared memory publishing, for viewing the simulation from other processes (see StatePublisher.py)
+publish_name = ""									# Name of the shared memory the state is published to ("" to disable)
+publish_every = 1 									# Publishes the state every 'publish_every' timesteps
+publish_max_cats = 10000							# Most cats that fit in the published table of cat attributes
+
+# Replay log, for stepping through the simulation afterwards (see Replay.py)
+replay_file = ""									# File the replay is saved to ("" to disable)
+replay_keyframe_every = 100 						# Saves every cat and landmark every 'replay_keyframe_every' timesteps, and only changes in between
+
+# Export parameters (can be changed with optional name=value command line arguments)
+frame_interval = 0 									# Saves a frame every 'frame_interval' timesteps (0 for no frames)
+frame_format = "png"								# "png" for an image sequence, "npz" for a compressed archive of raw frames
+output_dir = ""										# Directory the results of the run are saved to ("" for Simulation_M<m>_S<s>)
+
+# Heatmaps of what happened where over the run
+heatmap_file = ""									# File the heatmaps are saved to ("" to disable)
+heatmap_images = False 								# Also saves an image of each heatmap layer drawn over the terrain
+
+# Stopping rules (can be changed with optional name=value command line arguments)
+stop_on_extinction = False							# Stops the simulation once every cat has died (off by default, so runs go on to max_hours as they always have)
+stable_hours = 0 									# Stops the simulation after this many hours without births or deaths (0 to disable)
+stats_window = 0 									# Stops the simulation if the statistics change less than 'stats_epsilon' over this many hours (0 to disable)
+stats_epsilon = 0.01
+
+# Results store (can be changed with optional name=value command line arguments)
+store = ""											# SQLite file that results are saved to; runs already in it are skipped ("" to disable)
+seed = -1 											# Seed for the random number generators (negative for an unseeded run)
+
+# Replica worlds (can be changed with optional name=value command line arguments)
+replicas = 1 										# Number of independent worlds run in one process (seeds seed, seed+1, ...), saved to <directory>_R<n>
+
+optional_parameters = ["map_rows","map_cols","jump_height","eating_threshold","drinking_threshold","navigation","diffusion_threads","parallel_workers","spawning","publish_name","publish_every","publish_max_cats","replay_file","replay_keyframe_every","heatmap_file","heatmap_images","frame_interval","frame_format","output_dir","stop_on_extinction","stable_hours","stats_window","stats_epsilon","store","seed","replicas"]
+
+# Function that returns the current timestep (in days and hours) as two lines of text
+def time_text(hour,day,hour_of_day):
 	line1 = "Day "+str(day)+", Hour "+str(hour_of_day)
-	line1display = fontface.render(line1,True,white)
 	line2 = "Total hours: "+str(hour)
-	line2display = fontface.render(line2,True,white)
-	gameDisplay.blit(line1display,(10,(num_rows+1)*cell_size))
-	gameDisplay.blit(line2display,(10,(num_rows+2)*cell_size+5))	
-
-# Function that calculates and returns various statistics for a list of cat objects
-def get_stats(cats):
-	agr = 0 							# Number of aggressive cats
-	frnd = 0 							# Number of friendly cats
-	meek = 0 							# Number of meek cats
-	total_age = 0                   	# Total age of all cats
-	total_health = 0 					# Total health of all cats
-	for cat in cats:
-		if cat.temper == "aggressive":
-			agr+=1
-		elif cat.temper == "friendly":
-			frnd+=1
-		elif cat.temper == "meek":
-			meek+=1
-		total_age += cat.age
-		total_health += cat.health
-	if len(cats)>0:
-		avg_age = round(total_age/len(cats) , 2)		# Average age of cats	
-		avg_health = round(total_health/len(cats) , 2) 	# Average health of cats
-	else:
-		avg_age = 0
-		avg_health = 0	
-	return agr,frnd,meek,avg_age,avg_health
-
-# Function to print statistics at the end of the simulation
-def show_stats(init_cats,alive_cats,dead_cats,births):
-	init_agr,init_frnd,init_meek,init_avg_age,init_avg_health = get_stats(init_cats)
-	curr_agr,curr_frnd,curr_meek,curr_avg_age,curr_avg_health = get_stats(alive_cats)
-	total_food_eaten = 0
-	total_water_drunk = 0
-	for cat in alive_cats+dead_cats:
-		total_food_eaten+=cat.total_food_eaten
-		total_water_drunk+=cat.total_water_drunk
-	avg_food_eaten = round(total_food_eaten/(len(alive_cats)+len(dead_cats)) , 2)
-	avg_water_drunk = round(total_water_drunk/(len(alive_cats)+len(dead_cats)) , 2)
-
-	stats = """\n\n#### STATISTICS ####\n\n
-Initial population: """+str(init_pop)+"""
-Initial number of aggressive cats: """+str(init_agr)+"""
-Initial number of friendly cats: """+str(init_frnd)+"""
-Initial number of meek cats: """+str(init_meek)+"""
-Initial average age of cats: """+str(init_avg_age)+"""
-Initial average health of cats: 100
-
-Births: """+str(births)+"""
-Deaths: """+str(len(dead_cats))+"""
-
-Current population: """+str(len(alive_cats))+"""
-Current number of aggressive cats: """+str(curr_agr)+"""
-Current number of friendly cats: """+str(curr_frnd)+"""
-Current number of meek cats: """+str(curr_meek)+"""
-Current average age of cats: """+str(curr_avg_age)+"""
-Current average health of cats: """+str(curr_avg_health)+"""
-
-Total units of food eaten: """+str(total_food_eaten)+"""
-Average units of food eaten by a single cat: """+str(avg_food_eaten)+"""
-Total units of water drunk: """+str(total_water_drunk)+"""
-Average units of water drunk by a single cat: """+str(avg_water_drunk)+"\n\n"
-	
-	return stats
-
-# Function that displays each cat's status 
-def show_cats(alive_cats,dead_cats):
-	for cat in alive_cats:
-		print(cat.display_self())
-	for cat in dead_cats:
-		print(cat.display_self())
-
-# Function to ask user for a choice of two inputs
-def ask_choice(prompt,option1,option2,error_message):
-	invalid = True
-	while invalid:
-		invalid = False
-		ans = input(prompt).upper() 				
-		if ans!=option1 and ans!=option2:
-			print(error_message)
-			invalid = True
-	return ans
-
-# Function to ask user for an integer input
-def ask_number(prompt,error_message):
-	invalid = True
-	while invalid:
-		invalid = False	
-		try:	
-			ans = int(input(prompt))	
-		except ValueError:
-			print(error_message)
-			invalid = True
-	return ans
-
-# Main sequence of events; returns the number of births that occurred during the timestep
-def main_loop(alive_cats,terrain_array,food_array,water_array,cat_scent_array,neighbourhood,hour_of_day):
-	births = []
-
-	# Fighting/fleeing and food/water interaction rules
-	for cat in alive_cats:
-		cat.height = terrain_array[cat.pos[0],cat.pos[1]]
-		cat.engaged = False
-		cat.consuming = False
-		cat.fighting = False
-		cat.fleeing = False	
-		cat.mating = False
-		if cat.mating_cooldown>0:
-			cat.mating_cooldown-=1 			# Decrementing the mating cooldown timer every timestep
-		neighbours,neighbouring_food,neighbouring_water = check_surroundings(cat,cat.pos,alive_cats)
-		if len(neighbours)>0:
-			cat.interact(neighbours,terrain_array,food_array,water_array,neighbourhood,alive_cats)	
-		if not (cat.fighting or cat.fleeing):
-			if (not cat.sleeping) and (len(neighbouring_food)>0 or len(neighbouring_water)>0):		
-				eat_or_drink(cat,neighbouring_food,neighbouring_water,food_array,water_array)
-
-	# Reproduction rules		
-	for cat in alive_cats:
-		if (not cat.engaged) and (not cat.mating) and (not cat.sleeping):
-			neighbours = check_surroundings(cat,cat.pos,alive_cats)[0]
-			for neighbour in neighbours:
-				if (cat.sex!=neighbour.sex) and (not neighbour.engaged) and (not neighbour.mating) and (not neighbour.sleeping):
-					if (cat.hunger<75) and (cat.thirst<75) and (neighbour.hunger<75) and (neighbour.thirst<75):
-						if (cat.mating_cooldown==0) and (neighbour.mating_cooldown==0):
-							potential_spots = get_valid_moves(cat,terrain_array,food_array,water_array,cat_scent_array,neighbourhood,alive_cats)
-							chosen_spot = random.choice(potential_spots)   							# Choosing a random valid cell for the baby to spawn in
-							baby = reproduce(len(births)+1,cat,neighbour,chosen_spot)
-							births.append(baby)
-
-	# Sleeping rules						
-	for cat in alive_cats:
-		initial_sleep_chance = cat.sleep_chance
-		if hour_of_day >= 21 or hour_of_day < 5:					# More likely to sleep at night
-			cat.sleep_chance*=5
-		multiplier = -0.02*cat.health + 3 							# The lower the cat's health, the more likely it is to go to sleep
-		cat.sleep_chance*=multiplier
-		if random.random()<cat.sleep_chance and (cat.hunger < 75 and cat.thirst < 75) and (not cat.engaged):		# Cats only sleep if they are not hungry or thirsty
-			cat.sleeping = True
-		cat.sleep_chance = initial_sleep_chance
-
-	# Movement rules	
-	for cat in alive_cats:
-		cat.sleep()
-		if (not cat.engaged) and (not cat.sleeping):
-			valid_moves = get_valid_moves(cat,terrain_array,food_array,water_array,cat_scent_array,neighbourhood,alive_cats)
-			choices = [v for v in valid_moves]			# List of move choices the cat will randomly choose from 						
-			if cat.hunger<eating_threshold and cat.thirst<drinking_threshold and cat.mating_cooldown==0:
-				# Making the cat follow the scent of the opposite sex:
-				neighbour_scent_value = 0
-				for move in valid_moves:
-					scent = cat_scent_array[move[0],move[1]]
-					# List of move choices becomes the cells with highest scent of the opposite sex:		
-					if scent[1]!=None and scent[1]!=cat.sex:	
-						if scent[2]>neighbour_scent_value:
-							neighbour_scent_value = scent[2]
-							choices = [move]
-						elif scent[2]==neighbour_scent_value:
-							choices.append(move)
-				
-			else:
-				# Making the cat follow food and water scents:
-				food_scents = []							# List of cells with food scents in the neighbourhood
-				water_scents = []							# List of cells with water scents in the neighbourhood
-				temp_choices = []
-				for move in valid_moves:
-					if food_scent_array[move[0],move[1]]>0:
-						food_scents.append(food_scent_array[move[0],move[1]])
-					if water_scent_array[move[0],move[1]]>0:
-						water_scents.append(water_scent_array[move[0],move[1]])
-				if (cat.hunger>eating_threshold) and (cat.hunger>cat.thirst or len(water_scents)==0):
-					for move in valid_moves:
-						probability = food_scent_array[move[0],move[1]]
-						if random.random()<=probability:
-							temp_choices.append(move)
-				elif (cat.thirst>drinking_threshold) and (cat.thirst>=cat.hunger or len(food_scents)==0):
-					for move in valid_moves:
-						probability = water_scent_array[move[0],move[1]]
-						if random.random()<=probability:
-							temp_choices.append(move)
-				if len(temp_choices)>0:						# If there are no food or water scents in the neighbourhood, move choices list is unchanged
-					choices = [c for c in temp_choices]
-			cat.pos = random.choice(choices)
-	
-	alive_cats.extend(births)				# Adding new births to the cat population		
-
-	for cat in alive_cats:
-		cat.set_colour()					# Setting the colour for each cat
-		cat.hunger_and_thirst()				# Updating each cat's hunger and thirst levels
-	
-	return len(births)						# Returning number of births that occurred 
-
-if __name__ == "__main__":
+	return line1,line2
+
+# Function that overrides parameters using optional name=value command line arguments
+def read_options(args):
+	for arg in args:
+		name,value = arg.split("=",1)
+		if name not in optional_parameters:
+			raise ValueError("Unknown parameter: "+name)
+		if type(globals()[name]) == bool:
+			globals()[name] = value.upper() in ["Y","YES","TRUE","1"]
+		else:
+			globals()[name] = type(globals()[name])(value)		# Converting the value to the type of the default
+
+# Function that returns every parameter that affects the outcome of a run
+def run_parameters():
+	parameters = {"neighbourhood":neighbourhood, "max_hours":max_hours, "init_pop":init_pop, "mating_cooldown_time":mating_cooldown_time,
+		"sleep_hours":sleep_hours, "jump_height":jump_height, "eating_threshold":eating_threshold, "drinking_threshold":drinking_threshold,
+		"navigation":navigation, "stop_on_extinction":stop_on_extinction, "stable_hours":stable_hours, "stats_window":stats_window, "stats_epsilon":stats_epsilon}
+	if parallel_workers>0:
+		parameters["update"] = "parallel"				# Cats move from a snapshot, so results differ from (but don't depend on the number of) workers
+	if spawning != "sequential":
+		parameters["spawning"] = spawning 				# Only added when it isn't the default, so runs already in a store keep their keys
+	if (map_rows,map_cols) != default_map_size:
+		parameters["map_size"] = [map_rows,map_cols] 	# Same, as the map read from the files depends on it
+	return parameters
+
+# Inputs loaded before a pool of runs is forked (see SweepPool.py), so each run starts from copies of them:
+# grids by (terrain file, landmark file), landmark registries and flow fields by (terrain file, landmark file, neighbourhood, jump height)
+preloaded = {"inputs":{}, "landmarks":{}}
+
+# Function that loads the terrain and landmark grids for a pool of runs, and builds their landmark registries and flow fields
+def preload(terrain_filename,landmark_filename,settings):
+	terrain_array = read_terrain(terrain_filename,(map_rows,map_cols))
+	food_array,water_array = read_landmarks(landmark_filename,(map_rows,map_cols))
+	preloaded["inputs"][(terrain_filename,landmark_filename)] = (terrain_array,food_array,water_array)
+	for neighbourhood,jump_height in settings:
+		registry = LandmarkRegistry(food_array,water_array,terrain_array,neighbourhood,jump_height)
+		field = FlowField(terrain_array,food_array,water_array,neighbourhood,jump_height)
+		preloaded["landmarks"][(terrain_filename,landmark_filename,neighbourhood,jump_height)] = (registry,field)
+
+# Function that returns the terrain and landmark grids, from the files unless they were preloaded
+def load_inputs(terrain_filename,landmark_filename):
+	if (terrain_filename,landmark_filename) in preloaded["inputs"]:
+		terrain_array,food_array,water_array = preloaded["inputs"][(terrain_filename,landmark_filename)]
+		return terrain_array,(food_array.copy(),water_array.copy()) 		# The terrain never changes, so it is shared
+	return read_terrain(terrain_filename,(map_rows,map_cols)),read_landmarks(landmark_filename,(map_rows,map_cols))
+
+
+# Function that returns the parameters the simulations of a run are created with (see Simulation.py)
+def simulation_parameters(run_seed):
+	parameters = {name:globals()[name] for name in default_parameters if name not in ["seed","heatmap"]}
+	parameters["seed"] = run_seed
+	parameters["heatmap"] = heatmap_file != "" or heatmap_images
+	return parameters
+
+# Function that saves the stored results of a skipped run to its directory, so every run of a sweep still has one
+def save_stored_result(new_dir,stored):
+	os.makedirs(new_dir,exist_ok=True)
+	with open(os.path.join(new_dir,"stored_result.txt"),"w") as out:
+		for name,value in stored.items():
+			out.write(name+": "+str(value)+"\n")
+
+# Function that runs the simulation (or several replicas of it in one process) with the command line arguments of SweepBase.py
+def run_sweep(args):
+	# The settings of the run are module globals, read by run_parameters() and simulation_parameters(); each world is a Simulation
+	global neighbourhood, max_hours, init_pop, mating_cooldown_time, sleep_hours
 
 	try:
-		terrain_array = read_terrain(sys.argv[1])				# Command line argument for terrain file
-		food_array, water_array = read_landmarks(sys.argv[2])	# Command line argument for landmark file
+		terrain_array,landmarks = load_inputs(args[0],args[1])		# Command line arguments for terrain and landmark files
 	except:
 		print("\nError: Please enter valid terrain csv and landmark csv as command line arguments.")
 	else:
-		neighbourhood = sys.argv[3].upper() 			# Moore or Von Neumann
-		max_hours = int(sys.argv[4]) 					# Number of iterations the sim should run for
-		init_pop = int(sys.argv[5]) 					# Initial population of cat
-		mating_cooldown_time = int(sys.argv[6])			# User can provide a different mating cooldown time as a cmd line argument (optional)					
-		sleep_hours = int(sys.argv[7])					# User can provide a different sleep length as a cmd line argument (optional)
-
-		food_scent_array = np.zeros((num_rows+2,num_cols+2))
-		water_scent_array = np.zeros((num_rows+2,num_cols+2))
-		cat_scent_array = np.empty((num_rows+2,num_cols+2),dtype=object)		
-
-		alive_cats = create_cats(init_pop)					# Creating initial list of cat objects
-		init_cats = alive_cats.copy()						# Storing initial list of cat objects				
-		dead_cats = []										# List of cats that have died
-		births = 0 											# Total number of births
-		for r in range(num_rows+2):
-			for c in range(num_cols+2):
-				cat_scent_array[r,c] = [None,None,0]
-				food_scent_array[r,c] = food_array[r,c]
-				water_scent_array[r,c] = water_array[r,c]
-		event_log = ["### LOG ###\n\n"]						# Log of events that occur during the simulation
+		neighbourhood = args[2].upper() 			# Moore or Von Neumann
+		max_hours = int(args[3]) 					# Number of iterations the sim should run for
+		init_pop = int(args[4]) 					# Initial population of cat
+		mating_cooldown_time = int(args[5])			# User can provide a different mating cooldown time as a cmd line argument (optional)					
+		sleep_hours = int(args[6])					# User can provide a different sleep length as a cmd line argument (optional)
+		try:
+			read_options(args[7:])
+		except ValueError as e:
+			print("\nError: Optional arguments must be given as name=value. "+str(e))
+			return
+
+		results_store = None
+		if store != "":
+			results_store = open_store(store)
+
+		# Grids of every world stacked along a leading replica axis, so the scents of all worlds are diffused together
+		food_batch = np.stack([landmarks[0]]*replicas)
+		water_batch = np.stack([landmarks[1]]*replicas)
+		food_scent_batch = food_batch.copy()
+		water_scent_batch = water_batch.copy()
 
 		# Initializing pygame
 		pygame.init()
 		clock = pygame.time.Clock()
-
-		crashed = False		
-		hour,day,hour_of_day = -1,0,0
-		show_scents = False
-		show_food_scent = False
-		show_water_scent = False
-		heart_image = pygame.image.load("heart.png")
-
-		while not crashed:
-			hour,day,hour_of_day = increment_time(hour,day,hour_of_day)
-			
-			hearts = []
-
-			for event in pygame.event.get():
-
-				if (event.type == pygame.QUIT):								# Quits simulation if user closes pygame window 
-					crashed = True	
-				if event.type == pygame.KEYDOWN:
-					if event.key == pygame.K_s:								# User can toggle the visualisation of cat scents with "s" key
-						show_scents = not show_scents	
-					if event.key == pygame.K_f:								# User can toggle the visualisation of food scents with "f" key
-						show_food_scent = not show_food_scent
-					if event.key == pygame.K_w:								# User can toggle the visualisation of water scents with "w" key
-						show_water_scent = not show_water_scent
-
-			if (max_hours>0) and (hour==max_hours):							# Quits the simulation after the specified number of iterations
-				crashed = True
-
-			cat_scent_array = update_cat_scents(alive_cats,cat_scent_array)
-			births += main_loop(alive_cats,terrain_array,food_array,water_array,cat_scent_array,neighbourhood,hour_of_day) 		
-			food_scent_array = np.where(food_array>0,food_array,diffuse(food_scent_array,neighbourhood))
-			water_scent_array = np.where(water_array>0,water_array,diffuse(water_scent_array,neighbourhood))
-			alive_cats, dead_cats = kill_cats(alive_cats,dead_cats)
+		heart_sprite = load_sprite("heart.png")
+
+		worlds = [] 													# Each world's simulation, and where and how its results are saved
+		for replica in range(replicas):
+			new_dir = "Simulation_M"+str(mating_cooldown_time)+"_S"+str(sleep_hours)	# Creating a unique name for the new directory
+			if output_dir != "":
+				new_dir = output_dir 											# Sweeps that vary other parameters name their own directories
+			if replicas > 1:
+				new_dir += "_R"+str(replica+1)
+
+			key = None
+			run_seed = -1
+			if seed >= 0:
+				run_seed = seed+replica 									# Each world has its own seed
+			if results_store is not None:
+				if run_seed >= 0:
+					key = run_key(args[0],args[1],run_parameters(),run_seed)
+					stored = get_result(results_store,key)
+					if stored is not None:									# Skipping runs that are already in the store
+						save_stored_result(new_dir,stored)
+						print("\nSkipping: results for seed "+str(run_seed)+" are already in "+store+" (saved to "+os.path.join(new_dir,"stored_result.txt")+")")
+						continue
+				else:
+					key = run_key(args[0],args[1],run_parameters(),str(datetime.datetime.now())+str(replica))		# Unseeded runs are never skipped
+
+			landmark_registry,flow_field = None,None
+			prepared = preloaded["landmarks"].get((args[0],args[1],neighbourhood,jump_height))
+			if prepared is not None:
+				landmark_registry = prepared[0].copy(food_batch[replica],water_batch[replica])
+				if navigation == "flow":
+					flow_field = prepared[1].copy()
+			simulation = Simulation(terrain_array,food_batch[replica],water_batch[replica],neighbourhood,init_pop,landmark_registry,flow_field,
+									food_scent_batch[replica],water_scent_batch[replica],**simulation_parameters(run_seed))		# Views into the stacked grids
+
+			world = {"simulation":simulation, "key":key, "run_seed":run_seed, "new_dir":new_dir, "publisher":None, "recorder":None, "frame_writer":None}
+			if publish_name != "" and len(worlds)==0:
+				world["publisher"] = StatePublisher(publish_name,terrain_array,publish_max_cats)		# Only the first world is published
+			if frame_interval>0:
+				world["frame_writer"] = FrameWriter(os.path.join(new_dir,"frames"),frame_format)
+			if replay_file != "":
+				world["recorder"] = ReplayRecorder(os.path.join(new_dir,replay_file),terrain_array,replay_keyframe_every)	# Saved with the rest of this run's results
+			worlds.append(world)
+
+		# Each timestep, every world runs its own cat phase, cat scents, deaths and stopping rules in turn, and only the scent
+		# diffusion is done once for all of them. The cats aren't stacked into arrays with a replica axis: the cat rules read
+		# their attributes one cat at a time and in each world's own random order, and the counters that could be updated
+		# across replicas at once are only a few percent of a timestep
+		while not all([world["simulation"].finished for world in worlds]):
+			running = [world for world in worlds if not world["simulation"].finished]
+			for world in running:
+				world["simulation"].step(diffuse=False)
+
+			if navigation != "flow":
+				food_diffused,water_diffused = diffuse_fields([food_scent_batch,water_scent_batch],neighbourhood,diffusion_threads)	# Every world's scents are diffused at the same time
+				np.copyto(food_scent_batch,np.where(food_batch>0,food_batch,food_diffused))
+				np.copyto(water_scent_batch,np.where(water_batch>0,water_batch,water_diffused))
+
+			for world in running:
+				simulation = world["simulation"]
+				hour,day,hour_of_day = simulation.hour,simulation.day,simulation.hour_of_day
+				if world["publisher"] is not None and hour%publish_every==0:
+					world["publisher"].publish(hour,day,hour_of_day,simulation.alive_cats,simulation.food_array,simulation.water_array,
+												simulation.food_scent_array,simulation.water_scent_array,simulation.cat_scents)
+				if world["recorder"] is not None:
+					world["recorder"].record(hour,simulation.alive_cats,simulation.dead_cats,simulation.food_array,simulation.water_array)
+				if world["frame_writer"] is not None and hour%frame_interval==0:
+					frame = render_frame(terrain_array,simulation.food_array,simulation.water_array,simulation.alive_cats,simulation.dead_cats,
+										cell_size,simulation.hearts,heart_sprite,time_text(hour,day,hour_of_day))
+					world["frame_writer"].add(hour,frame)								# Frame is saved on a background thread
 			clock.tick(framerate)																						
 
-		# show_cats(alive_cats,dead_cats)
-		stats = show_stats(init_cats,alive_cats,dead_cats,births)					# Prints statistics after the simulation is over
-		
-		now = str(datetime.datetime.now())[:19]
-		now = '_'.join(now.split(' '))
-		now = '.'.join(now.split(':'))
-		new_dir = "Simulation_M"+str(mating_cooldown_time)+"_S"+str(sleep_hours)	# Creating a unique name for the new directory
-		
-		if new_dir not in os.listdir():
-			os.mkdir(new_dir)				# Creating new directory for data to be saved in	
-		os.chdir(new_dir)
-
-		gameDisplay = pygame.display.set_mode((display_width,display_height))
-		pygame.display.set_caption("Cats")
-		fontface = pygame.ftfont.SysFont('Courier New',15,bold=True)
-
-		show_scents = False
-		show_food_scent = False
-		show_water_scent = False
-		draw_screen(terrain_array,food_array, water_array, alive_cats, dead_cats, show_scents, heart_image, hearts)
-		display_time(hour,day,hour_of_day,fontface,gameDisplay)
-		
-		pygame.image.save(gameDisplay,"simulation.png")							# Saving image of final frame of simulation
+		for world in worlds:
+			simulation = world["simulation"]
+			new_dir = world["new_dir"]
+			stats = simulation.show_stats()												# Statistics after the simulation is over
+			if simulation.stop_reason is not None:
+				stats += "Stopped early after "+str(simulation.hour)+" hours: "+simulation.stop_reason+"\n\n"
+			if results_store is not None:
+				save_result(results_store,world["key"],args[0],args[1],run_parameters(),world["run_seed"],simulation.stats())
+			for name in ["publisher","recorder","frame_writer"]:
+				if world[name] is not None:
+					world[name].close()												# Waiting for the remaining frames to be saved
+			simulation.close()
+
+			if not os.path.isdir(new_dir):
+				os.mkdir(new_dir)				# Creating new directory for data to be saved in	
+
+			hour,day,hour_of_day = simulation.hour,simulation.day,simulation.hour_of_day
+			frame = render_frame(terrain_array,simulation.food_array,simulation.water_array,simulation.alive_cats,simulation.dead_cats,cell_size,simulation.hearts,heart_sprite,time_text(hour,day,hour_of_day))
+			save_png(frame,os.path.join(new_dir,"simulation.png"))				# Saving image of final frame of simulation (no display needed)
+			if simulation.heatmap is not None:
+				if heatmap_file != "":
+					simulation.heatmap.save(os.path.join(new_dir,heatmap_file))
+				if heatmap_images:
+					for layer in layers:
+						background = render_frame(terrain_array,simulation.food_array,simulation.water_array,[],[],cell_size,time_text=(layer,"Total hours: "+str(hour)))
+						save_png(overlay_heatmap(background,simulation.heatmap.counts[layer],cell_size,layer_colours[layer]),os.path.join(new_dir,"heatmap_"+layer+".png"))
+
+			simulation.save_grids(new_dir) 											# Layout of food, water and cats in the final frame of simulation
+			simulation.save_log(new_dir,stats)
+		if results_store is not None:
+			results_store.close()
 		pygame.quit()													  		# Exit simulation
 
-		landmark_array_save = np.empty((num_rows,num_cols),dtype=object)		# Layout of food and water in the final frame of simulation
-		cats_array_save = np.empty((num_rows,num_cols),dtype=object)			# Positions of cats in final frame of simulation
-		for r in range(num_rows):
-			for c in range(num_cols):
-				cats_array_save[r,c] = ""
-				if water_array[r+1,c+1] > 0:
-					landmark_array_save[r,c] = "W "+str(water_array[r+1,c+1])
-				elif food_array[r+1,c+1] > 0:
-					landmark_array_save[r,c] = "F "+str(food_array[r+1,c+1])
-				else:
-					landmark_array_save[r,c] = ""
-
-		for cat in alive_cats+dead_cats:
-			r,c = cat.pos[0],cat.pos[1]
-			if cat.alive:
-				cats_array_save[r-1,c-1]="A"			# Alive cats represented by "A"
-			else:
-				cats_array_save[r-1,c-1]="D"			# Dead cats represented by "D"
-
-		# Converting the arrays to csv files and saving them
-		np.savetxt("final_landmarks.csv", landmark_array_save, delimiter=",", fmt='%s')
-		np.savetxt("final_cats.csv", cats_array_save, delimiter=",", fmt='%s')
-		
-		with open("log.txt","w") as out:
-			for ev in event_log:
-				out.write(ev)
-			out.write(stats)
-
-		os.chdir(main_dir)
-	quit()
\ No newline at end of file
+if __name__ == "__main__":
+	run_sweep(sys.argv[1:])
+	quit()
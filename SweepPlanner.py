@@ -0,0 +1,253 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# SweepPlanner.py - Space-filling parameter sweeps (Latin hypercube or Sobol) with adaptive refinement
+#
+# Usage: python3 SweepPlanner.py <terrain> <landmarks> <design> <points> [name=spec ...] [name=value ...]
+#	design: "lhs" for a Latin hypercube, "sobol" for a Sobol sequence, or "refine" to add points between stored
+#	        runs where the outcome changes fastest
+#	spec:   low:high for a range of whole numbers, a,b,c for a list of choices, or a single fixed value, for any
+#	        of the parameters in 'parameter_defaults'
+#	Any other name=value arguments are passed on to SweepBase.py, apart from the planner settings below
+#
+
+import numpy as np
+import subprocess
+import datetime
+import shutil
+import json
+import sys
+import os
+from SweepStore import open_store
+
+# Parameters the planner can vary, and the values used when they are left out
+parameter_defaults = {"neighbourhood":"M", "max_hours":500, "init_pop":20, "mating_cooldown_time":24, "sleep_hours":8,
+					"jump_height":4, "eating_threshold":25, "drinking_threshold":25}
+positional_parameters = ["neighbourhood","max_hours","init_pop","mating_cooldown_time","sleep_hours"]	# Passed to SweepBase.py in this order
+
+# Planner settings (can be changed with optional name=value command line arguments)
+planner_settings = {"metric":"population",			# Stored result that "refine" follows
+					"repeats":1, 					# Runs of each point, with seeds seed, seed+1, ... (simulated in one process, see replicas in SweepBase.py)
+					"dry_run":False, 				# Only prints the planned runs
+					"queue":"", 					# Adds the points to this work queue instead of running them (see SweepQueue.py)
+					"workers":0} 					# Runs this many points at a time in processes forked after the inputs are loaded (see SweepPool.py), 0 to start SweepBase.py for each point
+
+# Files a sweep directory needs to run SweepBase.py
+sweep_files = ["SweepBase.py","Simulation.py","FrameExport.py","Render.py","SweepStore.py","Interactions.py","FlowField.py","Diffusion.py",
+			"StatePublisher.py","Replay.py","Heatmaps.py","Landmarks.py","Neighbourhoods.py","CatScents.py","ParallelWorld.py","SweepPool.py","heart.png"]
+
+# Primitive polynomials and initial direction numbers (s, a, m_1..m_s) for Sobol dimensions 2 to 13
+# Joe, S. and Kuo, F. Y. 2008. "Constructing Sobol sequences with better two-dimensional projections", SIAM J. Sci. Comput. 30, 2635-2654 (new-joe-kuo-6.21201)
+direction_numbers = [(1,0,[1]), (2,1,[1,3]), (3,1,[1,3,1]), (3,2,[1,1,1]), (4,1,[1,1,3,3]), (4,4,[1,3,5,13]),
+					(5,2,[1,1,5,5,17]), (5,4,[1,1,5,5,5]), (5,7,[1,1,7,11,19]), (5,11,[1,1,5,1,1]), (5,13,[1,1,1,3,11]),
+					(5,14,[1,3,5,5,31])]
+sobol_bits = 30
+
+# Function that reads the parameter specs; returns the varied parameters (name -> list of choices or (low,high)) and the fixed ones
+def read_specs(args):
+	varied = {}
+	fixed = dict(parameter_defaults)
+	for arg in args:
+		name,spec = arg.split("=",1)
+		if ":" in spec:
+			low,high = spec.split(":")
+			if int(low)>int(high):
+				raise ValueError("Empty range for "+name+": "+spec)
+			varied[name] = (int(low),int(high))
+		elif "," in spec:
+			varied[name] = spec.split(",")
+		else:
+			fixed[name] = spec
+	return varied,fixed
+
+# Function that returns n points of a Latin hypercube in the unit cube: each dimension has exactly one point in each of n equal slices
+def latin_hypercube(n,dims,rng):
+	points = np.empty((n,dims))
+	for d in range(dims):
+		points[:,d] = (rng.permutation(n)+rng.random(n))/n
+	return points
+
+# Function that returns the first n points of a Sobol sequence in the unit cube (generated in Gray code order)
+def sobol(n,dims):
+	if dims>len(direction_numbers)+1:
+		raise ValueError("Sobol designs support up to "+str(len(direction_numbers)+1)+" parameters")
+	v = [[1<<(sobol_bits-1-i) for i in range(sobol_bits)]]				# First dimension: m_i = 1 for every i
+	for s,a,m in direction_numbers[:dims-1]:
+		dim = [m[i]<<(sobol_bits-1-i) for i in range(s)]
+		for i in range(s,sobol_bits):
+			value = dim[i-s] ^ (dim[i-s]>>s)
+			for k in range(1,s):
+				if (a>>(s-1-k)) & 1:
+					value ^= dim[i-k]
+			dim.append(value)
+		v.append(dim)
+	points = np.empty((n,dims))
+	x = [0]*dims
+	for i in range(n):
+		points[i] = [value/(1<<sobol_bits) for value in x]
+		c = 0
+		while (i>>c) & 1:															# Position of the lowest zero bit of i
+			c+=1
+		x = [x[d]^v[d][c] for d in range(dims)]
+	return points
+
+# Function that turns a point of the unit cube into parameter values
+def scale(point,varied):
+	values = {}
+	for u,(name,spec) in zip(point,varied.items()):
+		if isinstance(spec,list):
+			values[name] = spec[min(int(u*len(spec)),len(spec)-1)]
+		else:
+			low,high = spec
+			values[name] = min(low+int(u*(high-low+1)),high)
+	return values
+
+# Function that turns parameter values back into a point of the unit cube (the middle of the slice they came from)
+def unscale(values,varied):
+	point = []
+	for name,spec in varied.items():
+		if isinstance(spec,list):
+			point.append((spec.index(str(values[name]))+0.5)/len(spec))
+		else:
+			low,high = spec
+			point.append((int(values[name])-low+0.5)/(high-low+1))
+	return np.array(point)
+
+# Function that returns the average of a metric over the stored runs of every point of the parameter space
+def stored_points(store,terrain_filename,landmark_filename,varied,fixed,options,metric):
+	if metric not in ["hours_run","births","deaths","population","aggressive","friendly","meek","avg_age","avg_health","food_eaten","water_drunk"]:
+		raise ValueError("Not a numeric result: "+metric)
+	required = dict(fixed)
+	required.update(options)
+	points = {}
+	for terrain,landmarks,parameters,value in store.execute("SELECT terrain,landmarks,parameters,"+metric+" FROM runs"):
+		if os.path.basename(terrain)!=os.path.basename(terrain_filename) or os.path.basename(landmarks)!=os.path.basename(landmark_filename):
+			continue
+		parameters = json.loads(parameters)
+		if any(str(parameters[name]).upper()!=str(value).upper() for name,value in required.items() if name in parameters and name not in varied):
+			continue 																# Run from a different part of the parameter space
+		try:
+			key = tuple(str(parameters[name]) for name in varied)
+			point = unscale(parameters,varied)
+		except (KeyError,ValueError):
+			continue
+		if np.all((point>=0) & (point<=1)):
+			points.setdefault(key,[point,[]])[1].append(value)
+	return [(point,np.mean(values)) for point,values in points.values()]
+
+# Function that adds points between the stored runs whose metric changes fastest for the distance between them
+def refine(points,n,varied):
+	if len(points)<2:
+		raise ValueError("Refining needs at least 2 stored runs in this parameter space")
+	coordinates = np.array([point for point,value in points])
+	metric = np.array([value for point,value in points])
+	neighbours = min(len(varied)+1,len(points)-1)
+	pairs = {}
+	for i in range(len(points)):
+		distance = np.sqrt(((coordinates-coordinates[i])**2).sum(axis=1))
+		distance[i] = np.inf
+		for j in np.argsort(distance)[:neighbours]:								# Only compares each run with its nearest neighbours
+			pairs[(min(i,j),max(i,j))] = abs(metric[i]-metric[j])/distance[j]
+	existing = {tuple(scale(point,varied).values()) for point in coordinates}
+	planned = []
+	for (i,j),change in sorted(pairs.items(),key=lambda pair:-pair[1]):
+		values = scale((coordinates[i]+coordinates[j])/2,varied)
+		if tuple(values.values()) not in existing:								# Neighbouring whole numbers have nothing in between
+			existing.add(tuple(values.values()))
+			planned.append(values)
+		if len(planned)==n:
+			break
+	return planned
+
+# Function that returns the command line that runs SweepBase.py for one point of the sweep
+def run_command(terrain,landmarks,point,fixed,options,output_dir,seed,repeats):
+	values = dict(fixed)
+	values.update(point)
+	command = [sys.executable,"SweepBase.py",terrain,landmarks]+[str(values[name]) for name in positional_parameters]
+	command += [name+"="+str(values[name]) for name in parameter_defaults if name not in positional_parameters]
+	command += options+["output_dir="+output_dir,"seed="+str(seed),"replicas="+str(repeats)]
+	return command
+
+if __name__ == "__main__":
+	try:
+		terrain,landmarks,design,num_points = sys.argv[1],sys.argv[2],sys.argv[3].lower(),int(sys.argv[4])
+		specs = [arg for arg in sys.argv[5:] if arg.split("=",1)[0] in parameter_defaults]
+		settings = [arg for arg in sys.argv[5:] if arg.split("=",1)[0] in planner_settings]
+		options = [arg for arg in sys.argv[5:] if arg not in specs+settings]
+		if design == "refine" and not any([arg.startswith("store=") for arg in options]):
+			options.insert(0,"store=SweepResults.db") 											# Refining reads the results of the earlier points
+		for arg in settings:
+			name,value = arg.split("=",1)
+			if type(planner_settings[name]) == bool:
+				planner_settings[name] = value.upper() in ["Y","YES","TRUE","1"]
+			else:
+				planner_settings[name] = type(planner_settings[name])(value)
+		varied,fixed = read_specs(specs)
+		if design not in ["lhs","sobol","refine"] or len(varied)==0:
+			raise ValueError("")
+	except (IndexError,ValueError) as e:
+		print("\nError: Please enter a terrain csv, landmark csv, design (lhs, sobol or refine), number of points and at least one varied parameter (name=low:high or name=a,b,c). "+str(e))
+		quit()
+
+	options = [arg if not arg.startswith("store=") else "store="+os.path.abspath(arg.split("=",1)[1]) for arg in options]
+	store_file = ([""]+[arg.split("=",1)[1] for arg in options if arg.startswith("store=")])[-1] 	# Only used (and always given) when refining
+	seed = int(([-1]+[arg.split("=",1)[1] for arg in options if arg.startswith("seed=")])[-1]) 		# Unseeded unless a seed is given
+	options = [arg for arg in options if not arg.startswith("seed=")]
+	if design == "lhs":
+		planned = [scale(point,varied) for point in latin_hypercube(num_points,len(varied),np.random.default_rng(max(seed,0)))]
+	elif design == "sobol":
+		planned = [scale(point,varied) for point in sobol(num_points,len(varied))]
+	else:
+		store = open_store(store_file)
+		try:
+			passed = dict([arg.split("=",1) for arg in options])
+			planned = refine(stored_points(store,terrain,landmarks,varied,fixed,passed,planner_settings["metric"]),num_points,varied)
+		except ValueError as e:
+			print("\nError: "+str(e))
+			quit()
+		store.close()
+
+	new_dir = "Sweep"+datetime.datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
+	message = "Terrain file: "+terrain+"\nLandmarks file: "+landmarks+"\nDesign: "+design+" ("+str(len(planned))+" points)\n"
+	message += "Varied: "+" ".join([name+"="+(",".join(spec) if isinstance(spec,list) else str(spec[0])+":"+str(spec[1])) for name,spec in varied.items()])+"\n"
+	message += "Fixed: "+" ".join([name+"="+str(value) for name,value in fixed.items() if name not in varied])+"\n"
+	message += "Options: "+" ".join(options)+" seed="+str(seed)+" repeats="+str(planner_settings["repeats"])
+	print("\n"+message)
+	if planner_settings["dry_run"]:
+		for i,point in enumerate(planned):
+			print("Point "+str(i+1)+": "+" ".join([name+"="+str(value) for name,value in point.items()]))
+		quit()
+
+	if planner_settings["queue"] != "":
+		from SweepQueue import states, create_queue, add_point, points_in
+		queue_dir = planner_settings["queue"]
+		create_queue(queue_dir,terrain,landmarks)
+		first = sum([len(points_in(queue_dir,state)) for state in states])			# Numbering on from points already in the queue
+		for i,point in enumerate(planned):
+			point_id = "Point_"+str(first+i+1)
+			args = run_command(os.path.basename(terrain),os.path.basename(landmarks),point,fixed,options,point_id,seed,planner_settings["repeats"])[1:]
+			args = [arg for arg in args if not arg.startswith(("store=","output_dir="))]		# The queue gives every point its own
+			add_point(queue_dir,point_id,args," ".join([name+"="+str(value) for name,value in point.items()]))
+		print("\nAdded "+str(len(planned))+" points to "+queue_dir)
+		quit()
+
+	os.mkdir(new_dir)
+	for filename in sweep_files+[terrain,landmarks]:
+		shutil.copy(filename,new_dir)
+	os.chdir(new_dir)
+	with open("Parameters.txt","w") as out:
+		out.write(message+"\n")
+	with open("Plan.csv","w") as out:													# Which directory holds the results of each point
+		out.write(",".join(["point"]+list(varied))+"\n")
+		for i,point in enumerate(planned):
+			out.write(",".join(["Point_"+str(i+1)]+[str(value) for value in point.values()])+"\n")
+
+	terrain,landmarks = os.path.basename(terrain),os.path.basename(landmarks)
+	if planner_settings["workers"]>0:
+		from SweepPool import run_points
+		run_points([run_command(terrain,landmarks,point,fixed,options,"Point_"+str(i+1),seed,planner_settings["repeats"])[2:] for i,point in enumerate(planned)],planner_settings["workers"])
+		quit()
+	for i,point in enumerate(planned):
+		print("\n\nSimulating point "+str(i+1)+" of "+str(len(planned))+": "+" ".join([name+"="+str(value) for name,value in point.items()])+"\n",flush=True)
+		subprocess.run(run_command(terrain,landmarks,point,fixed,options,"Point_"+str(i+1),seed,planner_settings["repeats"]))		# Repeats are saved to Point_<n>_R<r>
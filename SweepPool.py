@@ -0,0 +1,99 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# SweepPool.py - Runs the points of a parameter sweep in processes forked from one that has already loaded everything
+#
+# Usage: python3 SweepPool.py <terrain> <landmarks> <neighbourhood> <max_hours> <cat_number> <low_cooldown> <hi_cooldown> <step_cooldown> <low_sleep> <hi_sleep> <step_sleep> [workers=N] [name=value ...]
+#	Same parameters as ParameterSweep.sh, and the results are saved the same way
+#
+# Running SweepBase.py once per point starts a new interpreter, imports numpy and pygame, reads the csv files and
+# builds the landmark registry and flow field every time, which takes as long as a short run. Here the parent does
+# all of that once and then forks a new process for every point (so options set by one point can't leak into the
+# next), which starts with the modules and inputs already in memory, shared copy-on-write with the parent.
+#
+
+import multiprocessing
+import datetime
+import shutil
+import time
+import sys
+import os
+
+# Pool settings (can be changed with optional name=value command line arguments)
+pool_settings = {"workers":os.cpu_count()} 			# Points run at the same time
+
+# Files copied into the sweep directory, as a record of what was run
+sweep_files = ["SweepBase.py","Simulation.py","FrameExport.py","Render.py","SweepStore.py","Interactions.py","FlowField.py","Diffusion.py",
+			"StatePublisher.py","Replay.py","Heatmaps.py","Landmarks.py","Neighbourhoods.py","CatScents.py","ParallelWorld.py","SweepPool.py","heart.png"]
+
+# Function that runs one point in a forked process; returns how long it took
+def run_point(args):
+	import SweepBase
+	start = time.time()
+	SweepBase.run_sweep(args)
+	return time.time()-start
+
+# Function that returns the neighbourhood and jump height a point runs with
+def point_settings(args,default_jump_height):
+	jump_height = default_jump_height
+	for arg in args[7:]:
+		if arg.startswith("jump_height="):
+			jump_height = int(arg.split("=",1)[1]) 					# Later arguments override earlier ones, as in SweepBase.py
+	return args[2].upper(),jump_height
+
+# Function that runs the points (lists of SweepBase.py arguments, all with the same terrain and landmark files) on 'workers' processes
+def run_points(points,workers):
+	for args in points:
+		if any([arg.startswith("parallel_workers=") and int(arg.split("=",1)[1])>0 for arg in args]):
+			raise ValueError("parallel_workers can't be used in a pool (pool processes can't start processes of their own)")
+	import SweepBase 															# Imported once, before forking
+	settings = set([point_settings(args,SweepBase.jump_height) for args in points])
+	SweepBase.preload(points[0][0],points[0][1],settings)
+	context = multiprocessing.get_context("fork")
+	with context.Pool(workers,maxtasksperchild=1) as pool: 						# Every point gets a fresh fork of this process
+		return pool.map(run_point,points,chunksize=1)
+
+if __name__ == "__main__":
+	try:
+		terrain,landmarks,neighbourhood,max_hours,init_pop = sys.argv[1],sys.argv[2],sys.argv[3],int(sys.argv[4]),int(sys.argv[5])
+		low_cooldown,hi_cooldown,step_cooldown,low_sleep,hi_sleep,step_sleep = [int(arg) for arg in sys.argv[6:12]]
+		if step_cooldown<=0 or step_sleep<=0:
+			raise ValueError("Steps must be positive")
+		options = []
+		for arg in sys.argv[12:]:
+			name,value = arg.split("=",1)
+			if name in pool_settings:
+				pool_settings[name] = int(value)
+			elif name == "store":
+				options.append("store="+os.path.abspath(value)) 					# The runs are started in the sweep directory
+			else:
+				options.append(arg)
+	except (IndexError,ValueError) as e:
+		print("\nError: Please enter the same parameters as ParameterSweep.sh. "+str(e))
+		quit()
+
+	new_dir = "Sweep"+str(datetime.datetime.now())[:19].replace(" ","_")
+	os.mkdir(new_dir)
+	for filename in sweep_files+[terrain,landmarks]:
+		shutil.copy(filename,new_dir)
+	os.chdir(new_dir) 															# So the results are saved here
+
+	message = "Terrain file: "+terrain+"\nLandmarks file: "+landmarks+"\nNeighbourhood: "+neighbourhood+"\nSimulation length (hours): "+str(max_hours)
+	message += "\nNumber of cats: "+str(init_pop)+"\nMating cooldown time: "+" ".join(sys.argv[6:9])+"\nSleep hours: "+" ".join(sys.argv[9:12])
+	message += "\nOptions: "+" ".join(options)+"\nWorkers: "+str(pool_settings["workers"])
+	print("\n"+message)
+	with open("Parameters.txt","w") as out:
+		out.write(message+"\n")
+
+	points = []
+	for m in range(low_cooldown,hi_cooldown+1,step_cooldown):
+		for s in range(low_sleep,hi_sleep+1,step_sleep):
+			points.append([os.path.basename(terrain),os.path.basename(landmarks),neighbourhood,str(max_hours),str(init_pop),str(m),str(s)]+options)
+	start = time.time()
+	try:
+		times = run_points(points,pool_settings["workers"])
+	except ValueError as e:
+		print("\nError: "+str(e))
+		quit()
+	print("\nRan "+str(len(points))+" points in "+str(round(time.time()-start,2))+" s ("+str(round(sum(times)/len(times),2))+" s per point)")
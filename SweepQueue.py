@@ -0,0 +1,239 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# SweepQueue.py - Parameter sweeps shared out between any number of workers through a directory on a shared filesystem
+#
+# Usage: python3 SweepQueue.py init <queue> <terrain> <landmarks> <neighbourhood> <max_hours> <cat_number> <low_cooldown> <hi_cooldown> <step_cooldown> <low_sleep> <hi_sleep> <step_sleep> [name=value ...]
+#        python3 SweepQueue.py work <queue> [workers=N] [heartbeat=S] [stale_after=S]
+#        python3 SweepQueue.py status <queue>
+#        python3 SweepQueue.py requeue <queue>
+#        python3 SweepQueue.py collect <queue> [store.db]
+#
+# Each point of the sweep is a small JSON file that moves between the pending, claimed, done and failed
+# directories of the queue. A worker claims a point by renaming it into claimed/ (only one rename can win),
+# and touches it every 'heartbeat' seconds while the point runs. Claims that haven't been touched for
+# 'stale_after' seconds belong to a worker that died, and are put back in pending/. Every point saves its
+# results to results/<point>/ and its own results store results/<point>.db, which 'collect' merges.
+# SweepPlanner.py can add its points to a queue with queue=<queue>.
+#
+
+import multiprocessing
+import subprocess
+import datetime
+import socket
+import shutil
+import json
+import time
+import sys
+import os
+from SweepStore import open_store, merge_store
+
+states = ["pending","claimed","done","failed"]
+
+# Worker settings (can be changed with optional name=value command line arguments)
+worker_settings = {"workers":1, 									# Worker processes started on this host
+				"heartbeat":30, 								# Seconds between touches of a claimed point
+				"stale_after":300, 								# Seconds without a touch before a claim is put back in pending/
+				"poll":10}										# Seconds between checks for stale claims while other workers finish
+
+# Files a queue needs to run SweepBase.py
+queue_files = ["SweepBase.py","Simulation.py","FrameExport.py","Render.py","SweepStore.py","Interactions.py","FlowField.py","Diffusion.py",
+			"StatePublisher.py","Replay.py","Heatmaps.py","Landmarks.py","Neighbourhoods.py","CatScents.py","ParallelWorld.py","heart.png"]
+
+# Function that creates a queue directory with its own copy of the simulation and data files
+def create_queue(queue_dir,terrain,landmarks):
+	for name in states+["results","files"]:
+		os.makedirs(os.path.join(queue_dir,name),exist_ok=True)
+	for filename in queue_files+[terrain,landmarks]:
+		shutil.copy(filename,os.path.join(queue_dir,"files"))
+
+# Function that adds a point to a queue; 'args' are the arguments of SweepBase.py, run from the queue's files directory
+def add_point(queue_dir,point_id,args,description):
+	args = args+["output_dir=../results/"+point_id,"store=../results/"+point_id+".db"]	# Paths are relative, so hosts can mount the queue anywhere
+	point = {"id":point_id, "args":args, "description":description}
+	temp_file = os.path.join(queue_dir,point_id+".tmp")
+	with open(temp_file,"w") as out:
+		json.dump(point,out)
+	os.rename(temp_file,os.path.join(queue_dir,"pending",point_id+".json"))		# Points only appear once they are complete
+
+# Function that returns the time on the shared filesystem (other hosts' clocks may not agree with this one)
+def queue_time(queue_dir):
+	clock_file = os.path.join(queue_dir,".clock."+socket.gethostname()+"."+str(os.getpid()))
+	with open(clock_file,"w"):
+		pass
+	now = os.stat(clock_file).st_mtime
+	os.remove(clock_file)
+	return now
+
+# Function that returns the ids of the points in one of the queue's states
+def points_in(queue_dir,state):
+	return sorted([name[:-5] for name in os.listdir(os.path.join(queue_dir,state)) if name.endswith(".json")])
+
+# Function that moves claims that haven't been touched for 'stale_after' seconds back to pending; returns their ids
+def requeue_stale(queue_dir,stale_after):
+	now = queue_time(queue_dir)
+	requeued = []
+	for point_id in points_in(queue_dir,"claimed"):
+		claimed_file = os.path.join(queue_dir,"claimed",point_id+".json")
+		try:
+			if now-os.stat(claimed_file).st_mtime > stale_after:
+				os.rename(claimed_file,os.path.join(queue_dir,"pending",point_id+".json"))
+				requeued.append(point_id)
+		except FileNotFoundError:
+			pass 																# Finished (or requeued by another worker) in the meantime
+	return requeued
+
+# Function that claims the next pending point; returns the point, or None if there is nothing left to claim
+def claim_point(queue_dir,worker_id):
+	for point_id in points_in(queue_dir,"pending"):
+		claimed_file = os.path.join(queue_dir,"claimed",point_id+".json")
+		try:
+			os.rename(os.path.join(queue_dir,"pending",point_id+".json"),claimed_file)
+			os.utime(claimed_file) 												# A rename keeps the time the point was queued, which would make the claim look stale
+		except FileNotFoundError:
+			continue 															# Another worker claimed it first
+		with open(claimed_file) as point_file:
+			point = json.load(point_file)
+		point["worker"] = worker_id
+		point["claimed"] = str(datetime.datetime.now())[:19]
+		with open(claimed_file,"w") as out:
+			json.dump(point,out)
+		return point
+	return None
+
+# Function that runs a claimed point, touching its claim while it runs; returns the exit status and the end of its output
+def run_point(queue_dir,point,heartbeat):
+	claimed_file = os.path.join(queue_dir,"claimed",point["id"]+".json")
+	with open(os.path.join(queue_dir,"results",point["id"]+".out"),"w") as output:
+		process = subprocess.Popen([sys.executable]+point["args"],cwd=os.path.join(queue_dir,"files"),stdout=output,stderr=subprocess.STDOUT)
+		while True:
+			try:
+				status = process.wait(timeout=heartbeat)
+				break
+			except subprocess.TimeoutExpired:
+				try:
+					os.utime(claimed_file) 												# Heartbeat
+				except FileNotFoundError:
+					pass 																# The claim went stale and was requeued; the run carries on anyway
+	with open(os.path.join(queue_dir,"results",point["id"]+".out")) as output:
+		tail = output.read()[-2000:]
+	return status,tail
+
+# Function that records the outcome of a point and releases its claim
+def finish_point(queue_dir,point,status,tail):
+	point["finished"] = str(datetime.datetime.now())[:19]
+	point["status"] = status
+	state = "done" if status==0 else "failed"
+	if status!=0:
+		point["output"] = tail
+	temp_file = os.path.join(queue_dir,point["id"]+"."+str(os.getpid())+".tmp")
+	with open(temp_file,"w") as out:
+		json.dump(point,out)
+	os.rename(temp_file,os.path.join(queue_dir,state,point["id"]+".json"))
+	for other in ["claimed","pending"]:											# Also removes a copy that was requeued while this run was going
+		try:
+			os.remove(os.path.join(queue_dir,other,point["id"]+".json"))
+		except FileNotFoundError:
+			pass
+
+# Function that claims and runs points until none are pending or claimed
+def work(queue_dir,settings):
+	worker_id = socket.gethostname()+":"+str(os.getpid())
+	while True:
+		point = claim_point(queue_dir,worker_id)
+		if point is None:
+			if len(points_in(queue_dir,"claimed"))==0:
+				break 															# Nothing left to do
+			time.sleep(settings["poll"])											# Waiting in case a claim goes stale
+			requeue_stale(queue_dir,settings["stale_after"])
+			continue
+		print(worker_id+": running "+point["id"]+" ("+point["description"]+")",flush=True)
+		status,tail = run_point(queue_dir,point,settings["heartbeat"])
+		finish_point(queue_dir,point,status,tail)
+		print(worker_id+": "+point["id"]+(" done" if status==0 else " failed with status "+str(status)),flush=True)
+
+# Function that prints the number of points in each state, and who is running the claimed ones
+def show_status(queue_dir):
+	now = queue_time(queue_dir)
+	for state in states:
+		print(state+": "+str(len(points_in(queue_dir,state))))
+	for point_id in points_in(queue_dir,"claimed"):
+		try:
+			with open(os.path.join(queue_dir,"claimed",point_id+".json")) as point_file:
+				point = json.load(point_file)
+			age = now-os.stat(os.path.join(queue_dir,"claimed",point_id+".json")).st_mtime
+		except (FileNotFoundError,ValueError):
+			continue
+		print("\t"+point_id+": "+point.get("worker","?")+", last heartbeat "+str(int(age))+" s ago")
+	for point_id in points_in(queue_dir,"failed"):
+		print("\t"+point_id+": failed")
+
+if __name__ == "__main__":
+	try:
+		command,queue_dir = sys.argv[1],sys.argv[2]
+		if command not in ["init","work","status","requeue","collect"]:
+			raise ValueError("Unknown command: "+command)
+		if command!="init" and not os.path.isdir(os.path.join(queue_dir,"pending")):
+			raise ValueError("Not a queue: "+queue_dir)
+	except (IndexError,ValueError) as e:
+		print("\nError: Please enter a command (init, work, status, requeue or collect) and a queue directory. "+str(e))
+		quit()
+
+	if command=="init":
+		try:
+			terrain,landmarks,neighbourhood,max_hours,init_pop = sys.argv[3],sys.argv[4],sys.argv[5],int(sys.argv[6]),int(sys.argv[7])
+			low_cooldown,hi_cooldown,step_cooldown,low_sleep,hi_sleep,step_sleep = [int(arg) for arg in sys.argv[8:14]]
+			if step_cooldown<=0 or step_sleep<=0:
+				raise ValueError("Steps must be positive")
+		except (IndexError,ValueError) as e:
+			print("\nError: Please enter the same parameters as ParameterSweep.sh. "+str(e))
+			quit()
+		options = sys.argv[14:]
+		create_queue(queue_dir,terrain,landmarks)
+		count = 0
+		for m in range(low_cooldown,hi_cooldown+1,step_cooldown):
+			for s in range(low_sleep,hi_sleep+1,step_sleep):
+				args = ["SweepBase.py",os.path.basename(terrain),os.path.basename(landmarks),neighbourhood,str(max_hours),str(init_pop),str(m),str(s)]+options
+				add_point(queue_dir,"Simulation_M"+str(m)+"_S"+str(s),args,"mating cooldown time "+str(m)+", sleep hours "+str(s))
+				count+=1
+		print("Added "+str(count)+" points to "+queue_dir)
+
+	elif command in ["work","requeue"]:
+		try:
+			for arg in sys.argv[3:]:
+				name,value = arg.split("=",1)
+				if name not in worker_settings:
+					raise ValueError("Unknown setting: "+name)
+				worker_settings[name] = int(value)
+		except ValueError as e:
+			print("\nError: Worker settings must be given as name=value. "+str(e))
+			quit()
+
+	if command=="work":
+		requeue_stale(queue_dir,worker_settings["stale_after"])
+		workers = [multiprocessing.Process(target=work,args=(queue_dir,worker_settings)) for i in range(worker_settings["workers"])]
+		for worker in workers:
+			worker.start()
+		for worker in workers:
+			worker.join()
+
+	elif command=="status":
+		show_status(queue_dir)
+
+	elif command=="requeue":
+		requeued = requeue_stale(queue_dir,worker_settings["stale_after"])
+		for point_id in points_in(queue_dir,"failed"):
+			os.rename(os.path.join(queue_dir,"failed",point_id+".json"),os.path.join(queue_dir,"pending",point_id+".json"))
+			requeued.append(point_id)
+		print("Requeued "+str(len(requeued))+" points")
+
+	elif command=="collect":
+		store_file = sys.argv[3] if len(sys.argv)>3 else "SweepResults.db"
+		store = open_store(store_file)
+		copied = 0
+		for name in sorted(os.listdir(os.path.join(queue_dir,"results"))):
+			if name.endswith(".db"):
+				copied += merge_store(store,os.path.join(queue_dir,"results",name))
+		store.close()
+		print("Copied "+str(copied)+" runs into "+store_file)
@@ -0,0 +1,112 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# SweepStore.py - SQLite store of parameter sweep results
+#
+# Usage: python3 SweepStore.py <store.db> [parameter ...]
+# Prints the number of runs and average results, grouped by the given parameters
+#
+
+import sqlite3
+import hashlib
+import json
+import datetime
+import sys
+
+# Results saved for each run, in the order they are stored
+result_columns = ["hours_run","stop_reason","births","deaths","population","aggressive","friendly","meek","avg_age","avg_health","food_eaten","water_drunk"]
+
+# Function that opens (and creates if needed) a results store
+def open_store(filename):
+	store = sqlite3.connect(filename,timeout=60)			# Waits for other sweep runs that are writing at the same time
+	store.execute("""CREATE TABLE IF NOT EXISTS runs (
+		key TEXT PRIMARY KEY,
+		terrain TEXT,
+		landmarks TEXT,
+		parameters TEXT,
+		seed INTEGER,
+		hours_run INTEGER,
+		stop_reason TEXT,
+		births INTEGER,
+		deaths INTEGER,
+		population INTEGER,
+		aggressive INTEGER,
+		friendly INTEGER,
+		meek INTEGER,
+		avg_age REAL,
+		avg_health REAL,
+		food_eaten REAL,
+		water_drunk REAL,
+		created TEXT)""")
+	store.commit()
+	return store
+
+# Function that returns the key of a run: a hash of the terrain and landmark data, every parameter and the seed
+def run_key(terrain_filename,landmark_filename,parameters,seed):
+	key = hashlib.sha256()
+	for filename in [terrain_filename,landmark_filename]:
+		with open(filename,"rb") as data_file:
+			key.update(hashlib.sha256(data_file.read()).digest())
+	key.update(json.dumps(parameters,sort_keys=True).encode())
+	key.update(str(seed).encode())
+	return key.hexdigest()
+
+# Function that checks whether a run already has results in the store
+def has_result(store,key):
+	return store.execute("SELECT 1 FROM runs WHERE key = ?",(key,)).fetchone() is not None
+
+# Function that returns the stored row of a run as a dictionary of column names and values (None if it isn't stored)
+def get_result(store,key):
+	cursor = store.execute("SELECT * FROM runs WHERE key = ?",(key,))
+	row = cursor.fetchone()
+	if row is None:
+		return None
+	return dict(zip([column[0] for column in cursor.description],row))
+
+# Function that saves the results of a run
+def save_result(store,key,terrain_filename,landmark_filename,parameters,seed,results):
+	values = [key,terrain_filename,landmark_filename,json.dumps(parameters,sort_keys=True),seed]
+	values += [results[column] for column in result_columns]
+	values.append(str(datetime.datetime.now())[:19])
+	store.execute("INSERT OR REPLACE INTO runs VALUES ("+",".join(["?"]*len(values))+")",values)
+	store.commit()
+
+# Function that copies every run from another store into this one; returns the number of runs copied
+def merge_store(store,other_filename):
+	store.execute("ATTACH DATABASE ? AS other",(other_filename,))
+	copied = store.execute("INSERT OR REPLACE INTO runs SELECT * FROM other.runs").rowcount
+	store.commit()
+	store.execute("DETACH DATABASE other")
+	return copied
+
+# Function that returns the number of runs and average results, grouped by the given parameters
+def summarise(store,group_by):
+	for name in group_by:
+		if not name.isidentifier():
+			raise ValueError("Not a valid parameter name: "+name)
+	groups = ["json_extract(parameters,'$."+name+"')" for name in group_by]
+	averages = ["AVG("+column+")" for column in result_columns if column!="stop_reason"]
+	extinctions = "SUM(population = 0)"
+	query = "SELECT "+",".join(groups+["COUNT(*)",extinctions]+averages)+" FROM runs"
+	if len(groups)>0:
+		query += " GROUP BY "+",".join(groups)+" ORDER BY "+",".join(groups)
+	return store.execute(query).fetchall()
+
+if __name__ == "__main__":
+	try:
+		store = open_store(sys.argv[1])
+	except (IndexError,sqlite3.Error):
+		print("\nError: Please enter a valid results store as a command line argument.")
+	else:
+		group_by = sys.argv[2:]
+		try:
+			rows = summarise(store,group_by)
+		except (ValueError,sqlite3.Error) as e:
+			print("\nError: "+str(e))
+		else:
+			headings = group_by+["runs","extinct"]+["avg_"+column if not column.startswith("avg_") else column for column in result_columns if column!="stop_reason"]
+			print("\t".join(headings))
+			for row in rows:
+				print("\t".join([str(round(value,2)) if isinstance(value,float) else str(value) for value in row]))
+		store.close()
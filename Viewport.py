@@ -0,0 +1,129 @@
+#
+# Author : Nimesha Jayatunge
+# ID : 20464631
+#
+# Viewport.py - The part of the map shown on the display, at a zoom level that can be changed, for maps of any size
+#
+# Zoomed in, each cell is drawn as a block of pixels and only the cells in view are looked at. Zoomed out past one
+# pixel per cell, each pixel is a block of cells: the terrain is averaged over the blocks (worked out once per zoom
+# level, as the terrain never changes), grids that change every timestep are sampled at one cell per block, and
+# landmarks, cats and scents are placed at the pixel of their block. Either way, a frame costs about as much as the
+# pixels in view (plus the cats and landmarks), however big the map is.
+#
+
+import numpy as np
+
+pixel_levels = [40,20,10,5,2,1] 							# Pixels per cell when zoomed in (most to least)
+shape_level = 4 											# Fewest pixels per cell that cats and landmarks are drawn as circles at
+
+# Function that maps a grid of heights (0 to 10) to RGB colours, as assign_terrain_colour() in Cats.py does
+def terrain_colours(heights):
+	return np.stack([5*heights+40, -2*heights+90, np.zeros(heights.shape)],axis=-1)
+
+class Viewport():
+	def __init__(self,terrain_array,width,height,cell_pixels):
+		self.rows,self.cols = terrain_array.shape 			# Cells in the map, including the border
+		self.width,self.height = width,height 				# Pixels in the view
+		self.colours = np.zeros((self.rows,self.cols,3)) 	# Colour of each cell, with the border black
+		self.colours[1:-1,1:-1] = terrain_colours(terrain_array[1:-1,1:-1])
+		self.overviews = {} 								# Terrain colours averaged over blocks of cells, by cells per block
+
+		# Zoom levels as (pixels per cell, cells per pixel), zoomed out until the whole map fits in the view
+		self.levels = [(pixels,1) for pixels in pixel_levels]
+		block = 1
+		while self.rows>block*height or self.cols>block*width:
+			block *= 2
+			self.levels.append((1,block))
+		self.level = self.levels.index((cell_pixels,1)) if (cell_pixels,1) in self.levels else 0
+		self.top,self.left = 0,0 							# Cell in the top left corner of the view
+		self.clamp()
+
+	# Method that returns the pixels per cell and the cells per pixel at the current zoom level
+	def scale(self):
+		return self.levels[self.level]
+
+	# Method that returns the number of rows and columns of cells in view
+	def span(self):
+		pixels,block = self.scale()
+		return -(-self.height*block//pixels),-(-self.width*block//pixels)
+
+	# Method that keeps the view on the map (on block boundaries when zoomed out)
+	def clamp(self):
+		rows,cols = self.span()
+		block = self.scale()[1]
+		self.top = max(min(self.top,self.rows-rows),0)//block*block
+		self.left = max(min(self.left,self.cols-cols),0)//block*block
+
+	# Method that zooms in (positive steps) or out (negative steps), keeping the cell in the centre of the view there
+	def zoom(self,steps):
+		rows,cols = self.span()
+		centre = (self.top+rows/2,self.left+cols/2)
+		self.level = max(min(self.level-steps,len(self.levels)-1),0)
+		rows,cols = self.span()
+		self.top,self.left = int(centre[0]-rows/2),int(centre[1]-cols/2)
+		self.clamp()
+
+	# Method that zooms out until the whole map is in view
+	def fit(self):
+		self.level = len(self.levels)-1
+		self.top,self.left = 0,0
+		self.clamp()
+
+	# Method that moves the view by quarters of its size (down and right for positive steps)
+	def pan(self,row_steps,col_steps):
+		rows,cols = self.span()
+		self.top += row_steps*max(rows//4,1)
+		self.left += col_steps*max(cols//4,1)
+		self.clamp()
+
+	# Method that returns the pixel of the top left corner of a cell (which can be a fraction of a cell, e.g. for hearts)
+	def pixel(self,r,c):
+		pixels,block = self.scale()
+		return int((c-self.left)*pixels/block),int((r-self.top)*pixels/block)
+
+	# Method that checks whether a cell is in view
+	def in_view(self,r,c):
+		rows,cols = self.span()
+		return self.top<=r<self.top+rows and self.left<=c<self.left+cols
+
+	# Method that turns a grid of the cells in view (one per block when zoomed out) into a grid of pixels, (height, width, ...)
+	def to_pixels(self,cells):
+		pixels = self.scale()[0]
+		if pixels>1:
+			cells = np.repeat(np.repeat(cells,pixels,axis=0),pixels,axis=1)
+		image = np.zeros((self.height,self.width)+cells.shape[2:],dtype=cells.dtype)
+		h,w = min(cells.shape[0],self.height),min(cells.shape[1],self.width)
+		image[:h,:w] = cells[:h,:w] 						# Past the edge of the map is left empty
+		return image
+
+	# Method that returns the values of a grid over the pixels in view (sampled at one cell per block when zoomed out)
+	def sample(self,grid):
+		rows,cols = self.span()
+		block = self.scale()[1]
+		return self.to_pixels(grid[self.top:self.top+rows:block,self.left:self.left+cols:block])
+
+	# Method that returns a grid of the cells in view with the given values placed at some cells (the largest value
+	# in each block when zoomed out), and 'empty' everywhere else
+	def scatter(self,cells,values,empty=0):
+		rows,cols = self.span()
+		block = self.scale()[1]
+		window = np.full((-(-rows//block),-(-cols//block)),empty,dtype=np.asarray(values).dtype)
+		if len(cells)>0:
+			cells = np.asarray(cells)
+			inside = (cells[:,0]>=self.top) & (cells[:,0]<self.top+rows) & (cells[:,1]>=self.left) & (cells[:,1]<self.left+cols)
+			np.maximum.at(window,((cells[inside,0]-self.top)//block,(cells[inside,1]-self.left)//block),np.asarray(values)[inside])
+		return window
+
+	# Method that returns the terrain in view as an RGB image of shape (height, width, 3)
+	def terrain_image(self):
+		block = self.scale()[1]
+		if block==1:
+			return self.sample(self.colours).astype(np.uint8)
+		if block not in self.overviews:
+			rows,cols = -(-self.rows//block),-(-self.cols//block)
+			padded = np.zeros((rows*block,cols*block,3))
+			padded[:self.rows,:self.cols] = self.colours
+			self.overviews[block] = padded.reshape((rows,block,cols,block,3)).mean(axis=(1,3))		# Averaged over each block of cells
+		rows,cols = self.span()
+		overview = self.overviews[block][self.top//block:(self.top+rows)//block+1,self.left//block:(self.left+cols)//block+1]
+		return self.to_pixels(overview).astype(np.uint8)